@@ -0,0 +1,5 @@
+"""benchmarks
+
+Performance benchmarks for bluebox, run them with
+``python -m benchmarks.run``.
+"""
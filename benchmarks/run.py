@@ -0,0 +1,442 @@
+"""run.py
+
+This file contains the benchmark runner for bluebox. It measures the
+synthesis, sequencing and WAV export throughput and the peak memory of
+each benchmark, and writes the results as JSON so runs of different
+versions can be compared with --compare.
+
+Usage:
+    python -m benchmarks.run [-o results.json] [--compare baseline.json]
+"""
+
+import typing as t
+import argparse
+import functools
+import io
+import os
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from bluebox import __version__
+from bluebox.box import Sequencer
+from bluebox.backends import DummyBackend, WavBackend
+from bluebox.decode import decode_file
+from bluebox.freqs import DTMF
+from bluebox.mixer import Mixer, Voice
+from bluebox.wave import OSCILLATORS, SineWave, numpy_available
+
+SAMPLE_RATE = 44100.0
+SHORT_SEQUENCE = '18005551234'
+LONG_SEQUENCE = '0123456789*#' * 100
+
+
+class Benchmark(t.NamedTuple):
+    """A benchmark case.
+
+    setup is called before every run and returns the function to time,
+    which returns the number of samples it produced.
+    """
+
+    name: str
+    setup: t.Callable[[], t.Callable[[], int]]
+    params: t.Dict[str, t.Any] = {}
+
+
+def _sine(length: float) -> t.Callable[[], int]:
+    """Consume a tone from SineWave.sine."""
+    wave = SineWave(sample_rate=SAMPLE_RATE)
+
+    def run() -> int:
+        n = 0
+        for _ in wave.sine(1000.0, length, 0.5):
+            n += 1
+        return n
+    return run
+
+
+def _sine_block(
+        length: float,
+        engine: str,
+        oscillator: str) -> t.Callable[[], int]:
+    """Render a tone with SineWave.sine_block."""
+    wave = SineWave(
+        sample_rate=SAMPLE_RATE, engine=engine, oscillator=oscillator)
+
+    def run() -> int:
+        return len(wave.sine_block(1000.0, length, 0.5))
+    return run
+
+
+def _sequence(codes: str, tone_cache_size: int) -> t.Callable[[], int]:
+    """Consume the samples of Sequencer.sequence."""
+    seq = Sequencer(
+        mf=DTMF(),
+        sample_rate=SAMPLE_RATE,
+        backend=DummyBackend,
+        tone_cache_size=tone_cache_size)
+
+    def run() -> int:
+        n = 0
+        for _ in seq.sequence(codes):
+            n += 1
+        return n
+    return run
+
+
+def _blocks(codes: str, tone_cache_size: int) -> t.Callable[[], int]:
+    """Consume the blocks of Sequencer.blocks."""
+    seq = Sequencer(
+        mf=DTMF(),
+        sample_rate=SAMPLE_RATE,
+        backend=DummyBackend,
+        tone_cache_size=tone_cache_size)
+
+    def run() -> int:
+        return sum(len(block) for block in seq.blocks(codes))
+    return run
+
+
+def _mix(codes: str, voices: int, engine: str) -> t.Callable[[], int]:
+    """Consume the blocks of Mixer.blocks for staggered voices."""
+    seq = Sequencer(
+        mf=DTMF(), sample_rate=SAMPLE_RATE, backend=DummyBackend,
+        engine=engine)
+    mixer = Mixer(seq, headroom=20.0)
+    # each voice starts one tone (plus pause) after the previous one
+    parts = [Voice(codes, i * 62.0) for i in range(voices)]
+
+    def run() -> int:
+        return sum(len(block) for block in mixer.blocks(parts))
+    return run
+
+
+def _render_range(
+        codes: str,
+        position: float,
+        n_samples: int) -> t.Callable[[], int]:
+    """Render a window at a relative position with render_range."""
+    seq = Sequencer(
+        mf=DTMF(), sample_rate=SAMPLE_RATE, backend=DummyBackend)
+    plan = seq.plan(codes)
+    start = int((plan.total_samples - n_samples) * position)
+
+    def run() -> int:
+        return len(seq.render_range(plan, start, n_samples))
+    return run
+
+
+def _render_parallel(codes: str, workers: int) -> t.Callable[[], int]:
+    """Render a sequence to raw int16 samples with render_parallel."""
+    seq = Sequencer(
+        mf=DTMF(), sample_rate=SAMPLE_RATE, backend=DummyBackend)
+    plan = seq.plan(codes)
+
+    def run() -> int:
+        return seq.render_parallel(
+            plan, io.BytesIO(), workers=workers,
+            chunk_frames=plan.total_samples // (4 * workers) + 1)
+    return run
+
+
+def _wav_export(
+        directory: Path,
+        codes: str,
+        sample_format: str) -> t.Callable[[], int]:
+    """Time WavBackend.close on a filled buffer."""
+    seq = Sequencer(
+        mf=DTMF(), sample_rate=SAMPLE_RATE, backend=DummyBackend)
+    backend = WavBackend(
+        sample_rate=SAMPLE_RATE,
+        output_path=directory / 'export.wav',
+        sample_format=sample_format)
+    for block in seq.blocks(codes):
+        backend.write(block)
+    n = len(backend._buffer)
+
+    def run() -> int:
+        backend.close()
+        return n
+    return run
+
+
+def _wav_write(
+        directory: Path,
+        codes: str,
+        mode: str) -> t.Callable[[], int]:
+    """Play a sequence into a buffered, streaming or memory mapped WAV."""
+    backend = WavBackend(
+        sample_rate=SAMPLE_RATE,
+        output_path=directory / f'write-{mode}.wav',
+        streaming=mode == 'streaming',
+        memory_map=mode == 'mmap')
+    seq = Sequencer(mf=DTMF(), sample_rate=SAMPLE_RATE, backend=backend)
+    seq.prerender(codes)
+    n = seq.plan(codes).total_samples
+
+    def run() -> int:
+        seq(codes)
+        return n
+    return run
+
+
+def _decode(
+        directory: Path,
+        codes: str,
+        engine: str) -> t.Callable[[], int]:
+    """Decode a rendered WAV file with decode_file."""
+    path = directory / 'decode.wav'
+    backend = WavBackend(sample_rate=SAMPLE_RATE, output_path=path)
+    Sequencer(mf=DTMF(), sample_rate=SAMPLE_RATE, backend=backend)(codes)
+    mf = DTMF()
+
+    def run() -> int:
+        decode_file(path, mf, engine=engine)
+        return (path.stat().st_size - 44) // 2
+    return run
+
+
+def _startup(directory: Path, backend: str) -> t.Callable[[], int]:
+    """Time a fresh ``python -m bluebox`` process writing one tone.
+
+    This tracks the import and initialization cost of the CLI, the
+    number of samples is that of the written sequence.
+    """
+    output = directory / f'startup-{backend}.wav'
+    command = [sys.executable, '-m', 'bluebox', '-b', backend, '-r', '0',
+               '-o', str(output), '1']
+
+    def run() -> int:
+        subprocess.run(command, check=True, capture_output=True)
+        return (output.stat().st_size - 44) // 2
+    return run
+
+
+def benchmarks(directory: Path, quick: bool = False) -> t.List[Benchmark]:
+    """Get the benchmark cases.
+
+    Args:
+        directory: Directory for the exported WAV files.
+        quick: Use short inputs, e.g. to check that the runner works.
+    """
+    length = 100.0 if quick else 1000.0
+    long_sequence = LONG_SEQUENCE[:24] if quick else LONG_SEQUENCE
+    engines = ['python'] + (['numpy'] if numpy_available() else [])
+    cases = [
+        Benchmark(
+            'sine', functools.partial(_sine, length), {'length_ms': length}),
+    ]
+    for engine in engines:
+        for oscillator in OSCILLATORS:
+            cases.append(Benchmark(
+                'sine_block',
+                functools.partial(_sine_block, length, engine, oscillator),
+                {'length_ms': length, 'engine': engine,
+                 'oscillator': oscillator}))
+    for label, codes in (('short', SHORT_SEQUENCE), ('long', long_sequence)):
+        for cache in (0, 128):
+            cases.append(Benchmark(
+                'sequence',
+                functools.partial(_sequence, codes, cache),
+                {'sequence': label, 'codes': len(codes),
+                 'tone_cache_size': cache}))
+        cases.append(Benchmark(
+            'blocks',
+            functools.partial(_blocks, codes, 128),
+            {'sequence': label, 'codes': len(codes),
+             'tone_cache_size': 128}))
+    for engine in engines:
+        for voices in (1, 8, 32):
+            cases.append(Benchmark(
+                'mix',
+                functools.partial(_mix, SHORT_SEQUENCE, voices, engine),
+                {'codes': len(SHORT_SEQUENCE), 'voices': voices,
+                 'engine': engine}))
+    window = int(SAMPLE_RATE * (0.1 if quick else 1.0))
+    for position in (0.0, 1.0):
+        cases.append(Benchmark(
+            'render_range',
+            functools.partial(_render_range, long_sequence, position, window),
+            {'codes': len(long_sequence), 'position': position,
+             'window': window}))
+    for workers in sorted({1, os.cpu_count() or 1}):
+        cases.append(Benchmark(
+            'render_parallel',
+            functools.partial(_render_parallel, long_sequence, workers),
+            {'codes': len(long_sequence), 'workers': workers}))
+    for engine in engines:
+        cases.append(Benchmark(
+            'decode',
+            functools.partial(_decode, directory, SHORT_SEQUENCE, engine),
+            {'codes': len(SHORT_SEQUENCE), 'engine': engine}))
+    cases.append(Benchmark(
+        'startup', functools.partial(_startup, directory, 'wav'),
+        {'backend': 'wav'}))
+    for sample_format in ('int16', 'float32'):
+        cases.append(Benchmark(
+            'wav_export',
+            functools.partial(
+                _wav_export, directory, long_sequence, sample_format),
+            {'codes': len(long_sequence), 'sample_format': sample_format}))
+    for mode in ('buffered', 'streaming', 'mmap'):
+        cases.append(Benchmark(
+            'wav_write',
+            functools.partial(_wav_write, directory, long_sequence, mode),
+            {'codes': len(long_sequence), 'mode': mode}))
+    return cases
+
+
+def measure(benchmark: Benchmark, repeat: int) -> t.Dict[str, t.Any]:
+    """Run a benchmark and collect its timing and peak memory.
+
+    The best of repeat timed runs is reported, the peak memory comes
+    from one extra run traced with tracemalloc (setup excluded).
+    """
+    times = []
+    samples = 0
+    for _ in range(repeat):
+        run = benchmark.setup()
+        start = time.perf_counter()
+        samples = run()
+        times.append(time.perf_counter() - start)
+
+    run = benchmark.setup()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {
+        'name': benchmark.name,
+        'params': benchmark.params,
+        'samples': samples,
+        'seconds': best,
+        'mean_seconds': sum(times) / len(times),
+        'samples_per_sec': samples / best if best > 0 else None,
+        'peak_memory': peak,
+    }
+
+
+def key(result: t.Mapping[str, t.Any]) -> str:
+    """Get a key identifying a benchmark across runs."""
+    return result['name'] + json.dumps(result['params'], sort_keys=True)
+
+
+def compare(
+        results: t.Mapping[str, t.Any],
+        baseline: t.Mapping[str, t.Any]) -> t.List[str]:
+    """Compare the results with a baseline run.
+
+    Returns:
+        One line per benchmark found in both runs, with the relative
+        change of the time and of the peak memory.
+    """
+    old = {key(r): r for r in baseline['benchmarks']}
+    lines = []
+    for result in results['benchmarks']:
+        base = old.get(key(result))
+        if base is None or not base['seconds']:
+            continue
+        time_change = result['seconds'] / base['seconds'] - 1
+        memory_change = (
+            result['peak_memory'] / base['peak_memory'] - 1
+            if base['peak_memory'] else 0.0)
+        lines.append(
+            f'{result["name"]:<12} {json.dumps(result["params"])}: '
+            f'time {time_change:+.1%}, peak memory {memory_change:+.1%}')
+    return lines
+
+
+def run(
+        repeat: int = 5,
+        quick: bool = False,
+        name: t.Optional[str] = None) -> t.Dict[str, t.Any]:
+    """Run the benchmarks.
+
+    Args:
+        repeat: Number of timed runs per benchmark.
+        quick: Use short inputs.
+        name: Only run the benchmarks with this name.
+
+    Returns:
+        The results, ready to be dumped as JSON.
+    """
+    try:
+        import numpy
+        numpy_version: t.Optional[str] = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            measure(benchmark, repeat)
+            for benchmark in benchmarks(Path(directory), quick)
+            if name is None or benchmark.name == name
+        ]
+    return {
+        'bluebox': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'numpy': numpy_version,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': repeat,
+        'quick': quick,
+        'benchmarks': results,
+    }
+
+
+def parse_args(args: t.Optional[t.Sequence[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Run the bluebox benchmarks.')
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        help='Write the JSON results to this file instead of stdout.')
+    parser.add_argument(
+        '-r', '--repeat',
+        type=int,
+        default=5,
+        help='Number of timed runs per benchmark, the best is reported.')
+    parser.add_argument(
+        '-q', '--quick',
+        action='store_true',
+        help='Use short inputs.')
+    parser.add_argument(
+        '-n', '--name',
+        type=str,
+        help='Only run the benchmarks with this name.')
+    parser.add_argument(
+        '-c', '--compare',
+        type=Path,
+        help='Compare the results with a previous JSON results file.')
+    return parser.parse_args(args)
+
+
+def main(args: t.Optional[t.Sequence[str]] = None) -> None:
+    """Run the benchmarks from the command line."""
+    options = parse_args(args)
+    if options.repeat < 1:
+        sys.exit('Repeat must be at least 1')
+    results = run(options.repeat, options.quick, options.name)
+    output = json.dumps(results, indent=2)
+    if options.output:
+        options.output.write_text(output + '\n')
+    else:
+        print(output)
+    if options.compare:
+        baseline = json.loads(options.compare.read_text())
+        print('\n'.join(compare(results, baseline)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
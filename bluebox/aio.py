@@ -0,0 +1,60 @@
+"""aio.py
+
+This file contains the asyncio interface of bluebox. The
+AsyncSequencer renders a sequence block by block and yields to the
+event loop between blocks, so many sequences can be generated and
+written from one event loop without a thread per call.
+"""
+
+import typing as t
+import asyncio
+from .blocks import Block
+from .plan import TimingPlan
+from .box import Sequencer
+
+
+class AsyncSequencer(Sequencer):
+    """AsyncSequencer class for generating sequences from coroutines.
+
+    Takes the same arguments as :class:`~bluebox.box.Sequencer`, the
+    synchronous methods keep working.
+    """
+
+    async def ablocks(
+            self,
+            codes: t.Union[str, TimingPlan],
+            frame_size: t.Optional[int] = None) -> t.AsyncIterator[Block]:
+        """Generate a sequence of waveforms as fixed-size blocks.
+
+        Each block is rendered when it is requested and control goes
+        back to the event loop after every block.
+
+        Args:
+            codes: The sequence of codes or its timing plan.
+            frame_size: The number of frames per block, defaults to the
+                frame size of the Sequencer.
+
+        Returns:
+            An async iterator of read-only sample blocks.
+        """
+        for block in self.blocks(codes, frame_size):
+            yield block
+            await asyncio.sleep(0)
+
+    async def play(self, codes: str, close: bool = True) -> None:
+        """Play a sequence through the backend's awaitable writes.
+
+        Returns once the backend has drained the sequence.
+
+        Args:
+            codes: The sequence of codes.
+            close: If True, close the backend afterwards. Ignored
+                inside a session.
+        """
+        plan = self.plan(codes)
+        self.backend.reserve(plan.total_samples)
+        await self.backend.aplay_blocks(self.ablocks(plan), close)
+
+    async def drain(self) -> None:
+        """Wait until the backend has played everything written."""
+        await self.backend.drain()
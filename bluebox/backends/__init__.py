@@ -1,20 +1,62 @@
 import typing as t
+import importlib
 from .base import BlueboxBackend as BlueboxBackend  # noqa: F401
-from .backend_pyaudio import PyAudioBackend as PyAudioBackend  # noqa: F401
-from .backend_dummy import DummyBackend as DummyBackend  # noqa: F401
-from .backend_wav import WavBackend as WavBackend  # noqa: F401
 
-_BACKENDS: t.Dict[str, t.Type[BlueboxBackend]] = {}
+if t.TYPE_CHECKING:
+    from .backend_dummy import DummyBackend as DummyBackend  # noqa: F401
+    from .backend_wav import WavBackend as WavBackend  # noqa: F401
+    from .backend_pcm import PcmBackend as PcmBackend  # noqa: F401
+    from .backend_pyaudio import PyAudioBackend as PyAudioBackend  # noqa: F401, E501
+    from .backend_pyaudio import PyAudioBackendNonBlocking as PyAudioBackendNonBlocking  # noqa: F401, E501
 
+# backends are given as classes or as 'module:Class' strings, the
+# latter are only imported by get_backend, e.g. to keep pyaudio and
+# PortAudio out of the startup of the wav backend and the socket
+# modules of the pcm backend out of everything else
+_BACKENDS: t.Dict[str, t.Union[t.Type[BlueboxBackend], str]] = {}
 
-def register_backend(name: str, backend: t.Type[BlueboxBackend]) -> None:
-    """Register a backend."""
+# classes importable from this package without loading their module
+_LAZY: t.Dict[str, str] = {
+    'PyAudioBackend': '.backend_pyaudio:PyAudioBackend',
+    'PyAudioBackendNonBlocking': '.backend_pyaudio:PyAudioBackendNonBlocking',
+    'DummyBackend': '.backend_dummy:DummyBackend',
+    'WavBackend': '.backend_wav:WavBackend',
+    'PcmBackend': '.backend_pcm:PcmBackend',
+}
+
+
+def _load(path: str) -> t.Type[BlueboxBackend]:
+    """Import a backend class from a 'module:Class' path.
+
+    Relative module names are resolved against this package.
+    """
+    module, _, name = path.partition(':')
+    return getattr(importlib.import_module(module, __name__), name)
+
+
+def register_backend(
+        name: str,
+        backend: t.Union[t.Type[BlueboxBackend], str]) -> None:
+    """Register a backend.
+
+    Args:
+        name: The name of the backend.
+        backend: The backend class, or its 'module:Class' path to
+            import it when it is first requested.
+    """
     _BACKENDS[name] = backend
 
 
 def get_backend(name: str) -> t.Type[BlueboxBackend]:
-    """Get a backend."""
-    return _BACKENDS[name]
+    """Get a backend, importing it on first use.
+
+    Raises:
+        KeyError: If the backend is not registered.
+    """
+    backend = _BACKENDS[name]
+    if isinstance(backend, str):
+        backend = _BACKENDS[name] = _load(backend)
+    return backend
 
 
 def list_backends() -> t.List[str]:
@@ -22,6 +64,17 @@ def list_backends() -> t.List[str]:
     return list(_BACKENDS.keys())
 
 
-register_backend('pyaudio', PyAudioBackend)
-register_backend('dummy', DummyBackend)
-register_backend('wav', WavBackend)
+def __getattr__(name: str) -> t.Any:
+    """Import the lazily loaded backend classes on first access."""
+    if name in _LAZY:
+        backend = _load(_LAZY[name])
+        globals()[name] = backend
+        return backend
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+register_backend('pyaudio', _LAZY['PyAudioBackend'])
+register_backend('pyaudio-nb', _LAZY['PyAudioBackendNonBlocking'])
+register_backend('dummy', _LAZY['DummyBackend'])
+register_backend('wav', _LAZY['WavBackend'])
+register_backend('pcm', _LAZY['PcmBackend'])
@@ -2,19 +2,46 @@
 
 This file contains the dummy backend for bluebox.
 This is used for testing and instead of generating
-sound, it can print the data to the console, or return
-it as a list.
+sound, it can print the data to the console, return
+it as a list, capture it into a compact float32 array
+or only keep summary statistics.
 """
 
 import typing as t
 import logging
+import math
+from array import array
 from .base import BlueboxBackend
+from ..blocks import Block, block_stats, iter_blocks, to_float32_bytes, to_list
+
+MODES = ('print', 'list', 'array', 'stats')
+
+
+class CaptureStats(t.NamedTuple):
+    """Summary statistics of the captured samples."""
+
+    samples: int
+    rms: float
+    peak: float
 
 
 class DummyBackend(BlueboxBackend):
-    """DummyBackend class for the dummy backend."""
+    """DummyBackend class for the dummy backend.
+
+    Modes:
+        print - Print every block.
+        list - Keep the samples in a list of python floats.
+        array - Keep the samples in a growable ``array('f')``, 4 bytes
+            per sample, see :attr:`buffer`.
+        stats - Only keep the sample count, sum of squares and peak,
+            see :meth:`stats`.
+    """
 
     _data: t.List[float]
+    _buffer: 'array[float]'
+    _count: int = 0
+    _sum_squares: float = 0.0
+    _peak: float = 0.0
 
     def __init__(
                 self,
@@ -28,29 +55,32 @@ class DummyBackend(BlueboxBackend):
         super().__init__(sample_rate, channels, amplitude, logger, **kwargs)
         self._mode = mode
         self._data = []
+        self._buffer = array('f')
 
-    def _to_bytes(self, data: t.Iterator[float]) -> t.List[float]:
-        """Wrap the data in a buffer."""
-        _data = []
-        while True:
-            try:
-                d = next(data)
-                _data.append(d)
-            except StopIteration:
-                break
+    def _to_bytes(self, block: Block) -> t.List[float]:
+        """Wrap the block in a buffer."""
+        return to_list(block)
 
-        return _data
-
-    def play(self, data: t.Iterator[float], close: bool = True) -> None:
-        """Play the given data."""
-        d = self._to_bytes(data)
-        if self._mode == 'print':
-            print(d)
+    def write(self, block: Block) -> None:
+        """Consume a block of samples."""
+        if self._mode == 'array':
+            self._buffer.frombytes(to_float32_bytes(block))
+        elif self._mode == 'stats':
+            count, sum_squares, peak = block_stats(block)
+            self._count += count
+            self._sum_squares += sum_squares
+            self._peak = max(self._peak, peak)
+        elif self._mode == 'print':
+            print(self._to_bytes(block))
         elif self._mode == 'list':
-            self._data += d
+            self._data.extend(self._to_bytes(block))
         else:
             raise ValueError(f'Invalid mode: {self._mode}')
 
+    def play(self, data: t.Iterator[float], close: bool = True) -> None:
+        """Play the given data."""
+        self.play_blocks(iter_blocks(data), close)
+
     def play_all(self, queue: t.Iterator[t.Iterator[float]]) -> None:
         """Play the given data and then stop."""
         for data in queue:
@@ -68,10 +98,44 @@ class DummyBackend(BlueboxBackend):
         """Delete the backend."""
         self.close()
 
-    def get_data(self) -> t.List[float]:
-        """Get the data."""
+    def get_data(self) -> t.Sequence[float]:
+        """Get the data.
+
+        Returns:
+            The list of samples in list mode, the float32 array in
+            array mode.
+        """
+        if self._mode == 'array':
+            return self._buffer
         return self._data
 
+    @property
+    def buffer(self) -> memoryview:
+        """A read-only view of the samples captured in array mode.
+
+        The array cannot grow while a view is held, release it (or use
+        it in a with block) before playing more.
+        """
+        return memoryview(self._buffer).toreadonly()
+
+    def stats(self) -> CaptureStats:
+        """Get the number, RMS and peak of the captured samples.
+
+        Works in every mode but print, in stats mode nothing else is
+        kept.
+        """
+        if self._mode == 'stats':
+            count, sum_squares, peak = (
+                self._count, self._sum_squares, self._peak)
+        else:
+            count, sum_squares, peak = block_stats(self.get_data())
+        rms = math.sqrt(sum_squares / count) if count else 0.0
+        return CaptureStats(count, rms, peak)
+
     def clear_data(self) -> None:
         """Clear the data."""
         self._data = []
+        del self._buffer[:]
+        self._count = 0
+        self._sum_squares = 0.0
+        self._peak = 0.0
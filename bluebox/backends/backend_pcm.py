@@ -0,0 +1,287 @@
+"""backend_pcm.py
+
+This file contains the raw PCM streaming backend for bluebox.
+Headerless little-endian samples are written to stdout, a file
+descriptor, a file or a socket as they are synthesized, e.g. to pipe
+them into sox, ffmpeg or a media server. At most buffer_frames frames
+are held before they are written, and a full pipe or socket blocks
+the writer, so the memory use stays constant.
+"""
+
+import typing as t
+import logging
+import os
+import select
+import socket
+import sys
+from pathlib import Path
+from .base import BlueboxBackend
+from ..blocks import Block, iter_blocks
+from ..pcm import encode, get_format
+
+# raw PCM formats by their sox/ffmpeg names
+PCM_FORMATS: t.Dict[str, str] = {
+    's16le': 'int16',
+    's24le': 'int24',
+    's32le': 'int32',
+    'f32le': 'float32',
+}
+
+
+def get_pcm_format(name: str) -> str:
+    """Get the sample format of a raw PCM format name.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    try:
+        return PCM_FORMATS[name]
+    except KeyError:
+        raise ValueError(
+            f'Invalid PCM format: {name}, must be one of '
+            f'{", ".join(PCM_FORMATS)}') from None
+
+
+class PcmBackend(BlueboxBackend):
+    """PcmBackend class for streaming raw PCM.
+
+    Outputs:
+        None or '-' - stdout.
+        int - An open file descriptor, it is not closed.
+        socket.socket - A connected socket, it is not closed.
+        'tcp://host:port' or 'unix:///path' - A socket connected on
+            the first write and closed with the backend.
+        other str or Path - A file created on the first write.
+    """
+
+    _output: t.Union[None, int, str, Path, socket.socket]
+    _format: str
+    _dither: bool
+    _limit: int
+    _timeout: t.Optional[float]
+    _pending: bytearray
+    _fd: t.Optional[int] = None
+    _socket: t.Optional[socket.socket] = None
+    _owned: bool = False
+    _truncated: bool = False
+    _bytes_written: int = 0
+
+    def __init__(
+                self,
+                sample_rate: float = 44100.0,
+                channels: int = 1,
+                amplitude: float = 1.0,
+                logger: t.Optional[logging.Logger] = None,
+                output_path: t.Optional[t.Union[str, Path]] = None,
+                output: t.Optional[t.Union[int, socket.socket]] = None,
+                pcm_format: str = 's16le',
+                dither: bool = False,
+                buffer_frames: int = 1024,
+                timeout: t.Optional[float] = None,
+                **kwargs: t.Any) -> None:
+        """Initialize the PCM backend.
+
+        Args:
+            sample_rate: Sample rate in Hz.
+            channels: Number of audio channels, the frames are
+                interleaved.
+            amplitude: Maximum amplitude.
+            logger: Optional logger instance.
+            output_path: A path, '-' for stdout or a tcp:// or unix://
+                address, see the class docstring.
+            output: An open file descriptor or socket, takes precedence
+                over output_path.
+            pcm_format: One of 's16le', 's24le', 's32le' or 'f32le'.
+            dither: Apply TPDF dither when quantizing to integer formats.
+            buffer_frames: The number of frames collected before they
+                are written. Must be at least 1.
+            timeout: Maximum time in seconds to wait for a non-blocking
+                output to accept data, None waits forever.
+
+        Raises:
+            ValueError: If the format or buffer size is invalid.
+        """
+        super().__init__(sample_rate, channels, amplitude, logger,
+                         output_path, **kwargs)
+        self._format = get_pcm_format(pcm_format)
+        if buffer_frames < 1:
+            raise ValueError(
+                f'Buffer frames must be at least 1, got {buffer_frames}')
+        self._output = output if output is not None else output_path
+        self._dither = dither
+        self._limit = (
+            buffer_frames * channels * get_format(self._format).width)
+        self._timeout = timeout
+        self._pending = bytearray()
+
+    @property
+    def bytes_written(self) -> int:
+        """The number of bytes written to the output so far."""
+        return self._bytes_written
+
+    @property
+    def sample_format(self) -> str:
+        """The sample format of the raw PCM format."""
+        return self._format
+
+    @property
+    def dither(self) -> bool:
+        """Whether TPDF dither is applied when quantizing."""
+        return self._dither
+
+    def _open(self) -> None:
+        """Resolve the output into a file descriptor or socket."""
+        output = self._output
+        if isinstance(output, socket.socket):
+            self._socket = output
+        elif isinstance(output, int):
+            self._fd = output
+        elif output is None or str(output) == '-':
+            sys.stdout.flush()
+            self._fd = sys.stdout.fileno()
+        elif str(output).startswith(('tcp://', 'unix://')):
+            self._socket = self._connect(str(output))
+            self._owned = True
+        else:
+            # reopened files are appended to, consecutive calls without
+            # a session add to the output instead of replacing it
+            mode = os.O_APPEND if self._truncated else os.O_TRUNC
+            self._fd = os.open(
+                output, os.O_WRONLY | os.O_CREAT | mode, 0o644)
+            self._truncated = True
+            self._owned = True
+
+    def _connect(self, address: str) -> socket.socket:
+        """Connect to a tcp://host:port or unix:///path address.
+
+        Raises:
+            ValueError: If the address is malformed.
+        """
+        if address.startswith('unix://'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(address[len('unix://'):])
+            return sock
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f'Invalid address: {address}')
+        return socket.create_connection((host.strip('[]'), int(port)))
+
+    def _wait_writable(self, handle: t.Union[int, socket.socket]) -> None:
+        """Wait until a non-blocking output accepts data.
+
+        Raises:
+            TimeoutError: If the output is not writable in time.
+        """
+        _, ready, _ = select.select([], [handle], [], self._timeout)
+        if not ready:
+            raise TimeoutError(
+                f'Output not writable after {self._timeout} s')
+
+    def _send(self, data: memoryview) -> None:
+        """Write all of data, blocking while the output is full."""
+        while data:
+            try:
+                if self._socket is not None:
+                    n = self._socket.send(data)
+                else:
+                    assert self._fd is not None
+                    n = os.write(self._fd, data)
+            except BlockingIOError:
+                self._wait_writable(
+                    self._socket if self._socket is not None
+                    else t.cast(int, self._fd))
+                continue
+            self._bytes_written += n
+            data = data[n:]
+
+    def flush(self) -> None:
+        """Write the buffered samples to the output."""
+        if not self._pending:
+            return
+        if self._fd is None and self._socket is None:
+            self._open()
+        pending, self._pending = self._pending, bytearray()
+        with memoryview(pending) as view:
+            self._send(view)
+
+    def write(self, block: Block) -> None:
+        """Buffer a block and write out full buffers.
+
+        Args:
+            block: Block of audio samples as floats in range [-1.0, 1.0].
+        """
+        if not len(block):
+            return
+        self._pending += encode(block, self._format, self._dither)
+        if len(self._pending) >= self._limit:
+            self.flush()
+
+    def write_pcm(self, data: t.Union[bytes, memoryview]) -> None:
+        """Buffer samples that are already encoded.
+
+        Args:
+            data: Little-endian PCM bytes of whole frames in the sample
+                format of the backend.
+        """
+        self._pending += data
+        if len(self._pending) >= self._limit:
+            self.flush()
+
+    async def awrite(self, block: Block) -> None:
+        """Write a block from the default executor.
+
+        A full pipe or socket blocks the write, so it is moved off the
+        event loop.
+        """
+        import asyncio
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.write, block)
+
+    def play(self, data: t.Iterator[float], close: bool = True) -> None:
+        """Stream the given data.
+
+        Args:
+            data: Iterator of audio samples as floats in range [-1.0, 1.0].
+            close: If True, flush and close the output afterwards.
+        """
+        self.play_blocks(iter_blocks(data), close)
+
+    def play_all(self, queue: t.Iterator[t.Iterator[float]]) -> None:
+        """Stream all the given data and close the output.
+
+        Args:
+            queue: Iterator of audio data iterators.
+        """
+        for data in queue:
+            self.play(data, close=False)
+        self.close()
+
+    def stop(self) -> None:
+        """Drop the samples that were not written yet."""
+        self._pending = bytearray()
+
+    def close(self) -> None:
+        """Flush the buffered samples and release the output.
+
+        Outputs opened by the backend are closed and reopened on the
+        next write, a file is then appended to. Descriptors and sockets
+        passed in stay open.
+        """
+        try:
+            self.flush()
+        finally:
+            if self._owned:
+                if self._socket is not None:
+                    self._socket.close()
+                elif self._fd is not None:
+                    os.close(self._fd)
+                self._owned = False
+            self._fd = None
+            self._socket = None
+
+    def __del__(self) -> None:
+        """Flush the buffered samples on cleanup."""
+        try:
+            self.close()
+        except Exception:
+            pass
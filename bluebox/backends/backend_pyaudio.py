@@ -4,10 +4,15 @@ This file contains the PyAudio backend for bluebox.
 """
 
 import typing as t
+import asyncio
 import logging
-import struct
+import threading
+import time
+from contextlib import contextmanager
 import pyaudio  # type: ignore
 from .base import BlueboxBackend
+from ..blocks import Block, iter_blocks, to_float32_bytes
+from ..ringbuffer import RingBuffer
 
 
 class PyAudioBackend(BlueboxBackend):
@@ -17,6 +22,10 @@ class PyAudioBackend(BlueboxBackend):
     _pyaudio_instance: pyaudio.PyAudio
     _stream_open: bool = False
     _device: t.Union[int, None]
+    _lock: threading.RLock
+    _idle_timeout: t.Optional[float] = None
+    _idle_timer: t.Optional[threading.Timer] = None
+    _idle_generation: int = 0
 
     def __init__(
                 self,
@@ -29,6 +38,7 @@ class PyAudioBackend(BlueboxBackend):
         """Initialize the PyAudio backend."""
         super().__init__(sample_rate, channels, amplitude, logger, **kwargs)
         self._device = device
+        self._lock = threading.RLock()
         self._pyaudio_instance = pyaudio.PyAudio()
 
     def _get_stream(
@@ -46,17 +56,117 @@ class PyAudioBackend(BlueboxBackend):
             self._stream_open = True
         return self._stream
 
-    def _to_bytes(self, data: t.Iterator[float]) -> bytes:
-        """Convert iterator to bytes."""
-        _data = list(data)
-        return struct.pack(f'{len(_data)}f', *_data)
+    def _to_bytes(self, block: Block) -> bytes:
+        """Convert a block to float32 bytes."""
+        return to_float32_bytes(block)
+
+    def write(self, block: Block) -> None:
+        """Write a block of samples to the stream."""
+        with self._lock:
+            self._get_stream().write(self._to_bytes(block))
+
+    def play_blocks(
+            self,
+            blocks: t.Iterable[Block],
+            close: bool = True) -> None:
+        """Play the given blocks of samples as they arrive."""
+        self._cancel_idle_timer()
+        super().play_blocks(blocks, close)
+        self._schedule_idle_close()
 
     def play(self, data: t.Iterator[float], close: bool = True) -> None:
         """Play the given data."""
-        d = self._to_bytes(data)
-        self._get_stream().write(d)
-        if close:
-            self.close()
+        self.play_blocks(iter_blocks(data), close)
+
+    async def awrite(self, block: Block) -> None:
+        """Write a block from the default executor.
+
+        The blocking stream write waits for the device, so it is moved
+        off the event loop.
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.write, block)
+
+    async def aplay_blocks(
+            self,
+            blocks: t.Union[t.Iterable[Block], t.AsyncIterable[Block]],
+            close: bool = True) -> None:
+        """Play the given blocks from a coroutine."""
+        self._cancel_idle_timer()
+        await super().aplay_blocks(blocks, close)
+        self._schedule_idle_close()
+
+    def _warm_up(self) -> None:
+        """Open the stream ahead of the first sequence."""
+        with self._lock:
+            self._get_stream()
+
+    def _cancel_idle_timer(self) -> None:
+        """Cancel a pending idle close.
+
+        Waits for an idle close that is already running, and a timer
+        that fired but has not taken the lock yet does nothing.
+        """
+        with self._lock:
+            self._idle_generation += 1
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+
+    def _schedule_idle_close(self) -> None:
+        """Close the stream after the session idle timeout."""
+        self._cancel_idle_timer()
+        if not self._session_active or self._idle_timeout is None:
+            return
+        self._idle_timer = threading.Timer(
+            self._idle_timeout, self._idle_close,
+            args=(self._idle_generation,))
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _idle_close(self, generation: int) -> None:
+        """Close the stream if nothing was played since the timer started."""
+        with self._lock:
+            if generation != self._idle_generation:
+                # a playback started after the timer fired
+                return
+            if self.is_playing:
+                self._schedule_idle_close()
+                return
+            if self._stream_open:
+                self._logger.debug('Closing idle audio stream')
+                self.close()
+
+    @contextmanager
+    def session(
+            self,
+            idle_timeout: t.Optional[float] = None
+            ) -> t.Iterator['PyAudioBackend']:
+        """Keep one warmed-up stream open across several sequences.
+
+        The stream is opened when the session starts and reused by every
+        play, so only the buffer latency remains before each tone.
+
+        Args:
+            idle_timeout: Close the stream after this many seconds
+                without playback, it is reopened on the next play. None
+                keeps it open until the session ends.
+
+        Returns:
+            A context manager yielding the backend.
+        """
+        if self._session_active:
+            yield self
+            return
+        with super().session():
+            self._idle_timeout = idle_timeout
+            try:
+                self._warm_up()
+                self._schedule_idle_close()
+                yield self
+            finally:
+                self._cancel_idle_timer()
+                self._idle_timeout = None
 
     def play_all(self, queue: t.Iterator[t.Iterator[float]]) -> None:
         """Play all the items until the end."""
@@ -71,9 +181,11 @@ class PyAudioBackend(BlueboxBackend):
 
     def close(self) -> None:
         """Close the backend."""
-        if self._stream_open:
-            self._stream.close()
-            self._stream_open = False
+        self._cancel_idle_timer()
+        with self._lock:
+            if self._stream_open:
+                self._stream.close()
+                self._stream_open = False
 
     def __del__(self) -> None:
         """Close the backend and terminate PyAudio."""
@@ -82,54 +194,226 @@ class PyAudioBackend(BlueboxBackend):
             self._pyaudio_instance.terminate()
 
 
-# class PyAudioBackendNonBlocking(PyAudioBackend):
-#     """PyAudioBackendNonBlocking class for the PyAudio backend."""
-
-#     def _get_stream(
-#                     self,
-#                     callback:
-#                       t.Optional[t.Callable] = None) -> pyaudio.Stream:
-#         """Get the PyAudio stream."""
-#         if not self._stream_open:
-#             self._stream = pyaudio.PyAudio().open(
-#                 format=pyaudio.paFloat32,
-#                 channels=self._ch,
-#                 rate=int(self._sr),
-#                 output=True,
-#                 stream_callback=callback,
-#                 output_device_index=self._device)
-#             self._stream_open = True
-#         return self._stream
-
-#     @property
-#     def is_playing(self) -> bool:
-#         """Return whether the stream is playing."""
-#         if not self._stream_open:
-#             return False
-#         return self._stream.is_active()
-
-#     def play(self, data: t.Iterator[float], close=True) -> None:
-#         """Play the given data."""
-#         total_frames = len(data)
-#         frame_index = 0
-
-#         def stream_callback(
-#                             in_data: t.Optional[t.MutableSequence[bytes]],
-#                             frame_count: int,
-#                             time_info: t.Optional[dict],
-#                             status: t.Optional[int]) -> t.Tuple[
-#                                 t.Optional[t.MutableSequence[float]],
-#                                 int]:
-#             nonlocal frame_index
-#             if frame_index >= total_frames:
-#                 return (None, pyaudio.paComplete)
-#             frame_index += min(frame_count, total_frames - frame_index)
-#             return (
-#                 data[frame_index - frame_count:frame_index],
-#                 pyaudio.paContinue)
-
-#         self._get_stream(stream_callback)
-
-#     def play_all(self, queue: t.Iterator[t.MutableSequence[float]]) -> None:
-#         """Not implemented. Probably should use asyncio."""
-#         raise NotImplementedError()
+class PyAudioBackendNonBlocking(PyAudioBackend):
+    """PyAudioBackendNonBlocking class for the PyAudio backend.
+
+    Plays in PortAudio callback mode. A feeder thread pulls blocks from
+    the Sequencer into a ring buffer while the stream callback drains
+    it, so synthesis and playback overlap and play returns immediately.
+    Use wait or is_playing to follow the playback.
+    """
+
+    _ring: RingBuffer
+    _feeder: t.Optional[threading.Thread] = None
+    _done: threading.Event
+    _primed: threading.Event
+    _close_when_done: bool = False
+    _error: t.Optional[BaseException] = None
+    underruns: int = 0
+
+    def __init__(
+                self,
+                sample_rate: float = 44100.0,
+                channels: int = 1,
+                amplitude: float = 1.0,
+                logger: t.Optional[logging.Logger] = None,
+                device: t.Union[int, None] = None,
+                buffer_frames: int = 16384,
+                **kwargs: t.Any) -> None:
+        """Initialize the non-blocking PyAudio backend.
+
+        Args:
+            sample_rate: Sample rate in Hz.
+            channels: Number of audio channels.
+            amplitude: Maximum amplitude.
+            logger: Optional logger instance.
+            device: Optional output device index.
+            buffer_frames: Size of the ring buffer in frames.
+        """
+        super().__init__(sample_rate, channels, amplitude, logger, device,
+                         **kwargs)
+        self._ring = RingBuffer(buffer_frames * channels * 4)
+        self._done = threading.Event()
+        self._done.set()
+        self._primed = threading.Event()
+
+    def _callback(
+                self,
+                in_data: t.Optional[bytes],
+                frame_count: int,
+                time_info: t.Optional[dict],
+                status: t.Optional[int]) -> t.Tuple[bytes, int]:
+        """Fill the output buffer from the ring buffer."""
+        n = frame_count * self._ch * 4
+        data = self._ring.read(n)
+        if len(data) == n:
+            return (data, pyaudio.paContinue)
+        if self._ring.eof:
+            self._done.set()
+            return (data, pyaudio.paComplete)
+        # the feeder fell behind, play silence rather than stopping
+        self.underruns += 1
+        return (data + bytes(n - len(data)), pyaudio.paContinue)
+
+    def _feed(self, blocks: t.Iterator[Block]) -> None:
+        """Synthesize blocks into the ring buffer."""
+        try:
+            for block in blocks:
+                data = memoryview(self._to_bytes(block))
+                n = self._ring.write(data)
+                # the stream can start as soon as there is something to play
+                self._primed.set()
+                if not self._ring.write_all(data[n:]):
+                    break
+        except BaseException as e:
+            self._logger.error(f'Failed to generate audio: {e}')
+            self._error = e
+        finally:
+            self._ring.close()
+            self._primed.set()
+
+    @property
+    def is_playing(self) -> bool:
+        """Return whether the stream is playing."""
+        return not self._done.is_set()
+
+    def write(self, block: Block) -> None:
+        """Queue a block of samples, waiting while the buffer is full."""
+        if self._ring.closed:
+            self.wait()
+            self._ring.reset()
+        self._done.clear()
+        data = memoryview(self._to_bytes(block))
+        n = self._ring.write(data)
+        # start draining before waiting for room, a block can be larger
+        # than the ring buffer
+        if n:
+            self._start_stream()
+        self._ring.write_all(data[n:])
+
+    def _poll_interval(self) -> float:
+        """Time the stream takes to play a quarter of the ring buffer."""
+        return self._ring.capacity / 4 / (self._sr * self._ch * 4)
+
+    async def awrite(self, block: Block) -> None:
+        """Queue a block of samples, yielding while the buffer is full."""
+        if self._feeder is not None or self._ring.closed:
+            await self.drain()
+            self._ring.reset()
+        self._done.clear()
+        data = memoryview(self._to_bytes(block))
+        while True:
+            n = self._ring.write(data)
+            data = data[n:]
+            if n:
+                self._start_stream()
+            if not len(data) or self._ring.closed:
+                return
+            await asyncio.sleep(self._poll_interval())
+
+    async def drain(self) -> None:
+        """Wait for the playback to finish without blocking the loop."""
+        if self._feeder is None and not self._done.is_set():
+            # data written with awrite, nothing more will follow
+            self._ring.close()
+        while not self._done.is_set():
+            await asyncio.sleep(self._poll_interval())
+        self.wait()
+
+    def _start_stream(self) -> None:
+        """Open the callback stream or restart a finished one."""
+        with self._lock:
+            if not self._stream_open:
+                self._get_stream(self._callback)
+            elif not self._stream.is_active():
+                self._stream.stop_stream()
+                self._stream.start_stream()
+
+    def _warm_up(self) -> None:
+        """Nothing to do, the callback stream opens on the first play."""
+
+    def play_blocks(
+            self,
+            blocks: t.Iterable[Block],
+            close: bool = True) -> None:
+        """Start playing the given blocks and return immediately.
+
+        Any previous playback is waited for first.
+
+        Args:
+            blocks: Iterable of sample blocks.
+            close: If True, close the stream once playback completes
+                (when wait is called or the next playback starts).
+                Ignored inside a session.
+        """
+        self._cancel_idle_timer()
+        self.wait()
+        self._ring.reset()
+        self._error = None
+        self._done.clear()
+        self._primed.clear()
+        self._close_when_done = close and not self._session_active
+        self._feeder = threading.Thread(
+            target=self._feed, args=(iter(blocks),), daemon=True)
+        self._feeder.start()
+        # avoid starting the stream with an underrun
+        self._primed.wait()
+        if self._ring.eof:
+            self._done.set()
+            self.wait()
+        else:
+            self._start_stream()
+        self._schedule_idle_close()
+
+    def play(self, data: t.Iterator[float], close: bool = True) -> None:
+        """Start playing the given data and return immediately."""
+        self.play_blocks(iter_blocks(data), close)
+
+    def wait(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait for the playback to finish.
+
+        Raises:
+            Exception: Any error raised while generating the audio.
+        """
+        if self._feeder is None and not self._done.is_set():
+            # data written with write, nothing more will follow
+            self._ring.close()
+        if not self._done.wait(timeout):
+            return False
+        # let the stream play out what the callback handed over
+        while self._stream_open and self._stream.is_active():
+            time.sleep(0.005)
+        if self._feeder is not None:
+            self._feeder.join()
+            self._feeder = None
+        if self._close_when_done:
+            self._close_when_done = False
+            super().close()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return True
+
+    def play_all(self, queue: t.Iterator[t.Iterator[float]]) -> None:
+        """Play all the items until the end."""
+        for data in queue:
+            self.play(data, False)
+        self.wait()
+        self.close()
+
+    def stop(self) -> None:
+        """Stop playing and drop any queued data."""
+        self._ring.cancel()
+        self._done.set()
+        super().stop()
+
+    def close(self) -> None:
+        """Stop the playback and close the stream."""
+        if hasattr(self, '_ring'):
+            self._ring.cancel()
+        if self._feeder is not None:
+            self._feeder.join()
+            self._feeder = None
+        if hasattr(self, '_done'):
+            self._done.set()
+        super().close()
@@ -6,17 +6,371 @@ Allows generating WAV audio files instead of playing audio in real-time.
 
 import typing as t
 import logging
-import wave
+import mmap
 import struct
+from array import array
 from pathlib import Path
 from .base import BlueboxBackend
+from ..blocks import Block, iter_blocks, to_list
+from ..pcm import (
+    SAMPLE_FORMATS, WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM, encode,
+    encode_into, get_format, unpack)
+
+# number of buffered samples converted at once on close
+_EXPORT_CHUNK = 1 << 16
+
+
+def _wav_header(
+        channels: int,
+        sample_rate: int,
+        sample_width: int,
+        format_tag: int) -> t.Tuple[bytes, t.Optional[int]]:
+    """Build a WAV header with empty sizes.
+
+    Returns:
+        The header and the offset of the fact chunk sample count, None
+        for PCM formats which have no fact chunk.
+    """
+    block_align = channels * sample_width
+    fmt = struct.pack(
+        '<HHIIHH', format_tag, channels, sample_rate,
+        sample_rate * block_align, block_align, sample_width * 8)
+    header = b'RIFF\x00\x00\x00\x00WAVE'
+    fact_offset = None
+    if format_tag == WAVE_FORMAT_PCM:
+        header += b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    else:
+        fmt += struct.pack('<H', 0)
+        header += b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+        fact_offset = len(header) + 8
+        header += b'fact' + struct.pack('<II', 4, 0)
+    header += b'data\x00\x00\x00\x00'
+    return header, fact_offset
+
+
+def _wav_sizes(
+        header_size: int,
+        fact_offset: t.Optional[int],
+        data_size: int,
+        frames: int) -> t.List[t.Tuple[int, int]]:
+    """Get the (offset, value) of each size field of a WAV header."""
+    sizes = [(4, header_size - 8 + data_size + data_size % 2),
+             (header_size - 4, data_size)]
+    if fact_offset is not None:
+        sizes.append((fact_offset, frames))
+    return sizes
+
+
+class WavWriter:
+    """WavWriter class for writing WAV files incrementally.
+
+    The header is written up front with empty sizes, PCM data is
+    appended as it arrives and the RIFF and data chunk sizes are
+    patched in when the writer is closed. Non-PCM formats (float)
+    get the extended fmt chunk and a fact chunk.
+    """
+
+    _file: t.BinaryIO
+    _data_size: int
+    _header_size: int
+    _fact_offset: t.Optional[int]
+
+    def __init__(
+                self,
+                path: t.Union[str, Path],
+                channels: int = 1,
+                sample_rate: int = 44100,
+                sample_width: int = 2,
+                format_tag: int = WAVE_FORMAT_PCM) -> None:
+        """Create the file and write the WAV header.
+
+        Args:
+            path: Path of the WAV file.
+            channels: Number of audio channels.
+            sample_rate: Sample rate in Hz.
+            sample_width: Bytes per sample.
+            format_tag: The WAVE format tag, e.g. PCM.
+        """
+        self._channels = channels
+        self._sample_width = sample_width
+        self._data_size = 0
+        header, self._fact_offset = _wav_header(
+            channels, sample_rate, sample_width, format_tag)
+        self._header_size = len(header)
+        self._file = open(path, 'wb')
+        self._file.write(header)
+
+    @property
+    def frames(self) -> int:
+        """The number of frames written so far."""
+        return self._data_size // (self._channels * self._sample_width)
+
+    def write(self, data: t.Union[bytes, memoryview]) -> None:
+        """Append raw little-endian sample data."""
+        self._file.write(data)
+        self._data_size += len(data)
+
+    def close(self) -> None:
+        """Patch the chunk sizes and close the file."""
+        if self._file.closed:
+            return
+        if self._data_size % 2:
+            # chunks are word aligned
+            self._file.write(b'\x00')
+        for offset, size in _wav_sizes(
+                self._header_size, self._fact_offset, self._data_size,
+                self.frames):
+            self._file.seek(offset)
+            self._file.write(struct.pack('<I', size))
+        self._file.close()
+
+
+class MappedWavWriter:
+    """MappedWavWriter class for writing WAV files through a memory map.
+
+    The file is created at the size of the frames reserved for it and
+    mapped, the header is written once and sample blocks are encoded
+    straight into the mapped data chunk. Regions can also be claimed with
+    :meth:`allocate` and filled by other processes mapping the same
+    file. Writing past the reserved size grows the file, and closing
+    truncates it to the data written and patches the header sizes.
+    """
+
+    _file: t.BinaryIO
+    _map: mmap.mmap
+    _frame_size: int
+    _sample_width: int
+    _header_size: int
+    _fact_offset: t.Optional[int]
+    _data_size: int
+
+    def __init__(
+                self,
+                path: t.Union[str, Path],
+                channels: int = 1,
+                sample_rate: int = 44100,
+                sample_width: int = 2,
+                format_tag: int = WAVE_FORMAT_PCM,
+                frames: int = 0) -> None:
+        """Create the file at its final size and write the header.
+
+        Args:
+            path: Path of the WAV file.
+            channels: Number of audio channels.
+            sample_rate: Sample rate in Hz.
+            sample_width: Bytes per sample.
+            format_tag: The WAVE format tag, e.g. PCM.
+            frames: The number of frames to reserve room for.
+        """
+        self._frame_size = channels * sample_width
+        self._sample_width = sample_width
+        self._data_size = 0
+        header, self._fact_offset = _wav_header(
+            channels, sample_rate, sample_width, format_tag)
+        self._header_size = len(header)
+        self._file = open(path, 'w+b')
+        self._file.truncate(self._header_size + frames * self._frame_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._map[:self._header_size] = header
+
+    @property
+    def frames(self) -> int:
+        """The number of frames written or allocated so far."""
+        return self._data_size // self._frame_size
+
+    @property
+    def capacity(self) -> int:
+        """The number of frames the file has room for."""
+        return (len(self._map) - self._header_size) // self._frame_size
+
+    def _resize(self, size: int) -> None:
+        """Change the size of the file and map it again."""
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def reserve(self, frames: int) -> None:
+        """Make room for frames more frames after the data written."""
+        size = self._header_size + self._data_size + frames * self._frame_size
+        if size > len(self._map):
+            self._resize(size)
+
+    def allocate(self, frames: int) -> int:
+        """Claim the next frames for writing by offset.
+
+        Returns:
+            The byte offset of the region in the file.
+        """
+        self.reserve(frames)
+        offset = self._header_size + self._data_size
+        self._data_size += frames * self._frame_size
+        return offset
+
+    def _claim(self, n: int) -> int:
+        """Claim n bytes after the data written.
+
+        Returns:
+            The byte offset of the region in the map.
+        """
+        if n > len(self._map) - self._header_size - self._data_size:
+            # grow by doubling when more is written than was reserved
+            self.reserve(max(n, self._data_size) // self._frame_size + 1)
+        offset = self._header_size + self._data_size
+        self._data_size += n
+        return offset
+
+    def write(self, data: t.Union[bytes, memoryview]) -> None:
+        """Copy raw little-endian sample data after the data written."""
+        n = len(data)
+        offset = self._claim(n)
+        self._map[offset:offset + n] = data
+
+    def encode(
+            self,
+            block: Block,
+            sample_format: str = 'int16',
+            dither: bool = False) -> None:
+        """Encode a block of float samples after the data written.
+
+        The samples are quantized straight into the map, see
+        :func:`bluebox.pcm.encode_into`.
+        """
+        offset = self._claim(len(block) * self._sample_width)
+        encode_into(block, self._map, offset, sample_format, dither)
+
+    def close(self) -> None:
+        """Patch the chunk sizes, truncate and close the file."""
+        if self._file.closed:
+            return
+        # chunks are word aligned
+        size = self._header_size + self._data_size + self._data_size % 2
+        if size > len(self._map):
+            self._resize(size)
+        if self._data_size % 2:
+            self._map[size - 1] = 0
+        for offset, value in _wav_sizes(
+                self._header_size, self._fact_offset, self._data_size,
+                self.frames):
+            struct.pack_into('<I', self._map, offset, value)
+        self._map.close()
+        self._file.truncate(size)
+        self._file.close()
+
+
+class WavReader:
+    """WavReader class for reading the WAV files written by WavWriter.
+
+    Reads PCM and IEEE float files in any of the sample formats of
+    :mod:`bluebox.pcm` and yields the samples in blocks, so long files
+    are read with constant memory.
+    """
+
+    _file: t.BinaryIO
+    _data_offset: int
+    _data_size: int
+    sample_rate: int
+    channels: int
+    sample_format: str
+
+    def __init__(self, path: t.Union[str, Path]) -> None:
+        """Open the file and parse its header.
+
+        Args:
+            path: Path of the WAV file.
+
+        Raises:
+            ValueError: If the file is not a WAV file in a supported
+                format.
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._parse()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _parse(self) -> None:
+        """Find the fmt and data chunks."""
+        riff = self._file.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:] != b'WAVE':
+            raise ValueError('Not a WAV file')
+        fmt = None
+        while True:
+            header = self._file.read(8)
+            if len(header) < 8:
+                raise ValueError('WAV file has no data chunk')
+            chunk, size = header[:4], struct.unpack('<I', header[4:])[0]
+            if chunk == b'data':
+                self._data_offset = self._file.tell()
+                self._data_size = size
+                break
+            body = self._file.read(size + size % 2)
+            if chunk == b'fmt ':
+                fmt = body[:16]
+        if fmt is None or len(fmt) < 16:
+            raise ValueError('WAV file has no fmt chunk')
+        format_tag, self.channels, self.sample_rate, _, _, bits = \
+            struct.unpack('<HHIIHH', fmt)
+        for name, sample_format in SAMPLE_FORMATS.items():
+            if (sample_format.width * 8 == bits and
+                    sample_format.format_tag == format_tag):
+                self.sample_format = name
+                break
+        else:
+            kind = 'float' if format_tag == WAVE_FORMAT_IEEE_FLOAT else 'PCM'
+            raise ValueError(f'Unsupported WAV format: {bits} bit {kind}')
+
+    @property
+    def frames(self) -> int:
+        """The number of frames in the file."""
+        return self._data_size // (
+            self.channels * get_format(self.sample_format).width)
+
+    def blocks(
+            self,
+            frame_size: int = _EXPORT_CHUNK,
+            engine: str = 'auto') -> t.Iterator[Block]:
+        """Read the samples in blocks of interleaved frames.
+
+        Args:
+            frame_size: The number of frames per block, the last block
+                may be shorter.
+            engine: The kind of blocks, see :func:`bluebox.pcm.unpack`.
+        """
+        width = get_format(self.sample_format).width * self.channels
+        self._file.seek(self._data_offset)
+        remaining = self._data_size
+        while remaining > 0:
+            data = self._file.read(min(remaining, frame_size * width))
+            if not data:
+                break
+            remaining -= len(data)
+            yield unpack(data, self.sample_format, engine)
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self) -> 'WavReader':
+        """Use the reader as a context manager."""
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        """Close the file when the context ends."""
+        self.close()
 
 
 class WavBackend(BlueboxBackend):
     """WavBackend class for exporting to WAV files."""
 
     _output_path: Path
-    _buffer: t.List[float]
+    _buffer: 'array[float]'
+    _streaming: bool
+    _sample_format: str
+    _dither: bool
+    _memory_map: bool
+    _writer: t.Optional[WavWriter] = None
+    _mapped: t.Optional[MappedWavWriter] = None
 
     def __init__(
                 self,
@@ -25,6 +379,10 @@ class WavBackend(BlueboxBackend):
                 amplitude: float = 1.0,
                 logger: t.Optional[logging.Logger] = None,
                 output_path: t.Optional[t.Union[str, Path]] = None,
+                streaming: bool = False,
+                sample_format: str = 'int16',
+                dither: bool = False,
+                memory_map: bool = False,
                 **kwargs: t.Any) -> None:
         """Initialize the WAV backend.
 
@@ -34,22 +392,160 @@ class WavBackend(BlueboxBackend):
             amplitude: Maximum amplitude (0.0 to 1.0).
             logger: Optional logger instance.
             output_path: Path where the WAV file will be saved (required).
+            streaming: If True, write each block to disk as it arrives
+                instead of buffering the whole sequence until close.
+            sample_format: The WAV sample format, one of 'int16',
+                'int24', 'int32' or 'float32'.
+            dither: Apply TPDF dither when quantizing to integer formats.
+            memory_map: If True, create the file at the size announced
+                with :meth:`reserve` and copy each block into a memory
+                map of it, takes precedence over streaming.
 
         Raises:
-            ValueError: If output_path is not provided.
+            ValueError: If output_path is not provided or the sample
+                format is unknown.
         """
         super().__init__(sample_rate, channels, amplitude, logger,
                          output_path, **kwargs)
         if output_path is None:
             raise ValueError('WAV backend requires output_path parameter')
+        get_format(sample_format)
         self._output_path = Path(output_path)
-        self._buffer = []
+        self._buffer = array('d')
+        self._streaming = streaming
+        self._sample_format = sample_format
+        self._dither = dither
+        self._memory_map = memory_map
         # Store sample rate for WAV file writing
         self._wav_sample_rate = int(sample_rate)
 
-    def _to_bytes(self, data: t.Iterator[float]) -> t.List[float]:
-        """Convert iterator to list of floats."""
-        return list(data)
+    def _open_writer(self) -> WavWriter:
+        """Create the output file and write the header."""
+        fmt = get_format(self._sample_format)
+        return WavWriter(
+            self._output_path,
+            channels=self._ch,
+            sample_rate=self._wav_sample_rate,
+            sample_width=fmt.width,
+            format_tag=fmt.format_tag)
+
+    def _open_mapped(self, frames: int) -> MappedWavWriter:
+        """Create the output file for frames frames and map it."""
+        fmt = get_format(self._sample_format)
+        return MappedWavWriter(
+            self._output_path,
+            channels=self._ch,
+            sample_rate=self._wav_sample_rate,
+            sample_width=fmt.width,
+            format_tag=fmt.format_tag,
+            frames=frames)
+
+    @property
+    def output_path(self) -> Path:
+        """The path of the WAV file."""
+        return self._output_path
+
+    @property
+    def memory_map(self) -> bool:
+        """Whether the file is written through a memory map."""
+        return self._memory_map
+
+    @property
+    def sample_format(self) -> str:
+        """The WAV sample format."""
+        return self._sample_format
+
+    @property
+    def dither(self) -> bool:
+        """Whether TPDF dither is applied when quantizing."""
+        return self._dither
+
+    def _encode(self, block: Block) -> bytes:
+        """Convert a block to PCM bytes in the output format."""
+        return encode(block, self._sample_format, self._dither)
+
+    def _to_bytes(self, block: Block) -> t.List[float]:
+        """Convert a block to list of floats."""
+        return to_list(block)
+
+    def write(self, block: Block) -> None:
+        """Buffer or stream a block of audio data.
+
+        Args:
+            block: Block of audio samples as floats in range [-1.0, 1.0].
+        """
+        if self._memory_map:
+            if not len(block):
+                return
+            if self._mapped is None:
+                self._mapped = self._open_mapped(0)
+            self._mapped.encode(block, self._sample_format, self._dither)
+            return
+        if not self._streaming:
+            self._buffer.extend(self._to_bytes(block))
+            return
+        if not len(block):
+            return
+        if self._writer is None:
+            self._writer = self._open_writer()
+        self._writer.write(self._encode(block))
+
+    def write_pcm(self, data: t.Union[bytes, memoryview]) -> None:
+        """Write samples that are already encoded to the file.
+
+        The data goes to disk right away like in streaming mode, e.g.
+        for the chunks of :func:`bluebox.render.render_parallel`.
+
+        Args:
+            data: Little-endian PCM bytes of whole frames in the sample
+                format of the backend.
+        """
+        if not len(data):
+            return
+        if self._memory_map:
+            if self._mapped is None:
+                self._mapped = self._open_mapped(0)
+            self._mapped.write(data)
+            return
+        if self._writer is None:
+            self._writer = self._open_writer()
+        self._writer.write(data)
+
+    def reserve(self, frames: int) -> None:
+        """Make room for frames more frames in memory map mode.
+
+        The first call creates the file at its final size, so writing
+        the announced frames never grows it.
+        """
+        if not self._memory_map or frames <= 0:
+            return
+        if self._mapped is None:
+            self._mapped = self._open_mapped(frames)
+        else:
+            self._mapped.reserve(frames)
+
+    def allocate(self, frames: int) -> int:
+        """Claim the next frames of the file for writing by offset.
+
+        Other processes can map the file and write the PCM data of the
+        region, e.g. the workers of
+        :func:`bluebox.render.render_parallel`. Whatever is not written
+        stays silent.
+
+        Args:
+            frames: The number of frames of the region.
+
+        Returns:
+            The byte offset of the region in the file.
+
+        Raises:
+            ValueError: If the backend is not in memory map mode.
+        """
+        if not self._memory_map:
+            raise ValueError('Allocating needs memory_map=True')
+        if self._mapped is None:
+            self._mapped = self._open_mapped(frames)
+        return self._mapped.allocate(frames)
 
     def play(self, data: t.Iterator[float], close: bool = True) -> None:
         """Buffer audio data for later export.
@@ -58,9 +554,7 @@ class WavBackend(BlueboxBackend):
             data: Iterator of audio samples as floats in range [-1.0, 1.0].
             close: If True, write the buffered data to file after buffering.
         """
-        self._buffer.extend(self._to_bytes(data))
-        if close:
-            self.close()
+        self.play_blocks(iter_blocks(data), close)
 
     def play_all(self, queue: t.Iterator[t.Iterator[float]]) -> None:
         """Buffer all audio data and export to WAV file.
@@ -79,30 +573,39 @@ class WavBackend(BlueboxBackend):
     def close(self) -> None:
         """Write buffered audio data to WAV file.
 
-        Converts float samples [-1.0, 1.0] to 16-bit PCM and writes
-        to the specified output path.
+        Converts float samples [-1.0, 1.0] to the sample format (16-bit
+        PCM by default) and writes to the specified output path. In
+        streaming mode the data is already on disk and only the header
+        sizes are patched.
         """
+        if self._writer is not None or self._mapped is not None:
+            writer: t.Union[WavWriter, MappedWavWriter]
+            writer = self._writer if self._writer is not None else \
+                t.cast(MappedWavWriter, self._mapped)
+            self._writer = self._mapped = None
+            writer.close()
+            self._logger.info(
+                f'Wrote {writer.frames * self._ch} samples to WAV file: '
+                f'{self._output_path}')
+            return
+
         if not self._buffer:
             self._logger.warning('No audio data to write to WAV file')
             return
 
         try:
-            with wave.open(str(self._output_path), 'wb') as wav:
-                wav.setnchannels(self._ch)
-                wav.setsampwidth(2)  # 16-bit audio
-                wav.setframerate(self._wav_sample_rate)
-
-                # Convert float [-1.0, 1.0] to int16 [-32768, 32767]
-                samples = [
-                    max(-32768, min(32767, int(s * 32767)))
-                    for s in self._buffer
-                ]
-                wav.writeframes(struct.pack(f'{len(samples)}h', *samples))
+            writer = self._open_writer()
+            try:
+                for i in range(0, len(self._buffer), _EXPORT_CHUNK):
+                    writer.write(self._encode(
+                        self._buffer[i:i + _EXPORT_CHUNK]))
+            finally:
+                writer.close()
 
             self._logger.info(
                 f'Wrote {len(self._buffer)} samples to WAV file: '
                 f'{self._output_path}')
-            self._buffer.clear()
+            self.clear_buffer()
 
         except Exception as e:
             self._logger.error(f'Failed to write WAV file: {e}')
@@ -110,7 +613,8 @@ class WavBackend(BlueboxBackend):
 
     def __del__(self) -> None:
         """Ensure buffered data is written on cleanup."""
-        if self._buffer:
+        if getattr(self, '_buffer', None) or self._writer is not None or \
+                self._mapped is not None:
             try:
                 self.close()
             except Exception:
@@ -118,4 +622,4 @@ class WavBackend(BlueboxBackend):
 
     def clear_buffer(self) -> None:
         """Clear the audio buffer without writing to file."""
-        self._buffer.clear()
+        del self._buffer[:]
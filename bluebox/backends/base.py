@@ -4,9 +4,11 @@ This file contains the base class for the backends.
 """
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 import typing as t
 import logging
 from pathlib import Path
+from ..blocks import Block
 
 
 class BlueboxBackend(ABC):
@@ -16,6 +18,7 @@ class BlueboxBackend(ABC):
     _ch: int = 1
     _amplitude: float = 1.0
     _logger: logging.Logger
+    _session_active: bool = False
 
     def __init__(
                 self,
@@ -39,9 +42,127 @@ class BlueboxBackend(ABC):
         self._logger = logger or logging.getLogger(__name__)
 
     @abstractmethod
-    def play(self, data: t.Iterator[float]) -> None:
+    def play(self, data: t.Iterator[float], close: bool = True) -> None:
         """Play the given data."""
 
+    def write(self, block: Block) -> None:
+        """Write a block of samples to the backend.
+
+        Backends should override this to consume blocks directly, the
+        default passes the samples on to :meth:`play`.
+        """
+        self.play(iter(block), close=False)
+
+    def play_blocks(
+            self,
+            blocks: t.Iterable[Block],
+            close: bool = True) -> None:
+        """Play the given blocks of samples as they arrive.
+
+        Args:
+            blocks: Iterable of sample blocks.
+            close: If True, close the backend after the last block.
+        """
+        for block in blocks:
+            self.write(block)
+        if close and not self._session_active:
+            self.close()
+
+    def reserve(self, frames: int) -> None:
+        """Announce the number of frames about to be written.
+
+        A hint for backends that preallocate their output, the default
+        ignores it.
+        """
+
+    async def awrite(self, block: Block) -> None:
+        """Write a block of samples without blocking the event loop.
+
+        The default calls :meth:`write`, which is fine for backends that
+        only buffer or write to a local file. Backends that block on a
+        device or a slow peer override this.
+        """
+        self.write(block)
+
+    async def drain(self) -> None:
+        """Wait until everything written so far has been played."""
+        if self.is_playing:
+            import asyncio
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.wait)
+
+    async def aplay_blocks(
+            self,
+            blocks: t.Union[t.Iterable[Block], t.AsyncIterable[Block]],
+            close: bool = True) -> None:
+        """Play the given blocks from a coroutine.
+
+        Args:
+            blocks: Iterable or async iterable of sample blocks.
+            close: If True, close the backend once the blocks are
+                drained. Ignored inside a session.
+        """
+        if isinstance(blocks, t.AsyncIterable):
+            async for block in blocks:
+                await self.awrite(block)
+        else:
+            for block in blocks:
+                await self.awrite(block)
+        await self.drain()
+        if close and not self._session_active:
+            self.close()
+
+    @property
+    def in_session(self) -> bool:
+        """Whether a session is keeping the backend open."""
+        return self._session_active
+
+    @contextmanager
+    def session(
+            self,
+            idle_timeout: t.Optional[float] = None
+            ) -> t.Iterator['BlueboxBackend']:
+        """Keep the backend open across several sequences.
+
+        Inside the session play and play_blocks do not close the
+        backend, it is closed once when the session ends. Nested
+        sessions are part of the outermost one.
+
+        Args:
+            idle_timeout: Close an audio stream after this many seconds
+                without playback. Backends without a stream ignore it.
+
+        Returns:
+            A context manager yielding the backend.
+        """
+        if self._session_active:
+            yield self
+            return
+        self._session_active = True
+        try:
+            yield self
+        finally:
+            self._session_active = False
+            self.close()
+
+    @property
+    def is_playing(self) -> bool:
+        """Whether audio is still being played in the background."""
+        return False
+
+    def wait(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait for background playback to finish.
+
+        Blocking backends are done as soon as play returns.
+
+        Args:
+            timeout: Maximum time to wait in seconds, None waits forever.
+
+        Returns:
+            True if playback has finished, False if the timeout expired.
+        """
+        return True
+
     @abstractmethod
     def play_all(self, queue: t.Iterator[t.Iterator[float]]) -> None:
         """Play the given data and then stop."""
@@ -0,0 +1,197 @@
+"""batch.py
+
+This file contains batch rendering of many sequences to WAV files.
+The work is spread over a process pool, each worker keeps one tone
+bank seeded with the buffers already rendered by the parent, and
+failing items are reported without aborting the batch.
+"""
+
+import typing as t
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from .backends import WavBackend
+from .tonebank import ToneBank
+
+if t.TYPE_CHECKING:
+    from .box import Sequencer
+
+# per item parameters passed to the Sequencer and the WAV backend
+SEQUENCER_PARAMS = ('amplitude', 'length', 'pause', 'pad_pause')
+BACKEND_PARAMS = ('sample_format', 'dither')
+
+
+class BatchItem(t.NamedTuple):
+    """A sequence to render to a WAV file."""
+
+    sequence: str
+    output: t.Union[str, Path]
+    params: t.Mapping[str, t.Any] = {}
+
+
+class BatchResult(t.NamedTuple):
+    """The outcome of rendering a BatchItem."""
+
+    position: int
+    sequence: str
+    output: str
+    ok: bool
+    seconds: float
+    samples: int = 0
+    error: t.Optional[str] = None
+
+
+def read_manifest(path: t.Union[str, Path]) -> t.List[BatchItem]:
+    """Read a batch manifest.
+
+    The manifest is a JSON lines file, one object per item with the
+    keys "sequence" and "output" plus any per item parameters, e.g.
+    ``{"sequence": "123", "output": "123.wav", "length": 50}``.
+    Blank lines and lines starting with # are ignored.
+
+    Raises:
+        ValueError: If a line is not a valid item.
+    """
+    items = []
+    with Path(path).open() as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+                sequence = str(entry.pop('sequence'))
+                output = entry.pop('output')
+            except (ValueError, KeyError, AttributeError) as e:
+                raise ValueError(
+                    f'Invalid manifest entry on line {n}: {e}') from None
+            items.append(BatchItem(sequence, output, entry))
+    return items
+
+
+# state of a worker process, set by _init_worker
+_settings: t.Dict[str, t.Any] = {}
+_bank: t.Optional[ToneBank] = None
+
+
+def _init_worker(
+        settings: t.Dict[str, t.Any],
+        bank_size: int,
+        entries: t.List[t.Tuple[t.Hashable, t.Any]]) -> None:
+    """Set up the shared settings and tone bank of a worker."""
+    global _settings, _bank
+    _settings = settings
+    _bank = ToneBank(bank_size)
+    _bank.preload(entries)
+
+
+def _render_item(index: int, item: BatchItem) -> BatchResult:
+    """Render a single item in a worker."""
+    from .box import Sequencer
+
+    start = time.perf_counter()
+    samples = 0
+    try:
+        unknown = set(item.params) - set(SEQUENCER_PARAMS + BACKEND_PARAMS)
+        if unknown:
+            raise ValueError(
+                f'Invalid parameters: {", ".join(sorted(unknown))}')
+        settings = dict(_settings)
+        settings.update(
+            (k, v) for k, v in item.params.items() if k in SEQUENCER_PARAMS)
+        backend = WavBackend(
+            sample_rate=settings['sample_rate'],
+            channels=settings['channels'],
+            output_path=item.output,
+            streaming=True,
+            **{k: v for k, v in item.params.items() if k in BACKEND_PARAMS})
+        seq = Sequencer(
+            mf=settings.pop('mf'),
+            backend=backend,
+            tone_bank=_bank,
+            **settings)
+
+        def counted() -> t.Iterator[t.Any]:
+            nonlocal samples
+            for block in seq.blocks(item.sequence):
+                samples += len(block)
+                yield block
+
+        backend.play_blocks(counted())
+    except Exception as e:
+        return BatchResult(
+            index, item.sequence, str(item.output), False,
+            time.perf_counter() - start, samples, f'{type(e).__name__}: {e}')
+    return BatchResult(
+        index, item.sequence, str(item.output), True,
+        time.perf_counter() - start, samples)
+
+
+def render_batch(
+        sequencer: 'Sequencer',
+        items: t.Iterable[t.Union[BatchItem, t.Sequence[t.Any]]],
+        workers: t.Optional[int] = None,
+        logger: t.Optional[logging.Logger] = None) -> t.List[BatchResult]:
+    """Render many sequences to WAV files.
+
+    Args:
+        sequencer: Provides the default settings of every item. Its tone
+            bank is filled with the codes used by the batch and shared
+            with the workers.
+        items: BatchItems or (sequence, output[, params]) tuples. The
+            params may override amplitude, length, pause, pad_pause,
+            sample_format and dither.
+        workers: Number of worker processes, None uses one per CPU.
+            0 or 1 renders in the current process.
+        logger: Optional logger for per item progress.
+
+    Returns:
+        One BatchResult per item, in the order of the items.
+    """
+    logger = logger or logging.getLogger(__name__)
+    batch = [
+        item if isinstance(item, BatchItem) else BatchItem(*item)
+        for item in items
+    ]
+    settings = sequencer._settings()
+
+    # render every code used with the default settings once up front
+    tokenizer = sequencer.tokenizer
+    used: t.Set[int] = set()
+    for item in batch:
+        used.update(tokenizer.tokenize(item.sequence))
+    sequencer.prerender(' '.join(tokenizer.codes[i] for i in sorted(used)))
+    bank = sequencer.tone_bank
+    initargs = (settings, max(bank.maxsize, len(bank)), bank.entries())
+
+    results: t.List[BatchResult] = []
+    if workers is not None and workers <= 1:
+        _init_worker(*initargs)
+        results = [_render_item(i, item) for i, item in enumerate(batch)]
+    else:
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=initargs) as pool:
+            futures = [
+                pool.submit(_render_item, i, item)
+                for i, item in enumerate(batch)
+            ]
+            for i, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(BatchResult(
+                        i, batch[i].sequence, str(batch[i].output), False,
+                        0.0, 0, f'{type(e).__name__}: {e}'))
+
+    for result in results:
+        if result.ok:
+            logger.info(
+                f'Rendered {result.output} ({result.samples} samples) '
+                f'in {result.seconds * 1000:.1f} ms')
+        else:
+            logger.error(f'Failed to render {result.output}: {result.error}')
+    return results
@@ -0,0 +1,157 @@
+"""blocks.py
+
+This file contains helpers for passing audio around in blocks of
+samples instead of one float at a time. A block is any contiguous
+buffer of samples: an ``array('d')`` from the python engine or a
+float32 ``numpy.ndarray`` from the numpy engine. Blocks handed out
+by the Sequencer may be shared with its tone bank and must be treated
+as read-only.
+"""
+
+import typing as t
+import operator
+from array import array
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+# A contiguous block of samples: ``array('d')`` for the python engine,
+# a float32 ``numpy.ndarray`` for the numpy engine.
+Block = t.Any
+
+DEFAULT_FRAME_SIZE = 1024
+
+
+def _is_ndarray(block: Block) -> bool:
+    """Check whether a block is a numpy array."""
+    return np is not None and isinstance(block, np.ndarray)
+
+
+def iter_blocks(
+        samples: t.Iterable[float],
+        frame_size: int = DEFAULT_FRAME_SIZE) -> t.Iterator[Block]:
+    """Split an iterable of samples into blocks.
+
+    Args:
+        samples: The samples to split.
+        frame_size: The number of samples per block. The last block
+            may be shorter.
+
+    Returns:
+        An iterator of ``array('d')`` blocks.
+    """
+    it = iter(samples)
+    while True:
+        block = array('d', islice(it, frame_size))
+        if not block:
+            return
+        yield block
+
+
+def concat(blocks: t.Sequence[Block]) -> Block:
+    """Join blocks into a single block."""
+    if len(blocks) == 1:
+        return blocks[0]
+    if any(_is_ndarray(b) for b in blocks):
+        return np.concatenate(blocks)
+    out = array('d')
+    for b in blocks:
+        out.extend(b)
+    return out
+
+
+def zeros_like(block: Block, n: int) -> Block:
+    """Create a silent block of n samples of the same kind as block."""
+    if _is_ndarray(block):
+        return np.zeros(n, dtype=block.dtype)
+    return array('d', [0.0]) * n
+
+
+def interleave(channels: t.Sequence[Block]) -> Block:
+    """Interleave equally long channel blocks into one block of frames.
+
+    Each channel is copied with one strided slice assignment.
+
+    Raises:
+        ValueError: If the channels differ in length.
+    """
+    if len(channels) == 1:
+        return channels[0]
+    n = len(channels[0])
+    if any(len(c) != n for c in channels):
+        raise ValueError('Channels must have the same length')
+    count = len(channels)
+    out = zeros_like(channels[0], n * count)
+    for i, channel in enumerate(channels):
+        out[i::count] = channel
+    return out
+
+
+def deinterleave(block: Block, channels: int) -> t.List[Block]:
+    """Split a block of interleaved frames into one block per channel."""
+    return [block[i::channels] for i in range(channels)]
+
+
+def rechunk(
+        blocks: t.Iterable[Block],
+        frame_size: int = DEFAULT_FRAME_SIZE) -> t.Iterator[Block]:
+    """Regroup blocks of any length into blocks of a fixed size.
+
+    Args:
+        blocks: The blocks to regroup.
+        frame_size: The number of samples per output block. The last
+            block may be shorter.
+
+    Returns:
+        An iterator of blocks holding exactly frame_size samples.
+    """
+    pending: t.List[Block] = []
+    pending_len = 0
+    for block in blocks:
+        n = len(block)
+        start = 0
+        while n - start >= frame_size - pending_len:
+            end = start + frame_size - pending_len
+            pending.append(block[start:end])
+            start = end
+            yield concat(pending)
+            pending = []
+            pending_len = 0
+        if start < n:
+            pending.append(block[start:])
+            pending_len += n - start
+    if pending:
+        yield concat(pending)
+
+
+def to_list(block: Block) -> t.List[float]:
+    """Convert a block to a list of python floats."""
+    if _is_ndarray(block):
+        return block.tolist()
+    return list(block)
+
+
+def to_float32_bytes(block: Block) -> bytes:
+    """Convert a block to native float32 bytes."""
+    if _is_ndarray(block):
+        return block.astype(np.float32, copy=False).tobytes()
+    return array('f', block).tobytes()
+
+
+def block_stats(block: Block) -> t.Tuple[int, float, float]:
+    """Summarize a block without copying it into python floats.
+
+    Returns:
+        The number of samples, the sum of the squared samples and the
+        peak absolute sample value.
+    """
+    if not len(block):
+        return (0, 0.0, 0.0)
+    if _is_ndarray(block):
+        x = block.astype(np.float64, copy=False)
+        return (len(x), float(np.dot(x, x)), float(np.max(np.abs(x))))
+    return (len(block), sum(map(operator.mul, block, block)),
+            max(map(abs, block)))
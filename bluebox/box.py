@@ -6,9 +6,20 @@ waveforms.
 
 import typing as t
 import logging
+import operator
+from array import array
+from itertools import zip_longest
 from .freqs import BaseMF
-from .wave import SineWave
-from .backends import BlueboxBackend, PyAudioBackend
+from .blocks import (
+    DEFAULT_FRAME_SIZE, Block, concat, interleave, rechunk, zeros_like)
+from .wave import SineWave, select_oscillator
+from .tonebank import ToneBank
+from .tokenizer import Tokenizer
+from .plan import PAUSE, TimingPlan
+from .backends import BlueboxBackend, get_backend
+
+if t.TYPE_CHECKING:
+    from .batch import BatchItem, BatchResult
 
 
 class Sequencer:
@@ -23,10 +34,16 @@ class Sequencer:
     _amplitude: float
     _stop_on_error: bool
     _logger: logging.Logger
-    _backend: BlueboxBackend
+    _backend: t.Optional[BlueboxBackend]
     _pad_pause: float
     _meta_codes: t.Set[str] = set(['p', 'P'])
     _valid_codes: t.Set[str]
+    _tokenizer: Tokenizer
+    _meta_tokens: t.FrozenSet[int]
+    _tone_bank: ToneBank
+    _frame_size: int
+    _routing: t.Optional[t.Union[str, t.Dict[str, t.FrozenSet[int]]]]
+    _routes: t.Dict[int, t.FrozenSet[int]]
 
     def __init__(
                 self,
@@ -41,7 +58,16 @@ class Sequencer:
                 backend: t.Optional[
                         t.Union[BlueboxBackend, t.Type[BlueboxBackend]]
                     ] = None,
-                pad_pause: float = 150.0) -> None:
+                pad_pause: float = 150.0,
+                engine: str = 'python',
+                tone_cache_size: int = 128,
+                frame_size: int = DEFAULT_FRAME_SIZE,
+                tone_bank: t.Optional[ToneBank] = None,
+                oscillator: str = 'exact',
+                snr: t.Optional[float] = None,
+                routing: t.Optional[t.Union[
+                    str, t.Mapping[str, t.Union[int, t.Sequence[int]]]
+                    ]] = None) -> None:
         """Initialize the Sequencer object.
 
         Args:
@@ -54,15 +80,39 @@ class Sequencer:
                      milliseconds. Must be non-negative.
             sample_rate: The sample rate of the waveforms. Must be positive.
             channels: The number of channels in the waveforms.
-                Must be at least 1.
+                Must be at least 1. The blocks sent to the backend hold
+                interleaved frames.
             stop_on_error: Whether to stop on an error or not.
                 If False, the error will be logged, otherwise
                 it will be raised.
             logger: Optional logger instance for logging.
             backend: Optional backend for audio output. Can be a class
-                or instance.
+                or instance. By default a PyAudio backend is created
+                the first time audio is played, see :attr:`backend`.
             pad_pause: Duration (ms) of the pause before/after sequence.
                 Must be non-negative.
+            engine: The synthesis engine, 'python', 'numpy' or 'auto'.
+                The numpy engine renders whole tones in one vectorized
+                call and falls back to 'python' if numpy is missing.
+            tone_cache_size: The number of rendered tone and pause
+                buffers kept in the tone bank (LRU). 0 disables caching.
+            frame_size: The number of frames per block streamed to the
+                backend. Must be at least 1.
+            tone_bank: Optional tone bank to share with other Sequencers,
+                tone_cache_size is ignored when it is given.
+            oscillator: How tones are rendered, 'exact' evaluates sin
+                for every sample, 'recursive' rotates a phasor with one
+                complex multiplication per sample, which is cheaper for
+                long tones, 'table' interpolates a sine table.
+            snr: Optional required signal-to-noise ratio in dB. When
+                given, the cheapest oscillator meeting it is used
+                instead of oscillator, see
+                :func:`bluebox.wave.select_oscillator`.
+            routing: How tones are routed to the channels. None plays
+                every tone on all channels, 'split' plays the low tone
+                of each pair on channel 0 and the high tone on channel
+                1, and a mapping of code to channel (or channels) plays
+                those codes only there and the others on all channels.
 
         Raises:
             ValueError: If any parameter is out of valid range.
@@ -84,24 +134,30 @@ class Sequencer:
         if pad_pause < 0:
             raise ValueError(
                 f'Pad pause must be non-negative, got {pad_pause}')
+        if frame_size < 1:
+            raise ValueError(
+                f'Frame size must be at least 1, got {frame_size}')
 
         self._mf = mf
-        self._wave = SineWave(sample_rate=sample_rate, channels=channels)
+        self._logger = logger or logging.getLogger(__name__)
+        if snr is not None:
+            oscillator = select_oscillator(snr, engine)
+            self._logger.debug(
+                f'Using the {oscillator} oscillator for {snr} dB SNR')
+        self._wave = SineWave(
+            sample_rate=sample_rate, channels=channels, engine=engine,
+            oscillator=oscillator)
+        if engine == 'numpy' and self._wave.engine != 'numpy':
+            self._logger.warning(
+                'numpy is not installed, falling back to python engine')
         self._length = length
         self._amplitude = amplitude
         self._pause = pause
         self._sr = sample_rate
         self._ch = channels
         self._stop_on_error = stop_on_error
-        self._logger = logger or logging.getLogger(__name__)
-        if backend is None:
-            backend = PyAudioBackend(
-                sample_rate=sample_rate,
-                channels=channels,
-                amplitude=1.0,
-                logger=self._logger)
         # also check if backend is a type or an instance
-        elif isinstance(backend, type):
+        if isinstance(backend, type):
             backend = backend(
                 sample_rate=sample_rate,
                 channels=channels,
@@ -110,9 +166,123 @@ class Sequencer:
         self._backend = backend  # type: ignore
         self._pad_pause = pad_pause
 
+        self._tone_bank = (
+            tone_bank if tone_bank is not None
+            else ToneBank(tone_cache_size))
+        self._frame_size = frame_size
+        self._routing = self._check_routing(routing)
+        # the routed channels by code id, aliases share their routes
+        self._routes = {
+            self._mf.code_id(code): targets
+            for code, targets in self._routing.items()
+        } if isinstance(self._routing, dict) else {}
+
         self._valid_codes = set(
             self._mf.valid_codes() |
             self._meta_codes)
+        self._tokenizer = Tokenizer(self._valid_codes)
+        self._meta_tokens = frozenset(
+            self._tokenizer.id(code) for code in self._meta_codes)
+
+    @property
+    def backend(self) -> BlueboxBackend:
+        """The backend, the default PyAudio backend is created on first use.
+
+        Creating it imports pyaudio and opens PortAudio, which probes
+        the audio devices, so Sequencers that never play do not pay
+        for it.
+        """
+        if self._backend is None:
+            self._backend = get_backend('pyaudio')(
+                sample_rate=self._sr,
+                channels=self._ch,
+                amplitude=1.0,
+                logger=self._logger)
+        return self._backend
+
+    @property
+    def tokenizer(self) -> Tokenizer:
+        """The tokenizer splitting sequences into codes."""
+        return self._tokenizer
+
+    @property
+    def tone_bank(self) -> ToneBank:
+        """The tone bank holding the rendered buffers."""
+        return self._tone_bank
+
+    def _settings(self) -> t.Dict[str, t.Any]:
+        """Get the constructor arguments needed to recreate the Sequencer.
+
+        Used to build equivalent Sequencers in worker processes, the MF
+        instance is pickled with them.
+        """
+        return dict(
+            mf=self._mf,
+            amplitude=self._amplitude,
+            length=self._length,
+            pause=self._pause,
+            sample_rate=self._sr,
+            channels=self._ch,
+            stop_on_error=self._stop_on_error,
+            pad_pause=self._pad_pause,
+            engine=self._wave.engine,
+            frame_size=self._frame_size,
+            oscillator=self._wave.oscillator,
+            routing=self._routing)
+
+    def _check_routing(
+            self,
+            routing: t.Optional[t.Union[
+                str, t.Mapping[str, t.Union[int, t.Sequence[int]]]]]
+            ) -> t.Optional[t.Union[str, t.Dict[str, t.FrozenSet[int]]]]:
+        """Validate the routing and normalize a mapping to channel sets.
+
+        Raises:
+            ValueError: If the routing does not fit the channels.
+        """
+        if routing is None:
+            return None
+        if isinstance(routing, str):
+            if routing != 'split':
+                raise ValueError(
+                    f'Invalid routing: {routing}, must be split or a '
+                    f'mapping of codes to channels')
+            if self._ch < 2:
+                raise ValueError('Split routing needs at least 2 channels')
+            return routing
+        routes = {}
+        for code, targets in routing.items():
+            if code not in self._mf:
+                raise ValueError(f'Invalid code in routing: {code}')
+            channels = frozenset(
+                [targets] if isinstance(targets, int) else targets)
+            if not channels or not all(
+                    0 <= c < self._ch for c in channels):
+                raise ValueError(
+                    f'Invalid channels for code {code}: {targets}, '
+                    f'must be in 0..{self._ch - 1}')
+            routes[code] = channels
+        return routes
+
+    def _channel_plan(
+            self,
+            code_id: int,
+            channels: int) -> t.Tuple[t.Optional[str], ...]:
+        """Get what each channel plays for a code id.
+
+        Returns:
+            One entry per channel: 'mix' for both tones, 'low' or
+            'high' for one tone of the pair, or None for silence.
+        """
+        if channels == 1:
+            return ('mix',)
+        if self._routing == 'split':
+            return ('low', 'high') + (None,) * (channels - 2)
+        if code_id in self._routes:
+            targets = self._routes[code_id]
+            return tuple(
+                'mix' if c in targets else None for c in range(channels))
+        return ('mix',) * channels
 
     def _pause_generator(
                         self,
@@ -140,6 +310,13 @@ class Sequencer:
             length = self._length
         if amplitude is None:
             amplitude = self._amplitude
+        if self._wave.engine == 'numpy':
+            # render both tones as arrays and mix them in one operation
+            block = (
+                self._wave.sine_block(freq1, length, amplitude / 2., phase) +
+                self._wave.sine_block(freq2, length, amplitude / 2., phase))
+            yield from block.tolist()
+            return
         tone1 = self._wave.sine(
             freq1, length, amplitude / 2., phase)
         tone2 = self._wave.sine(
@@ -152,42 +329,205 @@ class Sequencer:
             except StopIteration:
                 break
 
-    def sequence(self, codes: str) -> t.Iterator[float]:
-        """Generate a sequence of waveforms.
+    def _render_tone(self, freq1: float, freq2: float) -> Block:
+        """Render a dual tone into a single buffer."""
+        if self._wave.engine == 'numpy':
+            return (
+                self._wave.sine_block(freq1, self._length,
+                                      self._amplitude / 2.) +
+                self._wave.sine_block(freq2, self._length,
+                                      self._amplitude / 2.))
+        if self._wave.oscillator != 'exact':
+            return array('d', map(
+                operator.add,
+                self._wave.sine_block(freq1, self._length,
+                                      self._amplitude / 2.),
+                self._wave.sine_block(freq2, self._length,
+                                      self._amplitude / 2.)))
+        return array('d', self._sine_mf_generator(freq1, freq2))
 
-        Processes the input codes, filtering out invalid ones, and generates
-        the corresponding tone sequences with proper pauses.
+    def _render_frames(
+            self,
+            freq1: float,
+            freq2: float,
+            plan: t.Tuple[t.Optional[str], ...]) -> Block:
+        """Render a dual tone into a buffer of interleaved frames."""
+        if plan == ('mix',):
+            return self._render_tone(freq1, freq2)
+        parts: t.Dict[t.Optional[str], Block] = {
+            'low': self._wave.sine_block(
+                freq1, self._length, self._amplitude / 2.),
+            'high': self._wave.sine_block(
+                freq2, self._length, self._amplitude / 2.),
+        }
+        if 'mix' in plan:
+            parts['mix'] = self._render_tone(freq1, freq2)
+        if None in plan:
+            parts[None] = zeros_like(parts['low'], len(parts['low']))
+        return interleave([parts[p] for p in plan])
+
+    def _tone_block(self, code: str, channels: int = 1) -> Block:
+        """Get the buffer for a code from the tone bank."""
+        return self._id_block(self._mf.code_id(code), channels)
+
+    def _id_block(self, code_id: int, channels: int = 1) -> Block:
+        """Get the buffer for a code id from the tone bank."""
+        freq1, freq2 = self._mf.id_frequencies[code_id]
+        plan = self._channel_plan(code_id, channels)
+        key = (freq1, freq2, self._length, self._amplitude,
+               self._sr, self._wave.engine, self._wave.oscillator, plan)
+        return self._tone_bank.get(
+            key, lambda: self._render_frames(freq1, freq2, plan))
+
+    def _pause_block(
+            self,
+            length: t.Optional[float] = None,
+            channels: int = 1) -> Block:
+        """Get the buffer for a pause from the tone bank."""
+        if length is None:
+            length = self._pause
+        return self._silence_block(self._wave.n_samples(length), channels)
+
+    def _silence_block(self, n_samples: int, channels: int = 1) -> Block:
+        """Get the buffer for a pause of n_samples from the tone bank."""
+        key = ('pause', n_samples, self._wave.engine, channels)
+        return self._tone_bank.get(key, lambda: zeros_like(
+            self._wave.sine_block(0., 0., 0.), n_samples * channels))
+
+    def _tone_range(
+            self,
+            code_id: int,
+            offset: int,
+            count: int,
+            channels: int = 1) -> Block:
+        """Render count frames of a tone from offset on.
+
+        Whole tones come from the tone bank, parts of a tone are
+        rendered from the analytic phase at offset.
+        """
+        if offset == 0 and count == self._wave.n_samples(self._length):
+            return self._id_block(code_id, channels)
+        freq1, freq2 = self._mf.id_frequencies[code_id]
+        amplitude = self._amplitude / 2.
+        low = self._wave.sine_range(freq1, offset, count, amplitude)
+        high = self._wave.sine_range(freq2, offset, count, amplitude)
+        if self._wave.engine == 'numpy':
+            mix = low + high
+        else:
+            mix = array('d', map(operator.add, low, high))
+        plan = self._channel_plan(code_id, channels)
+        if plan == ('mix',):
+            return mix
+        parts: t.Dict[t.Optional[str], Block] = {
+            'low': low, 'high': high, 'mix': mix,
+            None: zeros_like(low, count)}
+        return interleave([parts[p] for p in plan])
+
+    def render_range(
+            self,
+            codes: t.Union[str, TimingPlan],
+            start_sample: int,
+            n_samples: int) -> Block:
+        """Render a window of a sequence without rendering what precedes it.
+
+        The entries overlapping the window are found in the timing plan
+        by bisection and only the window is synthesized, the phase of a
+        tone cut by the window start is computed directly. The cost
+        depends on the size of the window and not on its offset.
+
+        Args:
+            codes: The sequence of codes or its timing plan, see
+                :meth:`plan`. Passing the plan saves compiling long
+                sequences for every window.
+            start_sample: The first frame of the window. Must be
+                non-negative.
+            n_samples: The number of frames in the window. Must be
+                non-negative.
+
+        Returns:
+            A block of interleaved frames, shorter than n_samples if
+            the window reaches past the end of the sequence. It may be
+            shared with the tone bank and must not be modified.
+
+        Raises:
+            ValueError: If start_sample or n_samples is negative.
+        """
+        if start_sample < 0:
+            raise ValueError(
+                f'Start sample must be non-negative, got {start_sample}')
+        if n_samples < 0:
+            raise ValueError(
+                f'Number of samples must be non-negative, got {n_samples}')
+        plan = codes if isinstance(codes, TimingPlan) else self.plan(codes)
+        ch = self._ch
+        parts = []
+        for i, offset, count in plan.window(start_sample, n_samples):
+            code_id = plan.code_ids[i]
+            if code_id != PAUSE:
+                parts.append(self._tone_range(code_id, offset, count, ch))
+            elif count == plan.lengths[i]:
+                parts.append(self._silence_block(count, ch))
+            else:
+                parts.append(zeros_like(self._silence_block(0), count * ch))
+        if not parts:
+            return self._silence_block(0, ch)
+        return concat(parts)
+
+    def _samples(self, block: Block) -> t.Iterable[float]:
+        """Get the samples of a buffer as python floats."""
+        if self._wave.engine == 'numpy':
+            return block.tolist()
+        return block
+
+    def plan(self, codes: str) -> TimingPlan:
+        """Compile a sequence into its timing plan.
+
+        The sequence is tokenized and validated like for playback, and
+        each tone, pause between codes, p/P meta pause and pad pause
+        becomes one entry of the plan with its exact number of samples,
+        without rendering any of them.
+
+        Args:
+            codes: The sequence of codes.
+
+        Returns:
+            The immutable timing plan, empty if there are no valid codes.
+
+        Raises:
+            ValueError: If a code is invalid and stop_on_error is set.
         """
-        # Filter and validate codes first
-        valid_codes = []
-        for i, code in enumerate(codes):
-            if code not in self._valid_codes:
-                msg = (f"Invalid code '{code}' at position {i} "
-                       f"in sequence '{codes}'")
-                if self._stop_on_error:
-                    raise ValueError(msg)
-                else:
-                    self._logger.warning(msg)
-                    continue
-            valid_codes.append(code)
-
-        if not valid_codes:
+        def invalid(code: str, position: int) -> None:
+            msg = (f"Invalid code '{code}' at position {position} "
+                   f"in sequence '{codes}'")
+            if self._stop_on_error:
+                raise ValueError(msg)
+            self._logger.warning(msg)
+
+        # Tokenize and validate codes first
+        tokens = self._tokenizer.tokenize(codes, invalid)
+
+        if not tokens:
             self._logger.info('No valid codes in sequence, nothing to play')
-            return
+            return TimingPlan((), self._mf.id_codes)
 
-        seq_len = len(valid_codes)
+        seq_len = len(tokens)
+        names = self._tokenizer.codes
+        tone = self._wave.n_samples(self._length)
+        pause = self._wave.n_samples(self._pause)
+        pad = self._wave.n_samples(self._pad_pause)
+        entries = []
 
-        if self._pad_pause > 0:
-            # Generate a pause at the start of the sequence
-            yield from self._pause_generator(self._pad_pause)
+        if pad > 0:
+            # Pause at the start of the sequence
+            entries.append((PAUSE, pad))
 
-        for i, code in enumerate(valid_codes):
-            if code in self._meta_codes:
+        for i, token in enumerate(tokens):
+            if token in self._meta_tokens:
                 # Meta code: insert pause
-                yield from self._pause_generator()
+                entries.append((PAUSE, pause))
             else:
                 try:
-                    freq1, freq2 = self._mf[code]
+                    code_id = self._mf.code_id(names[token])
                 except KeyError as e:
                     if self._stop_on_error:
                         raise e
@@ -195,20 +535,180 @@ class Sequencer:
                         self._logger.error(e)
                         continue
 
-                yield from self._sine_mf_generator(freq1, freq2)
+                entries.append((code_id, tone))
 
             # Add pause between tones (not after last tone)
             if i < seq_len - 1:
-                yield from self._pause_generator()
+                entries.append((PAUSE, pause))
+
+        if pad > 0:
+            # Pause at the end of the sequence
+            entries.append((PAUSE, pad))
+
+        return TimingPlan(entries, self._mf.id_codes)
+
+    def _segments(
+            self,
+            codes: t.Union[str, TimingPlan],
+            interleaved: bool = True) -> t.Iterator[Block]:
+        """Generate the tone and pause buffers of a sequence.
+
+        Compiles the timing plan of the sequence, unless it is given,
+        and yields the (cached) buffer of each of its entries in order,
+        as frames of all channels or, if interleaved is False, as a
+        single channel.
+        """
+        ch = self._ch if interleaved else 1
+        plan = codes if isinstance(codes, TimingPlan) else self.plan(codes)
+        for code_id, _, n_samples in plan:
+            if code_id == PAUSE:
+                yield self._silence_block(n_samples, ch)
+            else:
+                yield self._id_block(code_id, ch)
+
+    def sequence(self, codes: str) -> t.Iterator[float]:
+        """Generate a sequence of waveforms.
+
+        Processes the input codes, filtering out invalid ones, and generates
+        the corresponding tone sequences with proper pauses.
+        """
+        for segment in self._segments(codes):
+            yield from self._samples(segment)
+
+    def prerender(self, codes: str) -> None:
+        """Render the tones and pauses of a sequence into the tone bank."""
+        for _ in self._segments(codes):
+            pass
+
+    def blocks(
+            self,
+            codes: t.Union[str, TimingPlan],
+            frame_size: t.Optional[int] = None) -> t.Iterator[Block]:
+        """Generate a sequence of waveforms as fixed-size blocks.
+
+        Args:
+            codes: The sequence of codes or its timing plan.
+            frame_size: The number of frames per block, defaults to the
+                frame size of the Sequencer. The last block may be shorter.
+
+        Returns:
+            An iterator of read-only blocks of interleaved frames.
+        """
+        if frame_size is None:
+            frame_size = self._frame_size
+        if frame_size < 1:
+            raise ValueError(
+                f'Frame size must be at least 1, got {frame_size}')
+        return rechunk(self._segments(codes), frame_size * self._ch)
+
+    def channel_blocks(
+            self,
+            sequences: t.Sequence[str],
+            frame_size: t.Optional[int] = None) -> t.Iterator[Block]:
+        """Generate a different sequence on each channel.
+
+        The sequences are rendered as single channels, the shorter ones
+        are padded with silence, and each block is interleaved once.
+
+        Args:
+            sequences: One sequence of codes per channel, channels
+                without a sequence are silent.
+            frame_size: The number of frames per block, defaults to the
+                frame size of the Sequencer. The last block may be shorter.
+
+        Returns:
+            An iterator of blocks of interleaved frames.
+
+        Raises:
+            ValueError: If there are more sequences than channels.
+        """
+        if len(sequences) > self._ch:
+            raise ValueError(
+                f'Got {len(sequences)} sequences for {self._ch} channels')
+        if frame_size is None:
+            frame_size = self._frame_size
+        if frame_size < 1:
+            raise ValueError(
+                f'Frame size must be at least 1, got {frame_size}')
+        streams = [
+            rechunk(self._segments(codes, interleaved=False), frame_size)
+            for codes in sequences]
+        silent = self._ch - len(sequences)
+        for frames in zip_longest(*streams):
+            present = [block for block in frames if block is not None]
+            if not present:
+                return
+            n = max(len(block) for block in present)
+            silence = zeros_like(present[0], n)
+            channels = []
+            for block in frames:
+                if block is None:
+                    block = silence
+                elif len(block) < n:
+                    # the last block of a shorter sequence
+                    block = concat([block, silence[len(block):]])
+                channels.append(block)
+            channels.extend([silence] * silent)
+            yield interleave(channels)
+
+    def play_channels(self, sequences: t.Sequence[str]) -> None:
+        """Play a different sequence on each channel.
+
+        See :meth:`channel_blocks`.
+        """
+        self.backend.play_blocks(self.channel_blocks(sequences))
 
-        if self._pad_pause > 0:
-            # Generate a pause at the end of the sequence
-            yield from self._pause_generator(self._pad_pause)
+    def session(
+            self,
+            idle_timeout: t.Optional[float] = None
+            ) -> t.ContextManager[BlueboxBackend]:
+        """Keep the backend open across several calls.
+
+        Args:
+            idle_timeout: Close the audio stream after this many seconds
+                without playback, see :meth:`BlueboxBackend.session`.
+
+        Returns:
+            A context manager yielding the backend.
+        """
+        return self.backend.session(idle_timeout=idle_timeout)
+
+    def render_batch(
+            self,
+            items: t.Iterable[t.Union['BatchItem', t.Sequence[t.Any]]],
+            workers: t.Optional[int] = None) -> t.List['BatchResult']:
+        """Render many sequences to WAV files in parallel.
+
+        See :func:`bluebox.batch.render_batch`, the Sequencer settings
+        are the defaults for every item and its tone bank is shared with
+        the workers.
+        """
+        from .batch import render_batch
+        return render_batch(self, items, workers)
+
+    def render_parallel(
+            self,
+            codes: t.Union[str, TimingPlan],
+            output: t.Optional[t.Union[BlueboxBackend, t.BinaryIO]] = None,
+            workers: t.Optional[int] = None,
+            **kwargs: t.Any) -> int:
+        """Render a long sequence in chunks on a process pool.
+
+        See :func:`bluebox.render.render_parallel`, the output defaults
+        to the backend of the Sequencer.
+        """
+        from .render import render_parallel
+        return render_parallel(self, codes, output, workers, **kwargs)
 
     def __call__(self, codes: str) -> None:
-        """Generate a sequence of waveforms."""
-        seq = self.sequence(codes)
-        self._backend.play(seq)
+        """Generate a sequence of waveforms.
+
+        The backend is told the length of the sequence up front, see
+        :meth:`BlueboxBackend.reserve`.
+        """
+        plan = self.plan(codes)
+        self.backend.reserve(plan.total_samples)
+        self.backend.play_blocks(self.blocks(plan))
 
     def __repr__(self) -> str:
         """Get the representation of the Sequencer."""
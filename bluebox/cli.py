@@ -6,9 +6,12 @@ This file can be used to interactively generate tone sequences.
 import typing as t
 from pathlib import Path
 import argparse
+import functools
 import logging
 import sys
+import time
 from .box import Sequencer
+from .freqs import BaseMF
 from . import get_mf, list_mf, __version__
 from .backends import get_backend, list_backends
 
@@ -56,12 +59,21 @@ def parse_args(args: t.Optional[t.Sequence[str]] = None) -> argparse.Namespace:
             type=str,
             default='pyaudio',
             help='The backend to use for playing the waveforms '
-                 '(pyaudio, wav, dummy).'
+                 '(pyaudio, pyaudio-nb, wav, pcm, dummy).'
     )
     parser.add_argument(
             '-o', '--output',
-            type=Path,
-            help='Output file path (required for wav backend).'
+            type=str,
+            help='Output file path (required for wav backend). The pcm '
+                 'backend writes to stdout by default and also accepts '
+                 'tcp://host:port and unix:///path addresses.'
+    )
+    parser.add_argument(
+            '--pcm-format',
+            type=str,
+            default='s16le',
+            help='The raw sample format of the pcm backend '
+                 '(s16le, s24le, s32le, f32le).'
     )
     parser.add_argument(
             '-r', '--pad-pause-duration',
@@ -69,7 +81,28 @@ def parse_args(args: t.Optional[t.Sequence[str]] = None) -> argparse.Namespace:
             default=150.0,
             help='The duration (ms) of the pause before/after sequence.'
     )
-    # we can have sequence or file,pipe,stdin OR interactive
+    parser.add_argument(
+            '--mmap',
+            action='store_true',
+            help='Write the WAV file through a memory map, the file is '
+                 'created at its final size.'
+    )
+    parser.add_argument(
+            '--serve-dir',
+            type=Path,
+            default=None,
+            help='The directory the server writes RENDER requests to, '
+                 'RENDER is disabled without it.'
+    )
+    parser.add_argument(
+            '-j', '--jobs',
+            type=int,
+            default=None,
+            help='Number of worker processes for --batch (default: one '
+                 'per CPU). With the wav or pcm backend a sequence is '
+                 'rendered in parallel chunks on this many processes.'
+    )
+    # we can have sequence or file,pipe,stdin OR interactive OR batch
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument(
             '-f', '--file',
@@ -87,6 +120,20 @@ def parse_args(args: t.Optional[t.Sequence[str]] = None) -> argparse.Namespace:
             '-i', '--interactive',
             action='store_true',
             help='Enter interactive mode.')
+    group.add_argument(
+            '-B', '--batch',
+            type=Path,
+            help='Render the sequences of a JSON lines manifest to WAV '
+                 'files, one {"sequence": ..., "output": ...} per line.')
+    group.add_argument(
+            '--serve',
+            type=str,
+            nargs='?',
+            const='tcp://127.0.0.1:7474',
+            metavar='ADDRESS',
+            help='Run a server taking PLAY and RENDER requests over '
+                 'tcp://host:port or unix:///path '
+                 '(default: tcp://127.0.0.1:7474).')
     group.add_argument(
             'sequence',
             type=str,
@@ -150,6 +197,42 @@ def bluebox_interactive(seq: Sequencer) -> None:
             # Continue on error in interactive mode
 
 
+def bluebox_batch(
+        args: argparse.Namespace,
+        mf: BaseMF,
+        stop_on_error: bool) -> None:
+    """Render the items of a batch manifest to WAV files.
+
+    Exits with status 1 if any item failed.
+    """
+    from .batch import read_manifest
+    try:
+        items = read_manifest(args.batch)
+    except Exception as e:
+        logging.error(e)
+        sys.exit(1)
+
+    # every item writes its own WAV file, the backend is not used
+    seq = Sequencer(
+            mf=mf,
+            amplitude=args.amplitude,
+            length=args.length,
+            pause=args.pause,
+            sample_rate=args.sample_rate,
+            channels=1,
+            stop_on_error=stop_on_error,
+            backend=get_backend('dummy'),
+            pad_pause=args.pad_pause_duration)
+    start = time.perf_counter()
+    results = seq.render_batch(items, workers=args.jobs)
+    failed = sum(not r.ok for r in results)
+    logging.info(
+        'Rendered %d of %d files in %.2f s',
+        len(results) - failed, len(results), time.perf_counter() - start)
+    if failed:
+        sys.exit(1)
+
+
 def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
     """Generate a tone sequence.
 
@@ -173,6 +256,10 @@ def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
         logging.error('Valid MFs: %s', ', '.join(list_mf()))
         sys.exit(1)
 
+    if args.batch:
+        bluebox_batch(args, mf, stop_on_error)
+        return
+
     if args.backend in list_backends():
         backend_class = get_backend(args.backend)
     else:
@@ -180,23 +267,30 @@ def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
         logging.error('Valid backends: %s', ', '.join(list_backends()))
         sys.exit(1)
 
+    backend_kwargs: t.Dict[str, t.Any] = dict(
+        sample_rate=args.sample_rate,
+        channels=1,
+        amplitude=1.0)
     # WAV backend requires output path
     if args.backend == 'wav':
         if not args.output:
             logging.error('WAV backend requires --output/-o parameter')
             sys.exit(1)
-        backend = backend_class(
-            output_path=args.output,
-            sample_rate=args.sample_rate,
-            channels=1,
-            amplitude=1.0)
-    else:
-        backend = backend_class(
-            sample_rate=args.sample_rate,
-            channels=1,
-            amplitude=1.0)
+        backend_kwargs.update(
+            output_path=args.output, streaming=True, memory_map=args.mmap)
+    elif args.backend == 'pcm':
+        backend_kwargs.update(
+            output_path=args.output, pcm_format=args.pcm_format)
+    backend = backend_class(**backend_kwargs)
 
-    seq = Sequencer(
+    sequencer_class = Sequencer
+    if args.serve:
+        from .aio import AsyncSequencer
+        sequencer_class = AsyncSequencer
+        # invalid sequences are reported to the client
+        stop_on_error = True
+
+    seq = sequencer_class(
             mf=mf,
             amplitude=args.amplitude,
             length=args.length,
@@ -206,14 +300,32 @@ def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
             stop_on_error=stop_on_error,
             backend=backend,
             pad_pause=args.pad_pause_duration)
+    if args.serve:
+        from .server import serve
+        assert isinstance(seq, AsyncSequencer)
+        try:
+            serve(seq, args.serve, output_dir=args.serve_dir)
+        except (OSError, ValueError) as e:
+            logging.error(e)
+            sys.exit(1)
+        return
+
+    play: t.Callable[[str], t.Any] = seq
+    if args.jobs is not None and args.backend in ('wav', 'pcm'):
+        # render in chunks on a process pool
+        play = functools.partial(seq.render_parallel, workers=args.jobs)
+
     if args.interactive:
-        bluebox_interactive(seq)
+        # keep the audio stream open between lines
+        with seq.session():
+            bluebox_interactive(seq)
         return
 
     if args.file:
         try:
             with args.file.open() as f:
-                seq(f.read())
+                play(f.read())
+            backend.wait()
         except Exception as e:
             logging.error(e)
             sys.exit(1)
@@ -222,7 +334,8 @@ def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
     if args.pipe:
         try:
             with args.pipe.open() as f:
-                seq(f.read())
+                play(f.read())
+            backend.wait()
         except Exception as e:
             logging.error(e)
             sys.exit(1)
@@ -230,7 +343,8 @@ def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
 
     if args.stdin:
         try:
-            seq(sys.stdin.read())
+            play(sys.stdin.read())
+            backend.wait()
         except Exception as e:
             logging.error(e)
             sys.exit(1)
@@ -238,7 +352,8 @@ def bluebox(args: t.Optional[argparse.Namespace] = None) -> None:
 
     if args.sequence:
         try:
-            seq(args.sequence)
+            play(args.sequence)
+            backend.wait()
         except Exception as e:
             logging.error(e)
             sys.exit(1)
@@ -0,0 +1,289 @@
+"""decode.py
+
+This file contains a Goertzel decoder for the tones of a MF scheme,
+used to verify that rendered sequences decode to the intended codes.
+The signal is cut into blocks and the power of every frequency of the
+scheme is measured in each block. With numpy all bins of many blocks
+are evaluated in one matrix product, the python engine runs the
+Goertzel recurrence per bin.
+"""
+
+import typing as t
+import math
+from array import array
+from pathlib import Path
+from .blocks import Block, deinterleave
+from .freqs import BaseMF
+from .wave import resolve_engine
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+# number of detection blocks evaluated at once by the numpy engine
+BATCH_BLOCKS = 256
+
+_NO_CODE = -1
+
+
+class Detection(t.NamedTuple):
+    """A decoded tone, start and length in milliseconds.
+
+    Both are multiples of the block length. Codes sharing a frequency
+    pair are reported by the first of them, e.g. MF ST2 as 12.
+    """
+
+    code: str
+    start: float
+    length: float
+
+
+class Decoder:
+    """Decoder class for detecting the codes of a MF scheme.
+
+    A block holds a code when its two strongest frequencies form a pair
+    of the scheme, together carry at least threshold of the block's
+    energy and are within max_twist of each other. Consecutive blocks
+    with the same code form one detection.
+    """
+
+    _mf: BaseMF
+    _sr: float
+    _n: int
+    _threshold: float
+    _min_twist: float
+    _min_power: float
+    _engine: str
+    _bins: t.Tuple[float, ...]
+    _names: t.Tuple[str, ...]
+    _pairs: t.Dict[t.Tuple[int, int], int]
+    _coeffs: t.List[float]
+    _basis: t.Any = None
+    _lookup: t.Any = None
+
+    def __init__(
+            self,
+            mf: BaseMF,
+            sample_rate: float = 44100.0,
+            block_length: float = 10.0,
+            threshold: float = 0.6,
+            max_twist: float = 8.0,
+            min_level: float = -50.0,
+            engine: str = 'auto') -> None:
+        """Initialize the decoder.
+
+        Args:
+            mf: The MF scheme to decode.
+            sample_rate: The sample rate of the signal.
+            block_length: The length of a detection block in
+                milliseconds. Longer blocks separate close frequencies
+                better but need longer tones. Must be positive.
+            threshold: The share of a block's energy the two tones must
+                carry, in (0, 1]. Blocks only partly covered by a tone
+                fall below it.
+            max_twist: The maximum level difference of the two tones
+                in dB.
+            min_level: Blocks with an RMS level below this many dBFS
+                are silence.
+            engine: The engine, 'python', 'numpy' or 'auto'.
+
+        Raises:
+            ValueError: If any parameter is out of valid range.
+        """
+        if block_length <= 0:
+            raise ValueError(
+                f'Block length must be positive, got {block_length}')
+        if not 0 < threshold <= 1:
+            raise ValueError(
+                f'Threshold must be in (0, 1], got {threshold}')
+        self._n = round(sample_rate * block_length / 1000)
+        if self._n < 2:
+            raise ValueError(
+                f'Block length {block_length} ms is too short for the '
+                f'sample rate {sample_rate}')
+        self._mf = mf
+        self._sr = sample_rate
+        self._threshold = threshold
+        self._min_twist = 10 ** (-max_twist / 10)
+        self._min_power = 10 ** (min_level / 10)
+        self._engine = resolve_engine(engine)
+
+        self._bins = tuple(sorted({f for pair in mf.id_frequencies
+                                   for f in pair}))
+        index = {f: i for i, f in enumerate(self._bins)}
+        self._pairs = {}
+        for code_id, (f1, f2) in enumerate(mf.id_frequencies):
+            a, b = sorted((index[f1], index[f2]))
+            self._pairs[(a, b)] = code_id
+        self._names = mf.id_codes
+        self._coeffs = [
+            2 * math.cos(2 * math.pi * f / sample_rate) for f in self._bins]
+
+    @property
+    def bins(self) -> t.Tuple[float, ...]:
+        """The frequencies that are measured."""
+        return self._bins
+
+    @property
+    def block_size(self) -> int:
+        """The number of samples per detection block."""
+        return self._n
+
+    def _numpy_tables(self) -> t.Tuple[t.Any, t.Any]:
+        """Build the DFT basis of the bins and the pair lookup."""
+        if self._basis is None:
+            omega = 2 * np.pi * np.array(self._bins) / self._sr
+            phase = np.outer(np.arange(self._n), omega)
+            self._basis = np.hstack((np.cos(phase), np.sin(phase)))
+            lookup = np.full(
+                (len(self._bins), len(self._bins)), _NO_CODE, dtype=np.int64)
+            for (a, b), code_id in self._pairs.items():
+                lookup[a, b] = lookup[b, a] = code_id
+            self._lookup = lookup
+        return self._basis, self._lookup
+
+    def _classify_numpy(self, frames: t.Any) -> t.List[int]:
+        """Get the code id of each row of frames with numpy."""
+        basis, lookup = self._numpy_tables()
+        n_bins = len(self._bins)
+        spectrum = frames @ basis
+        power = spectrum[:, :n_bins] ** 2 + spectrum[:, n_bins:] ** 2
+        energy = np.einsum('ij,ij->i', frames, frames)
+        # a full-scale sine at a bin frequency has a relative power of 1
+        relative = 2 * power / (
+            self._n * np.maximum(energy, 1e-300)[:, np.newaxis])
+        order = np.argsort(relative, axis=1)
+        rows = np.arange(len(frames))
+        a, b = order[:, -1], order[:, -2]
+        pa, pb = relative[rows, a], relative[rows, b]
+        ok = ((energy >= self._min_power * self._n) &
+              (pa + pb >= self._threshold) &
+              (pb >= self._min_twist * pa))
+        return np.where(ok, lookup[a, b], _NO_CODE).tolist()
+
+    def _classify_python(self, block: t.Sequence[float]) -> int:
+        """Get the code id of a block with the Goertzel recurrence."""
+        energy = math.fsum(s * s for s in block)
+        if energy < self._min_power * self._n:
+            return _NO_CODE
+        relative = []
+        for coeff in self._coeffs:
+            s1 = s2 = 0.0
+            for sample in block:
+                s1, s2 = sample + coeff * s1 - s2, s1
+            power = s1 * s1 + s2 * s2 - coeff * s1 * s2
+            relative.append(2 * power / (self._n * energy))
+        b, a = sorted(range(len(relative)), key=relative.__getitem__)[-2:]
+        pa, pb = relative[a], relative[b]
+        if pa + pb < self._threshold or pb < self._min_twist * pa:
+            return _NO_CODE
+        return self._pairs.get((min(a, b), max(a, b)), _NO_CODE)
+
+    def _classify(self, samples: Block, count: int) -> t.List[int]:
+        """Get the code id of the first count blocks of samples."""
+        n = self._n
+        if self._engine == 'numpy':
+            frames = np.asarray(
+                samples[:count * n], dtype=np.float64).reshape(count, n)
+            return self._classify_numpy(frames)
+        return [self._classify_python(samples[i * n:(i + 1) * n])
+                for i in range(count)]
+
+    def block_codes(self, blocks: t.Iterable[Block]) -> t.Iterator[int]:
+        """Get the code id detected in each detection block.
+
+        Args:
+            blocks: The mono signal in blocks of any size.
+
+        Returns:
+            An iterator of code ids, -1 for blocks without a code. A
+            trailing partial detection block is dropped.
+        """
+        n = self._n
+        batch = n * (BATCH_BLOCKS if self._engine == 'numpy' else 1)
+        pending: Block = (
+            np.zeros(0) if self._engine == 'numpy' else array('d'))
+        for block in blocks:
+            if self._engine == 'numpy':
+                pending = np.concatenate(
+                    (pending, np.asarray(block, dtype=np.float64)))
+            else:
+                pending.extend(block)
+            if len(pending) < batch:
+                continue
+            count = len(pending) // n
+            yield from self._classify(pending, count)
+            pending = pending[count * n:]
+        if len(pending) >= n:
+            yield from self._classify(pending, len(pending) // n)
+
+    def detect(self, blocks: t.Iterable[Block]) -> t.Iterator[Detection]:
+        """Detect the codes in a streamed signal.
+
+        Args:
+            blocks: The mono signal in blocks of any size.
+
+        Returns:
+            An iterator of detections in order.
+        """
+        block_ms = self._n * 1000 / self._sr
+        current = _NO_CODE
+        start = 0
+        end = 0
+        for end, code_id in enumerate(self.block_codes(blocks), 1):
+            if code_id == current:
+                continue
+            if current != _NO_CODE:
+                yield Detection(self._names[current], start * block_ms,
+                                (end - 1 - start) * block_ms)
+            current = code_id
+            start = end - 1
+        if current != _NO_CODE:
+            yield Detection(self._names[current], start * block_ms,
+                            (end - start) * block_ms)
+
+    def decode(self, samples: Block) -> t.List[Detection]:
+        """Detect the codes in a mono signal."""
+        return list(self.detect([samples]))
+
+    def __repr__(self) -> str:
+        """Get the representation of the Decoder."""
+        return f'{self.__class__.__name__}({self._mf})'
+
+
+def decode_file(
+        path: t.Union[str, Path],
+        mf: BaseMF,
+        channel: int = 0,
+        **kwargs: t.Any) -> t.List[Detection]:
+    """Detect the codes in a WAV file.
+
+    The file is read in blocks, keyword arguments are passed on to
+    :class:`Decoder`.
+
+    Args:
+        path: Path of the WAV file.
+        mf: The MF scheme to decode.
+        channel: The channel to decode.
+
+    Raises:
+        ValueError: If the file cannot be read or has no such channel.
+    """
+    from .backends.backend_wav import WavReader
+    with WavReader(path) as reader:
+        if not 0 <= channel < reader.channels:
+            raise ValueError(
+                f'Invalid channel {channel}, the file has '
+                f'{reader.channels}')
+        decoder = Decoder(mf, reader.sample_rate, **kwargs)
+        blocks = reader.blocks(engine=decoder._engine)
+        if reader.channels > 1:
+            blocks = (deinterleave(block, reader.channels)[channel]
+                      for block in blocks)
+        return list(decoder.detect(blocks))
+
+
+def codes(detections: t.Iterable[Detection]) -> t.List[str]:
+    """Get the codes of detections."""
+    return [detection.code for detection in detections]
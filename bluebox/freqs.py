@@ -6,24 +6,125 @@ as well as frequency manupulation functions.
 
 import typing as t
 from abc import ABC, abstractmethod
+from types import MappingProxyType
 import math
 
 
 class BaseMF(ABC):
-    """BaseMF class for defining MF frequencies."""
+    """BaseMF class for defining MF frequencies.
+
+    On first use each scheme is compiled into an immutable code to
+    frequency pair table and an integer code id mapping, so lookups
+    through :meth:`frequencies` and :meth:`code_id` are O(1) for every
+    subclass, whatever its ``__getitem__`` costs.
+    """
 
     _col: t.Tuple[float, ...]
     _row: t.Tuple[float, ...]
     _codes: t.Tuple[str, ...]
+    _alt_codes: t.Tuple[t.Union[str, None], ...] = ()
     _size: t.Tuple[int, int]
+    _valid_codes: t.Optional[t.FrozenSet[str]] = None
+    _table: t.Optional[t.Mapping[str, t.Tuple[float, float]]] = None
+    _code_ids: t.Mapping[str, int]
+    _id_frequencies: t.Tuple[t.Tuple[float, float], ...]
+    _id_codes: t.Tuple[str, ...]
 
     def __init__(self) -> None:
         super().__init__()
         self._size = (len(self._col), len(self._row))
 
-    def valid_codes(self) -> t.Set[str]:
-        """Get the valid codes."""
-        return set(self._codes)
+    def valid_codes(self) -> t.FrozenSet[str]:
+        """Get the valid codes, including alternative names."""
+        if self._valid_codes is None:
+            self._valid_codes = frozenset(
+                self._codes +
+                tuple(c for c in self._alt_codes if c is not None))
+        return self._valid_codes
+
+    def _frequencies(self, key: str) -> t.Tuple[float, float]:
+        """Compute the frequencies of a code when compiling the table.
+
+        Defaults to ``__getitem__``, subclasses whose ``__getitem__``
+        uses the table override it.
+        """
+        return self[key]
+
+    def _compile(self) -> t.Mapping[str, t.Tuple[float, float]]:
+        """Compile the frequency table and the code ids."""
+        codes = list(self._codes) + sorted(
+            set(self.valid_codes()) - set(self._codes))
+        table = {}
+        code_ids = {}
+        pair_ids: t.Dict[t.Tuple[float, float], int] = {}
+        id_codes = []
+        for code in codes:
+            f1, f2 = self._frequencies(code)
+            pair = (float(f1), float(f2))
+            table[code] = pair
+            if pair not in pair_ids:
+                id_codes.append(code)
+            code_ids[code] = pair_ids.setdefault(pair, len(pair_ids))
+        self._code_ids = MappingProxyType(code_ids)
+        self._id_frequencies = tuple(pair_ids)
+        self._id_codes = tuple(id_codes)
+        self._table = MappingProxyType(table)
+        return self._table
+
+    @property
+    def table(self) -> t.Mapping[str, t.Tuple[float, float]]:
+        """The read-only code to (f1, f2) table."""
+        if self._table is None:
+            return self._compile()
+        return self._table
+
+    @property
+    def code_ids(self) -> t.Mapping[str, int]:
+        """The read-only code to code id mapping.
+
+        Ids are consecutive integers from 0 in the order of the codes,
+        alternative names of a code (the same frequency pair, e.g. MF 0
+        and 10) share its id.
+        """
+        if self._table is None:
+            self._compile()
+        return self._code_ids
+
+    @property
+    def id_frequencies(self) -> t.Tuple[t.Tuple[float, float], ...]:
+        """The frequency pairs indexed by code id."""
+        if self._table is None:
+            self._compile()
+        return self._id_frequencies
+
+    @property
+    def id_codes(self) -> t.Tuple[str, ...]:
+        """The codes indexed by code id, the first name of each pair."""
+        if self._table is None:
+            self._compile()
+        return self._id_codes
+
+    def frequencies(self, key: str) -> t.Tuple[float, float]:
+        """Get the frequencies for a given code from the table.
+
+        Raises:
+            KeyError: If the code is not valid for this MF scheme.
+        """
+        try:
+            return self.table[key]
+        except KeyError:
+            raise KeyError(f'Invalid code: {key}') from None
+
+    def code_id(self, key: str) -> int:
+        """Get the code id of a given code.
+
+        Raises:
+            KeyError: If the code is not valid for this MF scheme.
+        """
+        try:
+            return self.code_ids[key]
+        except KeyError:
+            raise KeyError(f'Invalid code: {key}') from None
 
     @abstractmethod
     def __getitem__(self, key: str) -> t.Tuple[float, float]:
@@ -40,7 +141,18 @@ class BaseMF(ABC):
 
     def __contains__(self, key: str) -> bool:
         """Check if a code is valid."""
-        return key in self._codes
+        return key in self.table
+
+    def __getstate__(self) -> t.Dict[str, t.Any]:
+        """Get the state to pickle, without the compiled table.
+
+        The read-only mappings cannot be pickled, they are compiled
+        again on first use after unpickling.
+        """
+        state = self.__dict__.copy()
+        for name in ('_table', '_code_ids', '_id_frequencies', '_id_codes'):
+            state.pop(name, None)
+        return state
 
     def __repr__(self) -> str:
         """Get the representation of the MF."""
@@ -68,12 +180,16 @@ class DTMF(BaseMF):
             for i, code in enumerate(self._codes)
         }
 
-    def __getitem__(self, key: str) -> t.Tuple[float, float]:
+    def _frequencies(self, key: str) -> t.Tuple[float, float]:
         """Get the DTMF frequencies for a given code."""
         if key not in self._code_map:
             raise KeyError(f'Invalid code: {key}')
         return self._code_map[key]
 
+    def __getitem__(self, key: str) -> t.Tuple[float, float]:
+        """Get the DTMF frequencies for a given code."""
+        return self.frequencies(key)
+
 
 """
 The following is an implementation of the old MF standard.
@@ -119,7 +235,7 @@ class MF(BaseMF):
         '7', '8', '9',
         '0', '11', '12',
         'KP', 'KP2', 'ST')
-    _alt_codes: t.Tuple[t.Union[str, None], ...] = (
+    _alt_codes = (
         None, None, None,
         None, None, None,
         None, None, None,
@@ -130,13 +246,12 @@ class MF(BaseMF):
         self._row = self._col
         super().__init__()
 
-    def valid_codes(self) -> t.Set[str]:
-        return set(
-            self._codes +
-            tuple(c for c in self._alt_codes if c is not None))
-
     def __getitem__(self, key: str) -> t.Tuple[float, float]:
-        """Get the MF frequencies for a given code.
+        """Get the MF frequencies for a given code."""
+        return self.frequencies(key)
+
+    def _frequencies(self, key: str) -> t.Tuple[float, float]:
+        """Compute the MF frequencies for a given code.
 
         The MF frequency pairs form a triangular pattern where each code
         corresponds to a unique pair from the frequency sequence. This
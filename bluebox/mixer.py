@@ -0,0 +1,255 @@
+"""mixer.py
+
+This file contains the Mixer for rendering many sequences at once into
+one stream, e.g. to simulate several callers keying digits at the same
+time. Each voice streams the cached tone and pause buffers of its
+sequence, and only the voices sounding in a block are summed into it,
+so the cost of a block depends on the active voices and not on the
+total number of voices.
+"""
+
+import typing as t
+import math
+import operator
+from array import array
+from .blocks import Block, zeros_like
+
+if t.TYPE_CHECKING:
+    from .backends import BlueboxBackend
+    from .box import Sequencer
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+LIMITERS = ('clip', 'tanh')
+
+
+class Voice(t.NamedTuple):
+    """A sequence to mix.
+
+    start is the offset from the start of the mix in milliseconds, and
+    channel restricts the voice to one channel, by default it plays on
+    all channels.
+    """
+
+    codes: str
+    start: float = 0.0
+    channel: t.Optional[int] = None
+
+
+class _VoiceState:
+    """The playback position of a voice in the mix."""
+
+    __slots__ = ('segments', 'start', 'base', 'width', 'step', 'block',
+                 'offset')
+
+    def __init__(
+            self,
+            segments: t.Iterator[Block],
+            start: int,
+            channel: t.Optional[int],
+            channels: int) -> None:
+        self.segments = segments
+        self.start = start
+        # a voice on all channels adds frames, otherwise every
+        # channels-th sample starting at its channel
+        self.base = 0 if channel is None else channel
+        self.width = channels if channel is None else 1
+        self.step = 1 if channel is None else channels
+        self.block: t.Optional[Block] = None
+        self.offset = 0
+
+
+def _add_into(out: Block, start: int, step: int, samples: Block) -> None:
+    """Add samples to every step-th sample of out from start."""
+    end = start + len(samples) * step
+    if np is not None and isinstance(out, np.ndarray):
+        out[start:end:step] += samples
+    else:
+        out[start:end:step] = array(
+            'd', map(operator.add, out[start:end:step], samples))
+
+
+class Mixer:
+    """Mixer class for summing many sequences into one stream."""
+
+    _sequencer: 'Sequencer'
+    _gain: float
+    _limiter: t.Optional[str]
+    _frame_size: int
+
+    def __init__(
+            self,
+            sequencer: 'Sequencer',
+            headroom: float = 0.0,
+            limiter: t.Optional[str] = 'clip',
+            frame_size: t.Optional[int] = None) -> None:
+        """Initialize the Mixer.
+
+        Args:
+            sequencer: The Sequencer rendering the voices, its settings
+                and tone bank are shared by all voices.
+            headroom: Attenuation of the sum in dB, e.g. 20 * log10(n)
+                keeps n voices at full amplitude from clipping. Must be
+                non-negative.
+            limiter: How samples beyond [-1, 1] are limited, 'clip'
+                clips them, 'tanh' compresses the whole signal softly
+                and None leaves them as they are.
+            frame_size: The number of frames per block, defaults to the
+                frame size of the Sequencer.
+
+        Raises:
+            ValueError: If any parameter is out of valid range.
+        """
+        if headroom < 0:
+            raise ValueError(
+                f'Headroom must be non-negative, got {headroom}')
+        if limiter is not None and limiter not in LIMITERS:
+            raise ValueError(
+                f'Invalid limiter: {limiter}, must be one of {LIMITERS} '
+                f'or None')
+        if frame_size is None:
+            frame_size = sequencer._frame_size
+        if frame_size < 1:
+            raise ValueError(
+                f'Frame size must be at least 1, got {frame_size}')
+        self._sequencer = sequencer
+        self._gain = 10 ** (-headroom / 20)
+        self._limiter = limiter
+        self._frame_size = frame_size
+
+    def _voice(self, voice: Voice) -> _VoiceState:
+        """Prepare the playback state of a voice."""
+        seq = self._sequencer
+        if voice.channel is not None and not 0 <= voice.channel < seq._ch:
+            raise ValueError(
+                f'Invalid channel {voice.channel} for voice '
+                f'{voice.codes!r}, must be in 0..{seq._ch - 1}')
+        if voice.start < 0:
+            raise ValueError(
+                f'Start must be non-negative, got {voice.start}')
+        return _VoiceState(
+            seq._segments(voice.codes, interleaved=voice.channel is None),
+            round(voice.start * seq._sr / 1000),
+            voice.channel,
+            seq._ch)
+
+    def _fill(
+            self,
+            out: Block,
+            state: _VoiceState,
+            first: int,
+            frames: int) -> t.Optional[int]:
+        """Add a voice to the frames of a block from first on.
+
+        Returns:
+            None while the voice continues after the block, otherwise
+            the number of frames it filled.
+        """
+        ch = self._sequencer._ch
+        position = first * ch + state.base
+        need = (frames - first) * state.width
+        while need > 0:
+            block = state.block
+            if block is None or state.offset == len(block):
+                block = state.block = next(state.segments, None)
+                state.offset = 0
+                if block is None:
+                    return position // ch
+            take = min(need, len(block) - state.offset)
+            _add_into(out, position, state.step,
+                      block[state.offset:state.offset + take])
+            state.offset += take
+            position += take * state.step
+            need -= take
+        return None
+
+    def _limit(self, out: Block) -> Block:
+        """Apply the headroom and the limiter to a mixed block."""
+        is_ndarray = np is not None and isinstance(out, np.ndarray)
+        if self._gain != 1.0:
+            if is_ndarray:
+                out *= self._gain
+            else:
+                out = array('d', map(self._gain.__mul__, out))
+        if self._limiter == 'tanh':
+            if is_ndarray:
+                return np.tanh(out, out=out)
+            return array('d', map(math.tanh, out))
+        if self._limiter == 'clip' and len(out) and (
+                max(out) > 1.0 or min(out) < -1.0):
+            if is_ndarray:
+                return np.clip(out, -1.0, 1.0, out=out)
+            return array('d', (min(max(s, -1.0), 1.0) for s in out))
+        return out
+
+    def blocks(
+            self,
+            voices: t.Iterable[t.Union[Voice, t.Sequence[t.Any]]]
+            ) -> t.Iterator[Block]:
+        """Mix the voices into blocks of interleaved frames.
+
+        Args:
+            voices: The voices to mix, as Voice or (codes, start,
+                channel) tuples.
+
+        Returns:
+            An iterator of blocks, the mix ends with the last voice.
+
+        Raises:
+            ValueError: If a voice has a negative start or an invalid
+                channel.
+        """
+        pending = sorted(
+            (self._voice(Voice(*voice)) for voice in voices),
+            key=lambda state: state.start, reverse=True)
+        template = self._sequencer._wave.sine_block(0., 0., 0.)
+        ch = self._sequencer._ch
+        frames = self._frame_size
+        active: t.List[_VoiceState] = []
+        position = 0
+        while active or pending:
+            end = position + frames
+            while pending and pending[-1].start < end:
+                active.append(pending.pop())
+            out = zeros_like(template, frames * ch)
+            filled = 0
+            finished = []
+            for state in active:
+                first = max(state.start - position, 0)
+                stop = self._fill(out, state, first, frames)
+                if stop is not None:
+                    finished.append(state)
+                filled = max(filled, frames if stop is None else stop)
+            for state in finished:
+                active.remove(state)
+            if not active and not pending:
+                # the last block ends with the longest voice
+                out = out[:filled * ch]
+                if not filled:
+                    return
+            yield self._limit(out)
+            position = end
+
+    def play(
+            self,
+            voices: t.Iterable[t.Union[Voice, t.Sequence[t.Any]]],
+            backend: t.Optional['BlueboxBackend'] = None,
+            close: bool = True) -> None:
+        """Mix the voices and stream them to a backend.
+
+        Args:
+            voices: The voices to mix, see :meth:`blocks`.
+            backend: The backend to play on, defaults to the backend of
+                the Sequencer.
+            close: If True, close the backend after the mix.
+        """
+        if backend is None:
+            backend = self._sequencer.backend
+        backend.play_blocks(self.blocks(voices), close)
+
+    def __repr__(self) -> str:
+        """Get the representation of the Mixer."""
+        return f'{self.__class__.__name__}({self._sequencer})'
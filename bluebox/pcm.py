@@ -0,0 +1,292 @@
+"""pcm.py
+
+This file contains the conversion of float sample blocks to PCM
+bytes. Whole blocks are clipped and quantized at once, with numpy
+when it is installed and with the array module otherwise, either to
+a new bytes object or straight into a writable buffer such as a
+memory map.
+"""
+
+import typing as t
+import math
+import random
+import sys
+from array import array
+from .blocks import Block, to_list
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+
+class SampleFormat(t.NamedTuple):
+    """Description of a PCM sample format."""
+
+    name: str
+    width: int
+    format_tag: int
+    scale: float
+
+
+SAMPLE_FORMATS: t.Dict[str, SampleFormat] = {
+    'int16': SampleFormat('int16', 2, WAVE_FORMAT_PCM, 32767.0),
+    'int24': SampleFormat('int24', 3, WAVE_FORMAT_PCM, 8388607.0),
+    'int32': SampleFormat('int32', 4, WAVE_FORMAT_PCM, 2147483647.0),
+    'float32': SampleFormat('float32', 4, WAVE_FORMAT_IEEE_FLOAT, 1.0),
+}
+
+
+def get_format(name: str) -> SampleFormat:
+    """Get a sample format by name.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    try:
+        return SAMPLE_FORMATS[name]
+    except KeyError:
+        raise ValueError(
+            f'Invalid sample format: {name}, must be one of '
+            f'{", ".join(SAMPLE_FORMATS)}') from None
+
+
+def _encode_numpy(
+        block: Block,
+        fmt: SampleFormat,
+        dither: bool) -> bytes:
+    """Convert a block to little-endian PCM bytes with numpy."""
+    x = np.asarray(block, dtype=np.float64)
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return np.clip(x, -1.0, 1.0).astype('<f4').tobytes()
+    x = x * fmt.scale
+    if dither:
+        rng = np.random.default_rng()
+        x += rng.random(len(x)) - rng.random(len(x))
+        # round, truncating would leave a dead zone around zero
+        np.rint(x, out=x)
+    q = np.clip(x, -fmt.scale - 1, fmt.scale).astype(np.int64)
+    if fmt.width == 3:
+        return q.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return q.astype(f'<i{fmt.width}').tobytes()
+
+
+def _encode_into_numpy(
+        block: Block,
+        buffer: t.Any,
+        offset: int,
+        fmt: SampleFormat,
+        dither: bool) -> None:
+    """Quantize a block into a writable buffer with numpy."""
+    x = np.asarray(block, dtype=np.float64)
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        np.clip(x, -1.0, 1.0,
+                out=np.frombuffer(buffer, '<f4', len(x), offset))
+        return
+    x = x * fmt.scale
+    if dither:
+        rng = np.random.default_rng()
+        x += rng.random(len(x)) - rng.random(len(x))
+        # round, truncating would leave a dead zone around zero
+        np.rint(x, out=x)
+    np.clip(x, -fmt.scale - 1, fmt.scale, out=x)
+    if fmt.width == 3:
+        out = np.frombuffer(buffer, np.uint8, len(x) * 3, offset)
+        out.reshape(-1, 3)[:] = \
+            x.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3]
+        return
+    # assigning floats to an integer view truncates towards zero
+    np.frombuffer(buffer, f'<i{fmt.width}', len(x), offset)[:] = x
+
+
+def _quantize_python(
+        block: Block,
+        fmt: SampleFormat,
+        dither: bool) -> 'array[t.Any]':
+    """Quantize a block to a little-endian array with the array module."""
+    samples = to_list(block)
+    data: 'array[t.Any]'
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        data = array('f', [max(-1.0, min(1.0, s)) for s in samples])
+    else:
+        scale = fmt.scale
+        lo = -fmt.scale - 1
+        if dither:
+            rand = random.random
+            # round, truncating would leave a dead zone around zero
+            samples = [
+                math.floor(s * scale + rand() - rand() + 0.5)
+                for s in samples]
+        else:
+            samples = [s * scale for s in samples]
+        data = array(
+            'h' if fmt.width == 2 else 'i',
+            [int(max(lo, min(scale, s))) for s in samples])
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data
+
+
+def _pack24(data: 'array[t.Any]') -> bytearray:
+    """Pack little-endian int32 samples into 3 byte samples."""
+    packed = bytearray(data.tobytes())
+    # drop the most significant byte of each little-endian int32
+    del packed[3::4]
+    return packed
+
+
+def _encode_python(
+        block: Block,
+        fmt: SampleFormat,
+        dither: bool) -> bytes:
+    """Convert a block to little-endian PCM bytes with the array module."""
+    data = _quantize_python(block, fmt, dither)
+    if fmt.width == 3:
+        return bytes(_pack24(data))
+    return data.tobytes()
+
+
+def _encode_into_python(
+        block: Block,
+        buffer: t.Any,
+        offset: int,
+        fmt: SampleFormat,
+        dither: bool) -> None:
+    """Quantize a block into a writable buffer with the array module."""
+    data = _quantize_python(block, fmt, dither)
+    if fmt.width == 3:
+        packed: t.Union[bytearray, memoryview] = _pack24(data)
+    else:
+        packed = memoryview(data).cast('B')
+    buffer[offset:offset + len(packed)] = packed
+
+
+def encode(
+        block: Block,
+        sample_format: str = 'int16',
+        dither: bool = False) -> bytes:
+    """Clip and quantize a block of float samples to PCM bytes.
+
+    Samples in [-1.0, 1.0] are scaled to the full range of the integer
+    formats and truncated towards zero, values outside are clipped.
+    With dither they are rounded to the nearest value instead, so the
+    dithered quantizer has no dead zone around zero.
+
+    Args:
+        block: The samples to convert.
+        sample_format: One of 'int16', 'int24', 'int32' or 'float32'.
+        dither: Add triangular (TPDF) dither of +/-1 LSB before
+            quantizing. Ignored for float32.
+
+    Returns:
+        The little-endian PCM bytes.
+
+    Raises:
+        ValueError: If the sample format is unknown.
+    """
+    fmt = get_format(sample_format)
+    if np is not None:
+        return _encode_numpy(block, fmt, dither)
+    return _encode_python(block, fmt, dither)
+
+
+def encode_into(
+        block: Block,
+        buffer: t.Any,
+        offset: int = 0,
+        sample_format: str = 'int16',
+        dither: bool = False) -> int:
+    """Clip and quantize a block of float samples into a buffer.
+
+    Like :func:`encode`, but the PCM data is written straight into a
+    writable buffer, e.g. a memory map or shared memory, instead of a
+    new bytes object.
+
+    Args:
+        block: The samples to convert.
+        buffer: A writable buffer, such as an mmap or a bytearray.
+        offset: The byte offset in the buffer to write at.
+        sample_format: One of 'int16', 'int24', 'int32' or 'float32'.
+        dither: Add TPDF dither before quantizing, see :func:`encode`.
+
+    Returns:
+        The number of bytes written.
+
+    Raises:
+        ValueError: If the sample format is unknown, or the buffer is
+            too small.
+    """
+    fmt = get_format(sample_format)
+    n = len(block) * fmt.width
+    if offset < 0 or offset + n > len(buffer):
+        raise ValueError(
+            f'Buffer too small: {n} bytes at offset {offset} do not fit '
+            f'into {len(buffer)} bytes')
+    if not n:
+        return 0
+    if np is not None:
+        _encode_into_numpy(block, buffer, offset, fmt, dither)
+    else:
+        _encode_into_python(block, buffer, offset, fmt, dither)
+    return n
+
+
+def _unpack_numpy(data: bytes, fmt: SampleFormat) -> Block:
+    """Convert little-endian PCM bytes to float samples with numpy."""
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return np.frombuffer(data, dtype='<f4').astype(np.float64)
+    if fmt.width == 3:
+        # shift each sample into the top of an int32 to keep its sign
+        padded = np.zeros((len(data) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        return (padded.view('<i4')[:, 0] >> 8) / fmt.scale
+    return np.frombuffer(data, dtype=f'<i{fmt.width}') / fmt.scale
+
+
+def _unpack_python(data: bytes, fmt: SampleFormat) -> Block:
+    """Convert little-endian PCM bytes to float samples with array."""
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        values: 'array[t.Any]' = array('f', data)
+    elif fmt.width == 3:
+        # shift each sample into the top of an int32 to keep its sign
+        padded = bytearray(len(data) // 3 * 4)
+        for i in range(3):
+            padded[i + 1::4] = data[i::3]
+        values = array('i', padded)
+    else:
+        values = array('h' if fmt.width == 2 else 'i', data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return array('d', values)
+    scale = fmt.scale * (256 if fmt.width == 3 else 1)
+    return array('d', [s / scale for s in values])
+
+
+def unpack(
+        data: bytes,
+        sample_format: str = 'int16',
+        engine: str = 'auto') -> Block:
+    """Convert PCM bytes back to float samples, the inverse of encode.
+
+    Args:
+        data: The little-endian PCM bytes, trailing partial samples
+            are ignored.
+        sample_format: One of 'int16', 'int24', 'int32' or 'float32'.
+        engine: 'numpy' returns a float64 array, 'python' an
+            ``array('d')``, 'auto' picks numpy when it is installed.
+
+    Returns:
+        The samples, integer formats are scaled to [-1.0, 1.0].
+
+    Raises:
+        ValueError: If the sample format is unknown.
+    """
+    fmt = get_format(sample_format)
+    data = data[:len(data) - len(data) % fmt.width]
+    if np is not None and engine != 'python':
+        return _unpack_numpy(data, fmt)
+    return _unpack_python(data, fmt)
@@ -0,0 +1,189 @@
+"""plan.py
+
+This file contains the TimingPlan, the sample-accurate layout of a
+sequence compiled ahead of synthesis. Every tone and pause of the
+sequence is one entry of (code id, start sample, number of samples),
+so the total length and all segment boundaries are known before a
+single sample is rendered. Backends can size their output up front and
+rendering can be sliced or split by sample range.
+"""
+
+import typing as t
+from array import array
+from bisect import bisect_right
+
+# code id of the pause entries, the pauses between codes, the p and P
+# meta pauses and the pad pauses
+PAUSE = -1
+
+
+class PlanEntry(t.NamedTuple):
+    """A tone or pause of a plan, in samples per channel."""
+
+    code_id: int
+    start_sample: int
+    n_samples: int
+
+    @property
+    def end_sample(self) -> int:
+        """The sample after the entry."""
+        return self.start_sample + self.n_samples
+
+
+class TimingPlan:
+    """TimingPlan class holding the entries of a compiled sequence.
+
+    The entries are stored in three typed arrays and exposed as
+    read-only memoryviews, the plan cannot be changed once compiled.
+    Sample counts are per channel, i.e. frames.
+    """
+
+    _code_ids: memoryview
+    _starts: memoryview
+    _lengths: memoryview
+    _names: t.Tuple[str, ...]
+    _total: int
+
+    def __init__(
+            self,
+            entries: t.Iterable[t.Tuple[int, int]],
+            names: t.Sequence[str] = ()) -> None:
+        """Compile a plan from consecutive entries.
+
+        Args:
+            entries: (code id, number of samples) of each tone and
+                pause in order, the start samples follow from them.
+            names: The code of each code id, used by :meth:`code`.
+
+        Raises:
+            ValueError: If an entry has a negative length.
+        """
+        code_ids = array('i')
+        starts = array('q')
+        lengths = array('q')
+        position = 0
+        for code_id, n_samples in entries:
+            if n_samples < 0:
+                raise ValueError(
+                    f'Entry length must be non-negative, got {n_samples}')
+            code_ids.append(code_id)
+            starts.append(position)
+            lengths.append(n_samples)
+            position += n_samples
+        self._code_ids = memoryview(code_ids).toreadonly()
+        self._starts = memoryview(starts).toreadonly()
+        self._lengths = memoryview(lengths).toreadonly()
+        self._names = tuple(names)
+        self._total = position
+
+    @property
+    def code_ids(self) -> memoryview:
+        """The code id of each entry, :data:`PAUSE` for pauses."""
+        return self._code_ids
+
+    @property
+    def starts(self) -> memoryview:
+        """The start sample of each entry."""
+        return self._starts
+
+    @property
+    def lengths(self) -> memoryview:
+        """The number of samples of each entry."""
+        return self._lengths
+
+    @property
+    def total_samples(self) -> int:
+        """The number of samples per channel of the whole sequence."""
+        return self._total
+
+    def code(self, code_id: int) -> t.Optional[str]:
+        """Get the code of a code id, None for pauses."""
+        if code_id == PAUSE:
+            return None
+        return self._names[code_id]
+
+    def find(self, sample: int) -> int:
+        """Get the position of the entry containing a sample.
+
+        Raises:
+            IndexError: If the sample is outside of the plan.
+        """
+        if not 0 <= sample < self._total:
+            raise IndexError(
+                f'Sample {sample} is outside of the plan of '
+                f'{self._total} samples')
+        # empty entries share their start with the next one
+        return bisect_right(self._starts, sample) - 1
+
+    def window(
+            self,
+            start_sample: int,
+            n_samples: int) -> t.Iterator[t.Tuple[int, int, int]]:
+        """Get the parts of the entries overlapping a sample range.
+
+        The range is clipped to the plan.
+
+        Returns:
+            An iterator of (entry position, offset into the entry,
+            number of samples) in order.
+        """
+        start = max(start_sample, 0)
+        stop = min(start_sample + n_samples, self._total)
+        if start >= stop:
+            return
+        for i in range(self.find(start), len(self._starts)):
+            entry_start = self._starts[i]
+            if entry_start >= stop:
+                break
+            offset = start - entry_start if entry_start < start else 0
+            count = min(self._lengths[i], stop - entry_start) - offset
+            if count > 0:
+                yield i, offset, count
+
+    def __len__(self) -> int:
+        """Get the number of entries."""
+        return len(self._starts)
+
+    @t.overload
+    def __getitem__(self, i: int) -> PlanEntry: ...
+
+    @t.overload
+    def __getitem__(self, i: slice) -> t.List[PlanEntry]: ...
+
+    def __getitem__(
+            self,
+            i: t.Union[int, slice]) -> t.Union[PlanEntry, t.List[PlanEntry]]:
+        """Get an entry or a list of entries."""
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return PlanEntry(self._code_ids[i], self._starts[i], self._lengths[i])
+
+    def __iter__(self) -> t.Iterator[PlanEntry]:
+        """Iterate over the entries."""
+        return map(PlanEntry, self._code_ids, self._starts, self._lengths)
+
+    def __reduce__(self) -> t.Tuple[t.Any, ...]:
+        """Pickle the plan by its arrays, e.g. for worker processes."""
+        return (_restore, (self._code_ids.obj, self._lengths.obj,
+                           self._names))
+
+    def __eq__(self, other: object) -> bool:
+        """Check if two plans have the same entries."""
+        if not isinstance(other, TimingPlan):
+            return NotImplemented
+        return (self._code_ids == other._code_ids and
+                self._starts == other._starts and
+                self._lengths == other._lengths)
+
+    def __repr__(self) -> str:
+        """Get the representation of the TimingPlan."""
+        return (f'{self.__class__.__name__}({len(self)} entries, '
+                f'{self._total} samples)')
+
+
+def _restore(
+        code_ids: 'array[int]',
+        lengths: 'array[int]',
+        names: t.Tuple[str, ...]) -> TimingPlan:
+    """Rebuild a pickled TimingPlan."""
+    return TimingPlan(zip(code_ids, lengths), names)
@@ -0,0 +1,299 @@
+"""render.py
+
+This file contains the parallel renderer for very long sequences, e.g.
+multi-hour test tone files. The timing plan of the sequence is cut into
+chunks of samples, a process pool renders and encodes the chunks into
+slots of a shared memory segment and the parent writes them to the
+output in order, or the workers write them straight into a memory
+mapped WAV file. Only the chunks in flight are held in memory, and the
+output is byte for byte the same as rendering the sequence serially.
+"""
+
+import typing as t
+import logging
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from .backends import BlueboxBackend, WavBackend
+from .pcm import encode, encode_into, get_format
+from .plan import PAUSE, TimingPlan
+from .tonebank import ToneBank
+
+if t.TYPE_CHECKING:
+    from .box import Sequencer
+
+# number of frames per chunk, about 6 seconds at 44.1 kHz
+CHUNK_FRAMES = 1 << 18
+
+# number of chunks in flight per worker
+SLOTS_PER_WORKER = 2
+
+
+class _Output(t.NamedTuple):
+    """Where the encoded chunks go."""
+
+    write: t.Callable[[memoryview], t.Any]
+    sample_format: str
+    dither: bool
+    close: t.Optional[t.Callable[[], t.Any]]
+
+
+def chunks(plan: TimingPlan, chunk_frames: int) -> t.List[t.Tuple[int, int]]:
+    """Cut a plan into chunks of about chunk_frames frames.
+
+    A boundary that would cut a tone is moved to the end of the tone,
+    so every tone is rendered whole from the tone bank.
+
+    Returns:
+        The (start sample, number of samples) of each chunk in order.
+
+    Raises:
+        ValueError: If chunk_frames is less than 1.
+    """
+    if chunk_frames < 1:
+        raise ValueError(
+            f'Chunk frames must be at least 1, got {chunk_frames}')
+    bounds = []
+    total = plan.total_samples
+    start = 0
+    while start < total:
+        stop = start + chunk_frames
+        if stop >= total:
+            stop = total
+        else:
+            i = plan.find(stop)
+            if plan.code_ids[i] != PAUSE and plan.starts[i] != stop:
+                stop = plan.starts[i] + plan.lengths[i]
+        bounds.append((start, stop - start))
+        start = stop
+    return bounds
+
+
+def _resolve_output(
+        output: t.Union[BlueboxBackend, t.BinaryIO],
+        sample_format: str) -> _Output:
+    """Get the writer, format and closer of an output.
+
+    Raises:
+        TypeError: If a backend cannot take encoded samples.
+    """
+    if isinstance(output, BlueboxBackend):
+        write_pcm = getattr(output, 'write_pcm', None)
+        if write_pcm is None:
+            raise TypeError(
+                f'{type(output).__name__} does not take PCM data, use a '
+                f'WavBackend, PcmBackend or a binary stream')
+        fmt = t.cast(str, getattr(output, 'sample_format'))
+        dither = t.cast(bool, getattr(output, 'dither'))
+        return _Output(write_pcm, fmt, dither, output.close)
+    get_format(sample_format)
+    return _Output(output.write, sample_format, False, None)
+
+
+# state of a worker process, set by _init_worker
+_sequencer: t.Optional['Sequencer'] = None
+_plan: t.Optional[TimingPlan] = None
+_memory: t.Optional[shared_memory.SharedMemory] = None
+_buffer: t.Any = None
+_format: t.Tuple[str, bool] = ('int16', False)
+
+
+def _init_worker(
+        settings: t.Dict[str, t.Any],
+        bank_size: int,
+        entries: t.List[t.Tuple[t.Hashable, t.Any]],
+        plan: TimingPlan,
+        memory: t.Optional[str],
+        path: t.Optional[str],
+        sample_format: str,
+        dither: bool) -> None:
+    """Set up the Sequencer, plan and output buffer of a worker.
+
+    The chunks are written to the shared memory segment named memory
+    or, if path is given, to a memory map of that file.
+    """
+    from .box import Sequencer
+
+    global _sequencer, _plan, _memory, _buffer, _format
+    bank = ToneBank(bank_size)
+    bank.preload(entries)
+    settings = dict(settings)
+    _sequencer = Sequencer(
+        mf=settings.pop('mf'), tone_bank=bank, **settings)
+    _plan = plan
+    if path is not None:
+        with open(path, 'r+b') as f:
+            _buffer = mmap.mmap(f.fileno(), 0)
+    else:
+        assert memory is not None
+        # the buffer is released with the segment object, keep both
+        _memory = shared_memory.SharedMemory(memory)
+        _buffer = _memory.buf
+    _format = (sample_format, dither)
+
+
+def _render_chunk(offset: int, start: int, n_samples: int) -> int:
+    """Render and encode a chunk into the output buffer at offset.
+
+    Returns:
+        The number of bytes written.
+    """
+    assert _sequencer is not None and _buffer is not None
+    return encode_into(
+        _sequencer.render_range(t.cast(TimingPlan, _plan), start, n_samples),
+        _buffer, offset, *_format)
+
+
+def render_parallel(
+        sequencer: 'Sequencer',
+        codes: t.Union[str, TimingPlan],
+        output: t.Optional[t.Union[BlueboxBackend, t.BinaryIO]] = None,
+        workers: t.Optional[int] = None,
+        chunk_frames: int = CHUNK_FRAMES,
+        sample_format: str = 'int16',
+        logger: t.Optional[logging.Logger] = None) -> int:
+    """Render a sequence in chunks on a process pool.
+
+    Each worker recreates the Sequencer from its settings with a copy of
+    its tone bank, renders its chunks with
+    :meth:`~bluebox.box.Sequencer.render_range` and encodes them into a
+    slot of a shared memory segment. The parent writes the slots to the
+    output in order as they complete, so at most two chunks per worker
+    are held. A WavBackend with memory_map=True is created at its final
+    size and the workers write their chunks straight into the mapped
+    file instead. Without dither the output is byte-identical to
+    serial rendering.
+
+    Args:
+        sequencer: The Sequencer whose settings are rendered.
+        codes: The sequence of codes or its timing plan.
+        output: A backend taking PCM data, i.e. a WavBackend or
+            PcmBackend, which is closed at the end unless a session
+            keeps it open, or a binary stream
+            for raw samples, which stays open. Defaults to the backend
+            of the Sequencer.
+        workers: Number of worker processes, None uses one per CPU.
+            0 or 1 renders in the current process.
+        chunk_frames: The number of frames per chunk. Must be at least 1.
+        sample_format: The sample format of a binary stream, backends
+            use their own.
+        logger: Optional logger for progress.
+
+    Returns:
+        The number of samples written.
+
+    Raises:
+        ValueError: If a parameter is invalid, or a code is invalid
+            and stop_on_error is set.
+        TypeError: If the backend does not take PCM data.
+    """
+    logger = logger or logging.getLogger(__name__)
+    if output is None:
+        output = sequencer.backend
+    out = _resolve_output(output, sample_format)
+    plan = codes if isinstance(codes, TimingPlan) else sequencer.plan(codes)
+    bounds = chunks(plan, chunk_frames)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(bounds))
+
+    if isinstance(output, BlueboxBackend):
+        output.reserve(plan.total_samples)
+    try:
+        if workers <= 1:
+            for start, n_samples in bounds:
+                out.write(memoryview(encode(
+                    sequencer.render_range(plan, start, n_samples),
+                    out.sample_format, out.dither)))
+        else:
+            _render_pool(sequencer, plan, bounds, output, out, workers)
+    finally:
+        # a session keeps the backend open, like play_blocks
+        if out.close is not None and \
+                not getattr(output, 'in_session', False):
+            out.close()
+    samples = plan.total_samples * sequencer._ch
+    logger.info(
+        f'Rendered {samples} samples in {len(bounds)} chunks with '
+        f'{max(workers, 1)} workers')
+    return samples
+
+
+def _render_pool(
+        sequencer: 'Sequencer',
+        plan: TimingPlan,
+        bounds: t.List[t.Tuple[int, int]],
+        output: t.Union[BlueboxBackend, t.BinaryIO],
+        out: _Output,
+        workers: int) -> None:
+    """Render the chunks on a process pool and write them in order."""
+    # render every tone of the plan once up front for all workers
+    for code_id in set(plan.code_ids):
+        if code_id != PAUSE:
+            sequencer._id_block(code_id, sequencer._ch)
+    bank = sequencer.tone_bank
+    frame_size = sequencer._ch * get_format(out.sample_format).width
+
+    def pool(memory: t.Optional[str],
+             path: t.Optional[str]) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(sequencer._settings(),
+                      max(bank.maxsize, len(bank)), bank.entries(),
+                      plan, memory, path, out.sample_format, out.dither))
+
+    if isinstance(output, WavBackend) and output.memory_map:
+        # the workers write straight into the mapped file
+        base = output.allocate(plan.total_samples)
+        with pool(None, str(output.output_path)) as executor:
+            futures = [
+                executor.submit(
+                    _render_chunk, base + start * frame_size, start, n)
+                for start, n in bounds]
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        return
+
+    slot_size = max(n for _, n in bounds) * frame_size
+    slots = workers * SLOTS_PER_WORKER
+    memory = shared_memory.SharedMemory(create=True, size=slot_size * slots)
+    try:
+        with pool(memory.name, None) as executor:
+            free = list(range(slots))
+            remaining = iter(bounds)
+            pending: t.Deque[t.Tuple[int, 'Future[int]']] = deque()
+
+            def submit() -> None:
+                while free:
+                    chunk = next(remaining, None)
+                    if chunk is None:
+                        return
+                    slot = free.pop()
+                    pending.append((slot, executor.submit(
+                        _render_chunk, slot * slot_size, *chunk)))
+
+            buf = memory.buf
+            assert buf is not None
+            submit()
+            try:
+                while pending:
+                    slot, future = pending.popleft()
+                    size = future.result()
+                    offset = slot * slot_size
+                    with buf[offset:offset + size] as view:
+                        out.write(view)
+                    free.append(slot)
+                    submit()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+    finally:
+        memory.close()
+        memory.unlink()
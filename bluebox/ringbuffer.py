@@ -0,0 +1,179 @@
+"""ringbuffer.py
+
+This file contains a single-producer / single-consumer ring buffer
+for handing audio bytes from a synthesis thread to an audio callback.
+The data path takes no locks: the producer only advances the write
+position and the consumer only advances the read position. Events
+are only used to wake up a producer waiting for free space.
+"""
+
+import typing as t
+import threading
+
+
+class RingBuffer:
+    """RingBuffer class for streaming bytes between two threads."""
+
+    _buf: bytearray
+    _capacity: int
+    _read_pos: int
+    _write_pos: int
+    _eof: bool
+    _cancelled: bool
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize the ring buffer.
+
+        Args:
+            capacity: The size of the buffer in bytes. Must be positive.
+
+        Raises:
+            ValueError: If capacity is not positive.
+        """
+        if capacity <= 0:
+            raise ValueError(f'Capacity must be positive, got {capacity}')
+        self._buf = bytearray(capacity)
+        self._capacity = capacity
+        self._writable = threading.Event()
+        self._readable = threading.Event()
+        self.reset()
+
+    def reset(self) -> None:
+        """Empty the buffer and reopen it for writing.
+
+        Must not be called while a producer or consumer is active.
+        """
+        self._read_pos = 0
+        self._write_pos = 0
+        self._eof = False
+        self._cancelled = False
+        self._writable.set()
+        self._readable.clear()
+
+    @property
+    def capacity(self) -> int:
+        """The size of the buffer in bytes."""
+        return self._capacity
+
+    @property
+    def available(self) -> int:
+        """The number of bytes that can be read."""
+        return self._write_pos - self._read_pos
+
+    @property
+    def free(self) -> int:
+        """The number of bytes that can be written."""
+        return self._capacity - self.available
+
+    @property
+    def closed(self) -> bool:
+        """Whether the producer has finished or the buffer was cancelled."""
+        return self._eof or self._cancelled
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the buffer was cancelled."""
+        return self._cancelled
+
+    @property
+    def eof(self) -> bool:
+        """Whether no more data will be read from the buffer."""
+        return self._cancelled or (self._eof and self.available == 0)
+
+    def write(self, data: t.Union[bytes, bytearray, memoryview]) -> int:
+        """Write as much of data as fits without blocking.
+
+        Returns:
+            The number of bytes written.
+        """
+        if self.closed:
+            return 0
+        src = memoryview(data).cast('B')
+        n = min(len(src), self.free)
+        if n == 0:
+            return 0
+        start = self._write_pos % self._capacity
+        first = min(n, self._capacity - start)
+        self._buf[start:start + first] = src[:first]
+        if first < n:
+            self._buf[:n - first] = src[first:n]
+        # publish only after the bytes are in place
+        self._write_pos += n
+        self._readable.set()
+        return n
+
+    def write_all(
+            self,
+            data: t.Union[bytes, bytearray, memoryview],
+            timeout: t.Optional[float] = None) -> bool:
+        """Write all of data, waiting for free space as needed.
+
+        Args:
+            data: The bytes to write.
+            timeout: Maximum time to wait for free space each time the
+                buffer is full, None waits forever.
+
+        Returns:
+            True if everything was written, False if the buffer was
+            closed or the timeout expired.
+        """
+        src = memoryview(data).cast('B')
+        while len(src):
+            n = self.write(src)
+            src = src[n:]
+            if not len(src):
+                break
+            if self.closed:
+                return False
+            self._writable.clear()
+            if self.free > 0:
+                continue
+            if not self._writable.wait(timeout):
+                return False
+        return True
+
+    def read(self, n: int) -> bytes:
+        """Read up to n bytes without blocking."""
+        if self._cancelled:
+            return b''
+        n = min(n, self.available)
+        if n <= 0:
+            return b''
+        start = self._read_pos % self._capacity
+        first = min(n, self._capacity - start)
+        data = bytes(self._buf[start:start + first])
+        if first < n:
+            data += bytes(self._buf[:n - first])
+        self._read_pos += n
+        self._writable.set()
+        return data
+
+    def wait_readable(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait until there is data to read or the buffer is closed."""
+        while not self.available and not self.closed:
+            self._readable.clear()
+            if self.available or self.closed:
+                break
+            if not self._readable.wait(timeout):
+                return False
+        return True
+
+    def close(self) -> None:
+        """Mark the end of the data, pending bytes can still be read."""
+        self._eof = True
+        self._readable.set()
+
+    def cancel(self) -> None:
+        """Drop pending data and wake up a waiting producer."""
+        self._cancelled = True
+        self._writable.set()
+        self._readable.set()
+
+    def __len__(self) -> int:
+        """Get the number of bytes that can be read."""
+        return self.available
+
+    def __repr__(self) -> str:
+        """Get the representation of the RingBuffer."""
+        return (f'{self.__class__.__name__}'
+                f'({self.available}/{self._capacity})')
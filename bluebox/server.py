@@ -0,0 +1,431 @@
+"""server.py
+
+This file contains the bluebox server, a long-running process that
+keeps a warm Sequencer, its tone bank and an open backend, and takes
+requests over a Unix domain socket or local TCP with a line protocol.
+
+Each request is one line and gets one response line:
+
+    PLAY <codes>            play a sequence on the backend
+    RENDER <path> <codes>   render a sequence to a WAV file in the
+                            output directory
+    STATS                   report the request and latency counters
+    PING                    check that the server is alive
+    QUIT                    close the connection
+
+Sequences are queued and played one after another, the response is
+sent once a request is done, e.g.
+
+    OK id=1 samples=8820 wait_ms=0.02 first_ms=0.41 total_ms=201.33
+    ERR id=2 Invalid code 'X' at position 3 in sequence '12X'
+
+RENDER is only available when the server has an output directory, the
+path is relative to it and cannot leave it.
+"""
+
+import typing as t
+import asyncio
+import logging
+import os
+import socket
+import stat
+import statistics
+import time
+from collections import deque
+from pathlib import Path
+from .aio import AsyncSequencer
+from .backends import BlueboxBackend, WavBackend
+from .blocks import Block
+
+DEFAULT_ADDRESS = 'tcp://127.0.0.1:7474'
+
+# number of recent requests the latency percentiles are computed from
+LATENCY_WINDOW = 1000
+
+
+def parse_address(
+        address: str) -> t.Tuple[int, t.Union[str, t.Tuple[str, int]]]:
+    """Parse a tcp://host:port or unix:///path address.
+
+    Returns:
+        The socket family and the host and port or the path.
+
+    Raises:
+        ValueError: If the address is malformed.
+    """
+    if address.startswith('unix://'):
+        path = address[len('unix://'):]
+        if not path:
+            raise ValueError(f'Invalid address: {address}')
+        return socket.AF_UNIX, path
+    host, _, port = address[len('tcp://'):].rpartition(':')
+    if not address.startswith('tcp://') or not host or not port.isdigit():
+        raise ValueError(
+            f'Invalid address: {address}, must be tcp://host:port or '
+            f'unix:///path')
+    return socket.AF_INET, (host.strip('[]'), int(port))
+
+
+def _unlink_socket(path: str) -> None:
+    """Remove a Unix domain socket, if there is one at the path.
+
+    Raises:
+        OSError: If the path exists and is not a socket.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f'Not a socket, refusing to remove: {path}')
+    os.unlink(path)
+
+
+class Metrics(t.NamedTuple):
+    """The latencies of a finished request in milliseconds.
+
+    wait is the time spent in the queue, first the time from receiving
+    the request until the first block was written and total the time
+    until the request was done.
+    """
+
+    request: int
+    samples: int
+    wait_ms: float
+    first_ms: float
+    total_ms: float
+
+    def __str__(self) -> str:
+        """Format the metrics for a response line."""
+        return (f'id={self.request} samples={self.samples} '
+                f'wait_ms={self.wait_ms:.2f} first_ms={self.first_ms:.2f} '
+                f'total_ms={self.total_ms:.2f}')
+
+
+class _Request(t.NamedTuple):
+    """A queued request."""
+
+    request: int
+    codes: str
+    path: t.Optional[str]
+    received: float
+    future: 'asyncio.Future[Metrics]'
+
+
+class Server:
+    """Server class for playing sequences on request."""
+
+    _sequencer: AsyncSequencer
+    _address: str
+    _queue_size: int
+    _output_dir: t.Optional[Path]
+    _logger: logging.Logger
+    _queue: 'asyncio.Queue[_Request]'
+    _server: t.Optional[asyncio.Server] = None
+    _worker: t.Optional['asyncio.Task[None]'] = None
+    _next_id: int = 0
+    _served: int = 0
+    _failed: int = 0
+    _latencies: t.Deque[float]
+
+    def __init__(
+            self,
+            sequencer: AsyncSequencer,
+            address: str = DEFAULT_ADDRESS,
+            queue_size: int = 64,
+            output_dir: t.Optional[t.Union[str, Path]] = None,
+            logger: t.Optional[logging.Logger] = None) -> None:
+        """Initialize the server.
+
+        Args:
+            sequencer: The Sequencer playing the requests, its backend
+                is kept open while the server runs.
+            address: Where to listen, tcp://host:port or unix:///path.
+                Port 0 picks a free port, see :attr:`address`.
+            queue_size: The number of requests that can wait, further
+                requests are rejected until the queue has room. Must
+                be at least 1.
+            output_dir: The directory RENDER requests write to, their
+                paths are relative to it. Without a directory RENDER
+                requests are rejected.
+            logger: Optional logger instance.
+
+        Raises:
+            ValueError: If the address or queue size is invalid.
+        """
+        parse_address(address)
+        if queue_size < 1:
+            raise ValueError(
+                f'Queue size must be at least 1, got {queue_size}')
+        self._sequencer = sequencer
+        self._address = address
+        self._queue_size = queue_size
+        self._output_dir = None if output_dir is None \
+            else Path(output_dir).resolve()
+        self._logger = logger or logging.getLogger(__name__)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def address(self) -> str:
+        """The address the server listens on, with the bound port."""
+        family, target = parse_address(self._address)
+        if family == socket.AF_INET and self._server is not None:
+            host, port = self._server.sockets[0].getsockname()[:2]
+            return f'tcp://{host}:{port}'
+        return self._address
+
+    async def start(self) -> None:
+        """Start listening and processing the queue."""
+        self._queue = asyncio.Queue(self._queue_size)
+        family, target = parse_address(self._address)
+        if family == socket.AF_UNIX:
+            assert isinstance(target, str)
+            # a stale socket of a previous server
+            _unlink_socket(target)
+            self._server = await asyncio.start_unix_server(
+                self._handle, target)
+        else:
+            assert not isinstance(target, str)
+            host, port = target
+            self._server = await asyncio.start_server(
+                self._handle, host, port)
+        self._worker = asyncio.create_task(self._work())
+        self._logger.info(f'Listening on {self.address}')
+
+    async def close(self) -> None:
+        """Stop listening and cancel the queued requests."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        family, target = parse_address(self._address)
+        if family == socket.AF_UNIX and isinstance(target, str):
+            _unlink_socket(target)
+
+    async def serve_forever(self) -> None:
+        """Run the server until it is cancelled."""
+        await self.start()
+        try:
+            with self._sequencer.session():
+                assert self._server is not None
+                await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        """Get the request counters and the latency percentiles."""
+        latencies = sorted(self._latencies)
+        stats: t.Dict[str, t.Any] = dict(
+            served=self._served,
+            failed=self._failed,
+            queued=self._queue.qsize() if self._server else 0,
+        )
+        if latencies:
+            stats.update(
+                mean_ms=statistics.fmean(latencies),
+                p50_ms=latencies[len(latencies) // 2],
+                p95_ms=latencies[int(len(latencies) * 0.95)],
+                max_ms=latencies[-1])
+        return stats
+
+    def output_path(self, path: str) -> Path:
+        """Resolve the path of a RENDER request in the output directory.
+
+        Args:
+            path: A path relative to the output directory.
+
+        Returns:
+            The absolute path of the output file.
+
+        Raises:
+            ValueError: If there is no output directory, or the path is
+                absolute or outside of the output directory.
+        """
+        if self._output_dir is None:
+            raise ValueError('RENDER is disabled, no output directory')
+        relative = Path(path)
+        if relative.is_absolute() or '..' in relative.parts:
+            raise ValueError(
+                f'Invalid path: {path}, must be relative to the output '
+                f'directory')
+        resolved = (self._output_dir / relative).resolve()
+        if not resolved.is_relative_to(self._output_dir) or \
+                resolved == self._output_dir:
+            raise ValueError(
+                f'Invalid path: {path}, must be relative to the output '
+                f'directory')
+        return resolved
+
+    async def _run(self, request: _Request) -> Metrics:
+        """Play or render a request."""
+        started = time.perf_counter()
+        first: t.Optional[float] = None
+        samples = 0
+
+        async def blocks() -> t.AsyncIterator[Block]:
+            nonlocal first, samples
+            async for block in self._sequencer.ablocks(request.codes):
+                if first is None:
+                    first = time.perf_counter()
+                samples += len(block)
+                yield block
+
+        backend: BlueboxBackend
+        if request.path is None:
+            backend = self._sequencer.backend
+            await backend.aplay_blocks(blocks(), close=False)
+        else:
+            seq = self._sequencer
+            backend = WavBackend(
+                sample_rate=seq._sr, channels=seq._ch,
+                output_path=request.path, streaming=True,
+                logger=self._logger)
+            await backend.aplay_blocks(blocks())
+        done = time.perf_counter()
+        return Metrics(
+            request.request,
+            samples,
+            (started - request.received) * 1000,
+            ((first or done) - request.received) * 1000,
+            (done - request.received) * 1000)
+
+    async def _work(self) -> None:
+        """Play the queued requests one after another."""
+        while True:
+            request = await self._queue.get()
+            try:
+                metrics = await self._run(request)
+            except Exception as e:
+                self._failed += 1
+                if not request.future.done():
+                    request.future.set_exception(e)
+            else:
+                self._served += 1
+                self._latencies.append(metrics.total_ms)
+                self._logger.debug(f'Request {metrics}')
+                if not request.future.done():
+                    request.future.set_result(metrics)
+            finally:
+                self._queue.task_done()
+
+    async def submit(
+            self,
+            codes: str,
+            path: t.Optional[str] = None) -> Metrics:
+        """Queue a sequence and wait until it was played or rendered.
+
+        Args:
+            codes: The sequence of codes.
+            path: Render to this WAV file instead of playing, relative
+                to the output directory.
+
+        Returns:
+            The latencies of the request.
+
+        Raises:
+            asyncio.QueueFull: If the queue is full.
+            ValueError: If the path is not allowed, see
+                :meth:`output_path`.
+        """
+        if path is not None:
+            path = str(self.output_path(path))
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Request(
+            self._next_id, codes, path, time.perf_counter(), future))
+        return await future
+
+    async def _respond(self, line: str) -> t.Optional[str]:
+        """Handle a request line.
+
+        Returns:
+            The response line, or None to close the connection.
+        """
+        command, _, argument = line.strip().partition(' ')
+        command = command.upper()
+        argument = argument.strip()
+        if command == 'QUIT':
+            return None
+        if command == 'PING':
+            return 'OK pong'
+        if command == 'STATS':
+            return 'OK ' + ' '.join(
+                f'{key}={value:.2f}' if isinstance(value, float)
+                else f'{key}={value}'
+                for key, value in self.stats().items())
+        path = None
+        if command == 'RENDER':
+            path, _, argument = argument.partition(' ')
+            argument = argument.strip()
+        elif command != 'PLAY':
+            return f'ERR Unknown command: {command}'
+        if not argument:
+            return f'ERR {command} needs a sequence'
+        if path is not None:
+            try:
+                self.output_path(path)
+            except ValueError as e:
+                return f'ERR {e}'
+        # submit numbers the request before it first waits
+        request = self._next_id + 1
+        try:
+            metrics = await self.submit(argument, path)
+        except asyncio.QueueFull:
+            return 'ERR Queue full'
+        except Exception as e:
+            return f'ERR id={request} {e}'
+        return f'OK {metrics}'
+
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of a connection."""
+        try:
+            while True:
+                try:
+                    data = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b'ERR Line too long\n')
+                    break
+                if not data:
+                    break
+                line = data.decode('utf-8', 'replace')
+                if not line.strip():
+                    continue
+                response = await self._respond(line)
+                if response is None:
+                    break
+                writer.write(response.encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def __repr__(self) -> str:
+        """Get the representation of the Server."""
+        return f'{self.__class__.__name__}({self._address})'
+
+
+def serve(
+        sequencer: AsyncSequencer,
+        address: str = DEFAULT_ADDRESS,
+        queue_size: int = 64,
+        output_dir: t.Optional[t.Union[str, Path]] = None) -> None:
+    """Run a server until it is interrupted.
+
+    See :class:`Server`.
+    """
+    server = Server(sequencer, address, queue_size, output_dir)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
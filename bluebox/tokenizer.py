@@ -0,0 +1,187 @@
+"""tokenizer.py
+
+This file contains the tokenizer that splits a sequence into MF codes.
+Codes can be longer than one character (e.g. KP, ST2), so the valid
+codes of a scheme are compiled into a trie shaped regular expression
+that takes the longest matching code at each position and parses the
+whole sequence in a single pass. Numeric codes longer than one digit
+(e.g. MF 10, 11 and 12) only match a whole run of digits, so digit
+strings are still dialed one digit at a time. Schemes with only single
+character codes (e.g. DTMF) are translated with str.translate instead.
+"""
+
+import typing as t
+import re
+import sys
+from array import array
+from itertools import accumulate, repeat
+
+# type code of the token arrays, up to 65536 codes per scheme
+TOKEN_TYPECODE = 'H'
+
+_INVALID = -1
+
+
+def _trie_pattern(codes: t.Iterable[str]) -> str:
+    """Compile codes into a regular expression shaped like their trie.
+
+    Codes sharing a prefix share a branch, e.g. KP, KP2 and ST, ST2,
+    ST3 become ``KP2?|ST[23]?``, and the greedy optional suffixes make
+    the longest code win.
+    """
+    trie: t.Dict[str, t.Any] = {}
+    for code in codes:
+        node = trie
+        for char in code:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: t.Dict[str, t.Any]) -> str:
+        alternatives = []
+        leaves = []
+        for char, child in sorted(node.items()):
+            if not char:
+                continue
+            rest = build(child)
+            if rest:
+                alternatives.append(re.escape(char) + rest)
+            else:
+                leaves.append(re.escape(char))
+        if len(leaves) == 1:
+            alternatives.append(leaves[0])
+        elif leaves:
+            alternatives.append('[' + ''.join(leaves) + ']')
+        if not alternatives:
+            return ''
+        pattern = '|'.join(alternatives)
+        if '' in node:
+            return f'(?:{pattern})?'
+        if len(alternatives) > 1:
+            return f'(?:{pattern})'
+        return pattern
+
+    return build(trie)
+
+
+def _is_number(code: str) -> bool:
+    """Whether a code is a number of more than one digit."""
+    return len(code) > 1 and all('0' <= c <= '9' for c in code)
+
+
+class Tokenizer:
+    """Tokenizer class for splitting sequences into codes.
+
+    Whitespace separates codes and is otherwise ignored. Numeric codes
+    of more than one digit are only taken when they are a whole run of
+    digits, e.g. the MF sequences ``'11'`` and ``'KP11ST'`` contain the
+    code 11, while ``'1 1'`` and ``'1110'`` are digits only. Any other
+    character that does not start a valid code is invalid.
+    """
+
+    _codes: t.Tuple[str, ...]
+    _ids: t.Dict[str, int]
+    _pattern: 're.Pattern[str]'
+    _strip: t.Optional[t.Dict[int, t.Any]] = None
+    _table: t.Optional[t.Dict[int, t.Any]] = None
+
+    def __init__(self, codes: t.Iterable[str]) -> None:
+        """Compile the tokenizer for a set of codes.
+
+        Args:
+            codes: The valid codes, token ids are assigned in sorted
+                order of the codes.
+
+        Raises:
+            ValueError: If a code is empty or contains whitespace.
+        """
+        self._codes = tuple(sorted(set(codes)))
+        for code in self._codes:
+            if not code or any(c.isspace() for c in code):
+                raise ValueError(f'Invalid code: {code!r}')
+        self._ids = {code: i for i, code in enumerate(self._codes)}
+        alternatives = [r'\s+', '.']
+        codes = [c for c in self._codes if not _is_number(c)]
+        if codes:
+            alternatives.insert(0, _trie_pattern(codes))
+        numbers = [c for c in self._codes if _is_number(c)]
+        if numbers:
+            # not inside a longer run of digits
+            alternatives.insert(
+                0, f'(?<![0-9])(?:{_trie_pattern(numbers)})(?![0-9])')
+        self._pattern = re.compile('|'.join(alternatives), re.DOTALL)
+        # ids are encoded as UTF-16 code units, below the surrogates
+        if len(self._codes) < 0xd800 and all(
+                len(code) == 1 for code in self._codes):
+            self._strip = str.maketrans('', '', ''.join(self._codes))
+            self._table = str.maketrans(
+                {code: chr(i) for i, code in enumerate(self._codes)})
+
+    @property
+    def codes(self) -> t.Tuple[str, ...]:
+        """The valid codes, indexed by token id."""
+        return self._codes
+
+    def id(self, code: str) -> int:
+        """Get the token id of a code.
+
+        Raises:
+            KeyError: If the code is not valid.
+        """
+        return self._ids[code]
+
+    def tokenize(
+            self,
+            sequence: str,
+            on_invalid: t.Optional[t.Callable[[str, int], None]] = None
+            ) -> 'array[int]':
+        """Split a sequence into the token ids of its codes.
+
+        Args:
+            sequence: The sequence to tokenize.
+            on_invalid: Called with each invalid character and its
+                position, it may raise to stop the tokenizer. Invalid
+                characters are skipped.
+
+        Returns:
+            A compact array of token ids, see :attr:`codes`.
+        """
+        if self._table is not None and self._strip is not None:
+            # single character codes, translate them to ids at once
+            rest = sequence.translate(self._strip)
+            if not rest or rest.isspace():
+                if rest:
+                    sequence = ''.join(sequence.split())
+                tokens = array(
+                    TOKEN_TYPECODE,
+                    sequence.translate(self._table).encode('utf-16-le'))
+                if sys.byteorder == 'big':
+                    tokens.byteswap()
+                return tokens
+
+        parts = self._pattern.findall(sequence)
+        ids = list(map(self._ids.get, parts, repeat(_INVALID)))
+        if _INVALID not in ids:
+            return array(TOKEN_TYPECODE, ids)
+
+        # whitespace or invalid characters, drop them one by one
+        tokens = array(TOKEN_TYPECODE)
+        positions = accumulate(map(len, parts), initial=0)
+        for part, token, position in zip(parts, ids, positions):
+            if token != _INVALID:
+                tokens.append(token)
+            elif on_invalid is not None and not part.isspace():
+                on_invalid(part, position)
+        return tokens
+
+    def split(self, sequence: str) -> t.List[str]:
+        """Split a sequence into its valid codes."""
+        codes = self._codes
+        return [codes[token] for token in self.tokenize(sequence)]
+
+    def __len__(self) -> int:
+        """Get the number of codes."""
+        return len(self._codes)
+
+    def __repr__(self) -> str:
+        """Get the representation of the Tokenizer."""
+        return f'{self.__class__.__name__}({self._codes})'
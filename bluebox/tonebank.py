@@ -0,0 +1,119 @@
+"""tonebank.py
+
+This file contains the ToneBank class, a bounded LRU cache of
+rendered tone and pause buffers. A given code always produces the
+same samples for the same parameters, so each buffer only needs to
+be synthesized once.
+"""
+
+import typing as t
+from collections import OrderedDict
+from .blocks import Block
+
+
+class CacheInfo(t.NamedTuple):
+    """Statistics of a ToneBank."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ToneBank:
+    """ToneBank class for caching rendered waveform buffers."""
+
+    _maxsize: int
+    _hits: int
+    _misses: int
+    _buffers: 'OrderedDict[t.Hashable, Block]'
+
+    def __init__(self, maxsize: int = 128) -> None:
+        """Initialize the tone bank.
+
+        Args:
+            maxsize: The maximum number of buffers to keep. The least
+                recently used buffer is evicted once it is exceeded.
+                0 disables caching. Must be non-negative.
+
+        Raises:
+            ValueError: If maxsize is negative.
+        """
+        if maxsize < 0:
+            raise ValueError(
+                f'Max size must be non-negative, got {maxsize}')
+        self._maxsize = maxsize
+        self._hits = 0
+        self._misses = 0
+        self._buffers = OrderedDict()
+
+    def get(
+            self,
+            key: t.Hashable,
+            render: t.Callable[[], Block]) -> Block:
+        """Get a buffer from the bank, rendering it on a miss.
+
+        Args:
+            key: The key identifying the buffer.
+            render: Called without arguments to render a missing buffer.
+
+        Returns:
+            The cached or newly rendered buffer.
+        """
+        try:
+            block = self._buffers[key]
+        except KeyError:
+            self._misses += 1
+            block = render()
+            if self._maxsize > 0:
+                self._buffers[key] = block
+                if len(self._buffers) > self._maxsize:
+                    self._buffers.popitem(last=False)
+            return block
+        self._hits += 1
+        self._buffers.move_to_end(key)
+        return block
+
+    def entries(self) -> t.List[t.Tuple[t.Hashable, Block]]:
+        """Get the cached buffers, least recently used first."""
+        return list(self._buffers.items())
+
+    def preload(
+            self,
+            entries: t.Iterable[t.Tuple[t.Hashable, Block]]) -> None:
+        """Add rendered buffers, e.g. the entries of another bank."""
+        if self._maxsize == 0:
+            return
+        for key, block in entries:
+            self._buffers[key] = block
+            self._buffers.move_to_end(key)
+        while len(self._buffers) > self._maxsize:
+            self._buffers.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        """Get the cache statistics."""
+        return CacheInfo(
+            self._hits, self._misses, self._maxsize, len(self._buffers))
+
+    def clear(self) -> None:
+        """Remove all buffers and reset the statistics."""
+        self._buffers.clear()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        """The maximum number of buffers kept."""
+        return self._maxsize
+
+    def __len__(self) -> int:
+        """Get the number of cached buffers."""
+        return len(self._buffers)
+
+    def __contains__(self, key: t.Hashable) -> bool:
+        """Check if a buffer is cached."""
+        return key in self._buffers
+
+    def __repr__(self) -> str:
+        """Get the representation of the ToneBank."""
+        return f'{self.__class__.__name__}({self.info()})'
@@ -7,7 +7,395 @@ handled in the backend specific files.
 """
 
 import typing as t
+import cmath
+import functools
 import math
+from array import array
+from .blocks import Block
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+ENGINES = ('python', 'numpy')
+OSCILLATORS = ('exact', 'recursive', 'table')
+
+# samples between two renormalizations of the recursive oscillator
+RENORMALIZE_INTERVAL = 1024
+
+# number of points in one cycle of the sine table
+TABLE_SIZE = 4096
+
+
+def numpy_available() -> bool:
+    """Check whether the numpy engine can be used."""
+    return np is not None
+
+
+def resolve_engine(engine: str) -> str:
+    """Resolve a requested synthesis engine to one that is available.
+
+    Args:
+        engine: One of 'python', 'numpy' or 'auto'. 'auto' picks numpy
+            when it is installed.
+
+    Returns:
+        The engine that will actually be used. 'numpy' falls back to
+        'python' when numpy is not installed.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    if engine == 'auto':
+        return 'numpy' if numpy_available() else 'python'
+    if engine not in ENGINES:
+        raise ValueError(
+            f'Invalid engine: {engine}, must be one of '
+            f'{", ".join(ENGINES + ("auto",))}')
+    if engine == 'numpy' and not numpy_available():
+        return 'python'
+    return engine
+
+
+def check_oscillator(oscillator: str) -> str:
+    """Check that an oscillator mode is known.
+
+    Raises:
+        ValueError: If the oscillator is unknown.
+    """
+    if oscillator not in OSCILLATORS:
+        raise ValueError(
+            f'Invalid oscillator: {oscillator}, must be one of '
+            f'{", ".join(OSCILLATORS)}')
+    return oscillator
+
+
+def table_snr(size: int) -> float:
+    """Get the SNR in dB of a linearly interpolated sine table.
+
+    The interpolation error falls by 12 dB every time the table size
+    doubles, 4096 points give about 133 dB.
+    """
+    return 40 * math.log10(size) - 11.3
+
+
+# signal-to-noise ratio of each oscillator in dB per engine, measured
+# against float64 sines of 697 to 2600 Hz over 60 s at 44.1 kHz and
+# rounded down, the numpy engine renders float32 samples
+OSCILLATOR_SNR: t.Dict[str, t.Dict[str, float]] = {
+    'python': {
+        'recursive': 200.0,
+        'exact': math.inf,
+        'table': table_snr(TABLE_SIZE),
+    },
+    'numpy': {
+        'recursive': 150.0,
+        'exact': 150.0,
+        'table': table_snr(TABLE_SIZE),
+    },
+}
+
+# the oscillators selected by SNR, from the cheapest to the most
+# expensive per sample as measured with both engines. The table is the
+# most expensive with both and never more accurate than the recursive
+# oscillator, so it is not selected and only used when asked for
+SELECTABLE_OSCILLATORS = ('recursive', 'exact')
+
+
+def select_oscillator(snr: float, engine: str = 'python') -> str:
+    """Select the cheapest oscillator that meets an SNR requirement.
+
+    The 'table' oscillator is never selected, see
+    ``SELECTABLE_OSCILLATORS``.
+
+    Args:
+        snr: The required signal-to-noise ratio in dB.
+        engine: The synthesis engine the oscillator runs on, 'auto'
+            picks numpy when it is installed.
+
+    Returns:
+        The name of the oscillator, 'exact' when none meets the SNR.
+    """
+    declared = OSCILLATOR_SNR[resolve_engine(engine)]
+    for oscillator in SELECTABLE_OSCILLATORS:
+        if declared[oscillator] >= snr:
+            return oscillator
+    return 'exact'
+
+
+@functools.lru_cache(maxsize=None)
+def sine_table(size: int = TABLE_SIZE, engine: str = 'python') -> Block:
+    """Get one cycle of a unit sine, computed once per size and engine.
+
+    The table holds size + 1 points, the last one repeats the first so
+    interpolation never has to wrap around.
+
+    Args:
+        size: The number of points per cycle.
+        engine: 'numpy' returns a read-only float64 array, otherwise an
+            ``array('d')`` is returned.
+
+    Returns:
+        The sine table, shared between callers and not to be modified.
+    """
+    if engine == 'numpy':
+        values = np.sin(2 * np.pi * np.arange(size + 1) / size)
+        values[size] = values[0]
+        values.flags.writeable = False
+        return values
+    table = array('d', (math.sin(2 * math.pi * i / size)
+                        for i in range(size)))
+    table.append(table[0])
+    return table
+
+
+class RecursiveOscillator:
+    """RecursiveOscillator class for phase-continuous sine generation.
+
+    The oscillator keeps a rotating phasor ``amplitude * e^(i*phase)``
+    and advances it by one complex multiplication per sample instead of
+    evaluating ``math.sin``. The phasor is carried between calls, so
+    successive blocks join without discontinuities, and its magnitude
+    is renormalized every ``renormalize`` samples to bound the drift.
+    """
+
+    _sr: float
+    _freq: float
+    _amplitude: float
+    _engine: str
+    _renormalize: int
+    _z: complex
+    _rot: complex
+    _steps: t.Any = None
+    _position: int = 0
+
+    def __init__(
+                self,
+                freq: float,
+                sample_rate: float = 44100.0,
+                amplitude: float = 1.0,
+                phase: float = 0.0,
+                engine: str = 'python',
+                renormalize: int = RENORMALIZE_INTERVAL) -> None:
+        """Initialize the oscillator.
+
+        Args:
+            freq: The frequency in Hz.
+            sample_rate: The sample rate in Hz.
+            amplitude: The amplitude of the sine wave.
+            phase: The phase of the first sample.
+            engine: The synthesis engine, see :func:`resolve_engine`.
+            renormalize: The number of samples between two
+                renormalizations of the phasor. Must be at least 1.
+
+        Raises:
+            ValueError: If renormalize is less than 1.
+        """
+        if renormalize < 1:
+            raise ValueError(
+                f'Renormalize must be at least 1, got {renormalize}')
+        self._sr = sample_rate
+        self._freq = freq
+        self._amplitude = amplitude
+        self._engine = resolve_engine(engine)
+        self._renormalize = renormalize
+        self._z = cmath.rect(amplitude, phase)
+        self._rot = cmath.exp(2j * math.pi * freq / sample_rate)
+
+    @property
+    def phase(self) -> float:
+        """The phase of the next sample in radians, in (-pi, pi]."""
+        return cmath.phase(self._z)
+
+    @property
+    def position(self) -> int:
+        """The number of samples generated so far."""
+        return self._position
+
+    def _renormalized(self, z: complex) -> complex:
+        """Scale the phasor back to the amplitude of the oscillator."""
+        magnitude = abs(z)
+        if magnitude == 0.0:
+            return z
+        return z * (self._amplitude / magnitude)
+
+    def _block_python(self, n: int) -> Block:
+        """Generate n samples with the array module."""
+        out = array('d', [0.0]) * n
+        z = self._z
+        rot = self._rot
+        start = 0
+        while start < n:
+            stop = min(n, start + self._renormalize)
+            for i in range(start, stop):
+                out[i] = z.imag
+                z *= rot
+            z = self._renormalized(z)
+            start = stop
+        self._z = z
+        return out
+
+    def _block_numpy(self, n: int) -> Block:
+        """Generate n samples with numpy, one phasor update per chunk."""
+        if self._steps is None:
+            k = np.arange(self._renormalize, dtype=np.float64)
+            self._steps = np.exp(2j * np.pi * self._freq / self._sr * k)
+        out = np.empty(n, dtype=np.float32)
+        z = self._z
+        start = 0
+        while start < n:
+            m = min(n - start, self._renormalize)
+            out[start:start + m] = (z * self._steps[:m]).imag
+            z = self._renormalized(z * self._steps[m - 1] * self._rot)
+            start += m
+        self._z = z
+        return out
+
+    def block(self, n: int) -> Block:
+        """Generate the next n samples.
+
+        Args:
+            n: The number of samples.
+
+        Returns:
+            A float32 array with the numpy engine, otherwise an
+            ``array('d')``.
+        """
+        self._position += n
+        if self._engine == 'numpy':
+            return self._block_numpy(n)
+        return self._block_python(n)
+
+    def __iter__(self) -> t.Iterator[float]:
+        """Generate samples forever, one block at a time."""
+        while True:
+            yield from self.block(self._renormalize)
+
+    def __repr__(self) -> str:
+        """Get the representation of the RecursiveOscillator."""
+        return (f'{self.__class__.__name__}(Frequency: {self._freq}, '
+                f'Sample Rate: {self._sr}, Amplitude: {self._amplitude})')
+
+
+class WavetableOscillator:
+    """WavetableOscillator class for table lookup sine generation.
+
+    A phase accumulator steps through a shared single-cycle sine table
+    and the samples are linearly interpolated between neighbouring
+    points, so the cost per sample does not depend on ``math.sin``. The
+    phase is carried between calls like with the RecursiveOscillator.
+    """
+
+    _sr: float
+    _freq: float
+    _amplitude: float
+    _engine: str
+    _size: int
+    _table: Block
+    _pos: float
+    _inc: float
+    _position: int = 0
+
+    def __init__(
+                self,
+                freq: float,
+                sample_rate: float = 44100.0,
+                amplitude: float = 1.0,
+                phase: float = 0.0,
+                engine: str = 'python',
+                size: int = TABLE_SIZE) -> None:
+        """Initialize the oscillator.
+
+        Args:
+            freq: The frequency in Hz.
+            sample_rate: The sample rate in Hz.
+            amplitude: The amplitude of the sine wave.
+            phase: The phase of the first sample.
+            engine: The synthesis engine, see :func:`resolve_engine`.
+            size: The number of points in the sine table. Must be at
+                least 2, see :func:`table_snr` for the resulting SNR.
+
+        Raises:
+            ValueError: If size is less than 2.
+        """
+        if size < 2:
+            raise ValueError(f'Table size must be at least 2, got {size}')
+        self._sr = sample_rate
+        self._freq = freq
+        self._amplitude = amplitude
+        self._engine = resolve_engine(engine)
+        self._size = size
+        self._table = sine_table(size, self._engine)
+        self._pos = (phase / (2 * math.pi) * size) % size
+        self._inc = (freq / sample_rate * size) % size
+
+    @property
+    def phase(self) -> float:
+        """The phase of the next sample in radians, in [0, 2*pi)."""
+        return 2 * math.pi * self._pos / self._size
+
+    @property
+    def position(self) -> int:
+        """The number of samples generated so far."""
+        return self._position
+
+    def _block_python(self, n: int) -> Block:
+        """Generate n samples with the array module."""
+        out = array('d', [0.0]) * n
+        table = self._table
+        size = self._size
+        amplitude = self._amplitude
+        inc = self._inc
+        pos = self._pos
+        for k in range(n):
+            i = int(pos)
+            x = table[i]
+            out[k] = amplitude * (x + (pos - i) * (table[i + 1] - x))
+            pos += inc
+            if pos >= size:
+                pos -= size
+        self._pos = pos
+        return out
+
+    def _block_numpy(self, n: int) -> Block:
+        """Generate n samples with numpy."""
+        pos = np.arange(n, dtype=np.float64)
+        pos *= self._inc
+        pos += self._pos
+        np.fmod(pos, self._size, out=pos)
+        i = pos.astype(np.intp)
+        x = self._table[i]
+        out = x + (pos - i) * (self._table[i + 1] - x)
+        out *= self._amplitude
+        self._pos = (self._pos + n * self._inc) % self._size
+        return out.astype(np.float32)
+
+    def block(self, n: int) -> Block:
+        """Generate the next n samples.
+
+        Args:
+            n: The number of samples.
+
+        Returns:
+            A float32 array with the numpy engine, otherwise an
+            ``array('d')``.
+        """
+        self._position += n
+        if self._engine == 'numpy':
+            return self._block_numpy(n)
+        return self._block_python(n)
+
+    def __iter__(self) -> t.Iterator[float]:
+        """Generate samples forever, one block at a time."""
+        while True:
+            yield from self.block(self._size)
+
+    def __repr__(self) -> str:
+        """Get the representation of the WavetableOscillator."""
+        return (f'{self.__class__.__name__}(Frequency: {self._freq}, '
+                f'Sample Rate: {self._sr}, Amplitude: {self._amplitude}, '
+                f'Table Size: {self._size})')
 
 
 class SineWave:
@@ -15,16 +403,87 @@ class SineWave:
 
     _sr: float = 44100.0
     _ch: int = 1
+    _engine: str = 'python'
+    _oscillator: str = 'exact'
 
     def __init__(
                 self,
                 sample_rate: t.Optional[float] = None,
-                channels: t.Optional[int] = None) -> None:
-        """Initialize the Wave object."""
+                channels: t.Optional[int] = None,
+                engine: str = 'python',
+                oscillator: str = 'exact') -> None:
+        """Initialize the Wave object.
+
+        Args:
+            sample_rate: The sample rate in Hz.
+            channels: The number of channels.
+            engine: The synthesis engine, see :func:`resolve_engine`.
+            oscillator: How :meth:`sine_block` renders tones, 'exact'
+                evaluates sin for every sample, 'recursive' uses a
+                :class:`RecursiveOscillator` and 'table' a
+                :class:`WavetableOscillator`.
+
+        Raises:
+            ValueError: If the engine or oscillator is unknown.
+        """
         if sample_rate is not None:
             self._sr = sample_rate
         if channels is not None:
             self._ch = channels
+        self._engine = resolve_engine(engine)
+        self._oscillator = check_oscillator(oscillator)
+
+    @property
+    def engine(self) -> str:
+        """The synthesis engine in use."""
+        return self._engine
+
+    @property
+    def oscillator(self) -> str:
+        """The oscillator mode used by sine_block."""
+        return self._oscillator
+
+    def recursive(
+            self,
+            freq: float,
+            amplitude: float = 1.0,
+            phase: float = 0.0) -> RecursiveOscillator:
+        """Create a phase-continuous oscillator for long or chunked tones.
+
+        Args:
+            freq: The frequency of the sine wave.
+            amplitude: The amplitude of the sine wave.
+            phase: The phase of the first sample.
+
+        Returns:
+            A RecursiveOscillator using the sample rate and engine of
+            the wave.
+        """
+        return RecursiveOscillator(
+            freq, self._sr, amplitude, phase, self._engine)
+
+    def wavetable(
+            self,
+            freq: float,
+            amplitude: float = 1.0,
+            phase: float = 0.0) -> WavetableOscillator:
+        """Create a table lookup oscillator.
+
+        Args:
+            freq: The frequency of the sine wave.
+            amplitude: The amplitude of the sine wave.
+            phase: The phase of the first sample.
+
+        Returns:
+            A WavetableOscillator using the sample rate and engine of
+            the wave.
+        """
+        return WavetableOscillator(
+            freq, self._sr, amplitude, phase, self._engine)
+
+    def n_samples(self, length: float) -> int:
+        """Get the number of samples for a length in milliseconds."""
+        return math.ceil(length * self._sr / 1000)
 
     def sine(
             self,
@@ -56,6 +515,86 @@ class SineWave:
             yield amplitude * math.sin(
                     2 * math.pi * freq * (i / self._sr) + phase)
 
+    def sine_block(
+            self,
+            freq: float,
+            length: float,
+            amplitude: float = 1.0,
+            phase: float = 0.0) -> Block:
+        """Generate a whole sine wave as one contiguous block.
+
+        With the numpy engine the tone is rendered in a single vectorized
+        call and returned as a float32 array, otherwise the samples of
+        :meth:`sine` are collected into an ``array('d')``. With the
+        recursive and table oscillators the samples come from
+        :meth:`recursive` and :meth:`wavetable`.
+
+        Args:
+            freq: The frequency of the sine wave.
+            length: The length of the sine wave in milliseconds.
+            amplitude: The amplitude of the sine wave.
+            phase: The phase of the sine wave.
+
+        Returns:
+            A block containing the sine wave.
+        """
+        n = self.n_samples(length)
+        if self._oscillator != 'exact' and freq != 0.0 and amplitude != 0.0:
+            if self._oscillator == 'table':
+                return self.wavetable(freq, amplitude, phase).block(n)
+            return self.recursive(freq, amplitude, phase).block(n)
+        if self._engine == 'numpy':
+            if freq == 0.0 or amplitude == 0.0:
+                return np.zeros(n, dtype=np.float32)
+            i = np.arange(n, dtype=np.float64)
+            return (amplitude * np.sin(
+                2 * np.pi * freq * (i / self._sr) + phase)).astype(np.float32)
+        if freq == 0.0 or amplitude == 0.0:
+            return array('d', [0.0]) * n
+        return array('d', self.sine(freq, length, amplitude, phase))
+
+    def sine_range(
+            self,
+            freq: float,
+            first: int,
+            n: int,
+            amplitude: float = 1.0) -> Block:
+        """Generate samples first to first + n of a sine wave.
+
+        The wave starts with phase 0 like the tones of
+        :meth:`sine_block`, the phase at first is computed directly, so
+        the cost does not depend on first. With the exact oscillator
+        the samples equal those of a whole tone, the recursive and table
+        oscillators start from the analytic phase and agree with a whole
+        tone within their error.
+
+        Args:
+            freq: The frequency of the sine wave.
+            first: The index of the first sample. Must be non-negative.
+            n: The number of samples.
+            amplitude: The amplitude of the sine wave.
+
+        Returns:
+            A block containing the samples.
+        """
+        if self._oscillator != 'exact' and freq != 0.0 and amplitude != 0.0:
+            phase = math.fmod(2 * math.pi * freq * first / self._sr,
+                              2 * math.pi)
+            if self._oscillator == 'table':
+                return self.wavetable(freq, amplitude, phase).block(n)
+            return self.recursive(freq, amplitude, phase).block(n)
+        if self._engine == 'numpy':
+            if freq == 0.0 or amplitude == 0.0:
+                return np.zeros(n, dtype=np.float32)
+            i = np.arange(first, first + n, dtype=np.float64)
+            return (amplitude * np.sin(
+                2 * np.pi * freq * (i / self._sr))).astype(np.float32)
+        if freq == 0.0 or amplitude == 0.0:
+            return array('d', [0.0]) * n
+        return array('d', (
+            amplitude * math.sin(2 * math.pi * freq * (i / self._sr))
+            for i in range(first, first + n)))
+
     def __call__(
                 self,
                 freq: float,
@@ -81,4 +620,4 @@ class SineWave:
 
     def __repr__(self) -> str:
         """Get the representation of the Wave."""
-        return f'{self.__class__.__name__}(Sample Rate: {self._sr}, Channels: {self._ch})'  # noqa: E501
+        return f'{self.__class__.__name__}(Sample Rate: {self._sr}, Channels: {self._ch}, Engine: {self._engine}, Oscillator: {self._oscillator})'  # noqa: E501
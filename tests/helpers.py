@@ -0,0 +1,22 @@
+"""helpers.py
+
+Shared helpers for the tests.
+"""
+
+from bluebox.freqs import DTMF
+
+
+class ShiftedDTMF(DTMF):
+    """DTMF with all frequencies shifted by a constructor argument.
+
+    Used to test that MF instances, and not just their class, reach
+    worker processes.
+    """
+
+    def __init__(self, shift: float) -> None:
+        self.shift = shift
+        super().__init__()
+
+    def _frequencies(self, key: str) -> tuple:
+        f1, f2 = super()._frequencies(key)
+        return (f1 + self.shift, f2 + self.shift)
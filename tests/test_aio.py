@@ -0,0 +1,79 @@
+"""test_aio.py
+
+Tests for the aio.py file.
+"""
+
+import unittest
+import asyncio
+import tempfile
+import typing as t
+from pathlib import Path
+from bluebox.aio import AsyncSequencer
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+from bluebox.backends import DummyBackend, WavBackend
+
+
+class TestAsyncSequencer(unittest.TestCase):
+    """TestAsyncSequencer class for testing the asyncio interface."""
+
+    def test_play(self) -> None:
+        """Test async playback matches the blocking one."""
+        be = DummyBackend(mode='list', sample_rate=8000.0)
+        seq = AsyncSequencer(
+            mf=DTMF(), backend=be, sample_rate=8000.0, frame_size=100)
+        asyncio.run(seq.play('1p2#'))
+        self.assertEqual(be.get_data(), list(seq.sequence('1p2#')))
+
+    def test_yields_between_blocks(self) -> None:
+        """Test other tasks run while a sequence is rendered."""
+        seq = AsyncSequencer(
+            mf=DTMF(), backend=DummyBackend, sample_rate=8000.0,
+            frame_size=64)
+        events: t.List[str] = []
+
+        async def render() -> None:
+            async for _ in seq.ablocks('123'):
+                events.append('block')
+
+        async def other() -> None:
+            for _ in range(3):
+                events.append('other')
+                await asyncio.sleep(0)
+
+        async def main() -> None:
+            await asyncio.gather(render(), other())
+
+        asyncio.run(main())
+        self.assertIn('other', events[1:4])
+        self.assertGreater(events.count('block'), 3)
+
+    def test_concurrent_files(self) -> None:
+        """Test many sequences written to files from one event loop."""
+        sequences = ['123', '456#', '7890*', 'ABCD']
+        with tempfile.TemporaryDirectory() as d:
+            async def write(i: int, codes: str) -> None:
+                backend = WavBackend(
+                    sample_rate=8000.0,
+                    output_path=Path(d) / f'async{i}.wav',
+                    streaming=True)
+                seq = AsyncSequencer(
+                    mf=DTMF(), backend=backend, sample_rate=8000.0,
+                    frame_size=128)
+                await seq.play(codes)
+
+            async def main() -> None:
+                await asyncio.gather(
+                    *(write(i, c) for i, c in enumerate(sequences)))
+
+            asyncio.run(main())
+            for i, codes in enumerate(sequences):
+                backend = WavBackend(
+                    sample_rate=8000.0,
+                    output_path=Path(d) / f'sync{i}.wav',
+                    streaming=True)
+                Sequencer(
+                    mf=DTMF(), backend=backend, sample_rate=8000.0)(codes)
+                self.assertEqual(
+                    (Path(d) / f'async{i}.wav').read_bytes(),
+                    (Path(d) / f'sync{i}.wav').read_bytes())
@@ -0,0 +1,61 @@
+"""test_backends.py
+
+Tests for the backend registry.
+"""
+
+import unittest
+import subprocess
+import sys
+import bluebox.backends as backends
+from bluebox.backends import (
+    DummyBackend, get_backend, list_backends, register_backend)
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+
+
+class TestBackends(unittest.TestCase):
+    """TestBackends class for testing the backend registry."""
+
+    def test_registry(self) -> None:
+        """Test registering backends by class and by path."""
+        self.assertEqual(
+            list_backends()[:5], ['pyaudio', 'pyaudio-nb', 'dummy', 'wav',
+                                  'pcm'])
+        self.assertIs(get_backend('dummy'), DummyBackend)
+        register_backend(
+            'test-lazy', 'bluebox.backends.backend_dummy:DummyBackend')
+        try:
+            self.assertIs(get_backend('test-lazy'), DummyBackend)
+        finally:
+            del backends._BACKENDS['test-lazy']
+        with self.assertRaises(KeyError):
+            get_backend('missing')
+        with self.assertRaises(AttributeError):
+            backends.MissingBackend  # type: ignore
+
+    def test_lazy_import(self) -> None:
+        """Test that backends are only imported when they are selected."""
+        code = (
+            'import sys\n'
+            'import bluebox.cli\n'
+            'from bluebox.box import Sequencer\n'
+            'from bluebox.freqs import DTMF\n'
+            'Sequencer(mf=DTMF())\n'
+            'assert "pyaudio" not in sys.modules\n'
+            'assert "bluebox.backends.backend_pyaudio" not in sys.modules\n'
+            'assert "bluebox.backends.backend_pcm" not in sys.modules\n'
+            'assert "socket" not in sys.modules\n'
+            'assert "selectors" not in sys.modules\n'
+            'from bluebox.backends import PyAudioBackend\n'
+            'assert "bluebox.backends.backend_pyaudio" in sys.modules\n')
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_default_backend(self) -> None:
+        """Test that the default backend is created on first use."""
+        seq = Sequencer(mf=DTMF())
+        self.assertIsNone(seq._backend)
+        backend = seq.backend
+        self.assertIs(type(backend), get_backend('pyaudio'))
+        self.assertIs(seq.backend, backend)
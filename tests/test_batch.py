@@ -0,0 +1,116 @@
+"""test_batch.py
+
+Tests for the batch.py file.
+"""
+
+import unittest
+import json
+import tempfile
+import wave
+from pathlib import Path
+from bluebox.batch import BatchItem, read_manifest
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+from bluebox.backends.backend_dummy import DummyBackend
+from bluebox.backends.backend_wav import WavBackend
+import bluebox.cli as cli
+from tests.helpers import ShiftedDTMF
+
+
+class TestBatch(unittest.TestCase):
+    """Test rendering batches of sequences."""
+
+    def _sequencer(self) -> Sequencer:
+        return Sequencer(
+            mf=DTMF(),
+            backend=DummyBackend,
+            sample_rate=8000.0,
+            length=50,
+            pause=25,
+            pad_pause=0.0)
+
+    def test_render_batch(self) -> None:
+        """Test a batch with a failing item in a process pool."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            items = [
+                BatchItem('123', Path(tmpdir) / 'a.wav'),
+                ('45', Path(tmpdir) / 'b.wav', {'length': 100}),
+                ('6', Path(tmpdir) / 'c.wav', {'bogus': 1}),
+                ('789', Path(tmpdir) / 'd.wav',
+                 {'sample_format': 'int24'}),
+            ]
+            results = self._sequencer().render_batch(items, workers=2)
+
+            self.assertEqual([r.position for r in results], [0, 1, 2, 3])
+            self.assertEqual([r.ok for r in results],
+                             [True, True, False, True])
+            self.assertIn('bogus', str(results[2].error))
+            self.assertEqual(results[0].samples, 3 * 400 + 2 * 200)
+            self.assertEqual(results[1].samples, 2 * 800 + 200)
+            self.assertFalse((Path(tmpdir) / 'c.wav').exists())
+
+            with wave.open(str(Path(tmpdir) / 'a.wav'), 'rb') as wav:
+                self.assertEqual(wav.getnframes(), results[0].samples)
+            with wave.open(str(Path(tmpdir) / 'd.wav'), 'rb') as wav:
+                self.assertEqual(wav.getsampwidth(), 3)
+
+    def test_render_batch_inline(self) -> None:
+        """Test rendering in the current process matches the pool."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            seq = self._sequencer()
+            seq.render_batch(
+                [('1#', Path(tmpdir) / 'a.wav')], workers=0)
+            seq.render_batch(
+                [('1#', Path(tmpdir) / 'b.wav')], workers=2)
+            self.assertEqual(
+                (Path(tmpdir) / 'a.wav').read_bytes(),
+                (Path(tmpdir) / 'b.wav').read_bytes())
+            # both tones and the pause were rendered once in the parent
+            self.assertEqual(seq.tone_bank.info().currsize, 3)
+
+    def test_render_batch_mf_instance(self) -> None:
+        """Test that the workers render with the Sequencer's MF instance."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            seq = Sequencer(
+                mf=ShiftedDTMF(50.0), backend=DummyBackend,
+                sample_rate=8000.0, length=50, pause=25, pad_pause=0.0)
+            results = seq.render_batch(
+                [('1#', Path(tmpdir) / 'a.wav')], workers=2)
+            self.assertTrue(results[0].ok, results[0].error)
+            Sequencer(
+                mf=ShiftedDTMF(50.0), sample_rate=8000.0, length=50,
+                pause=25, pad_pause=0.0,
+                backend=WavBackend(output_path=Path(tmpdir) / 'b.wav',
+                                   sample_rate=8000.0))('1#')
+            self.assertEqual(
+                (Path(tmpdir) / 'a.wav').read_bytes(),
+                (Path(tmpdir) / 'b.wav').read_bytes())
+
+    def test_manifest_cli(self) -> None:
+        """Test reading a manifest and the --batch option."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest = Path(tmpdir) / 'manifest.jsonl'
+            manifest.write_text(
+                '# comment\n\n' +
+                json.dumps({'sequence': '12',
+                            'output': str(Path(tmpdir) / 'a.wav')}) + '\n' +
+                json.dumps({'sequence': 34, 'output': str(
+                    Path(tmpdir) / 'b.wav'), 'pause': 10}) + '\n')
+            items = read_manifest(manifest)
+            self.assertEqual(len(items), 2)
+            self.assertEqual(items[1].sequence, '34')
+            self.assertEqual(items[1].params, {'pause': 10})
+
+            cli.bluebox(cli.parse_args(
+                ['--batch', str(manifest), '-j', '1', '-r', '0']))
+            self.assertTrue((Path(tmpdir) / 'b.wav').exists())
+
+            manifest.write_text('{"output": "x.wav"}\n')
+            with self.assertRaises(ValueError):
+                read_manifest(manifest)
+            with self.assertRaises(SystemExit):
+                cli.bluebox(cli.parse_args(['--batch', str(manifest)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
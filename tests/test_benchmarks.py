@@ -0,0 +1,40 @@
+"""test_benchmarks.py
+
+Tests for the benchmark runner in benchmarks/run.py.
+"""
+
+import unittest
+import json
+import tempfile
+from pathlib import Path
+from benchmarks import run
+
+
+class TestBenchmarks(unittest.TestCase):
+    """TestBenchmarks class for testing the benchmark runner."""
+
+    def test_run(self) -> None:
+        """Test a quick run produces a result for every benchmark."""
+        results = run.run(repeat=1, quick=True)
+        names = {r['name'] for r in results['benchmarks']}
+        self.assertEqual(
+            names, {'sine', 'sine_block', 'sequence', 'blocks', 'mix',
+                    'render_range', 'render_parallel', 'decode', 'startup',
+                    'wav_export', 'wav_write'})
+        for result in results['benchmarks']:
+            self.assertGreater(result['samples'], 0)
+            self.assertGreater(result['samples_per_sec'], 0)
+            self.assertGreaterEqual(result['peak_memory'], 0)
+        # results must survive a JSON round trip
+        self.assertEqual(json.loads(json.dumps(results)), results)
+
+    def test_main_compare(self) -> None:
+        """Test writing the results and comparing them with a baseline."""
+        with tempfile.TemporaryDirectory() as d:
+            output = Path(d) / 'results.json'
+            run.main(['-q', '-r', '1', '-n', 'sine', '-o', str(output)])
+            results = json.loads(output.read_text())
+            self.assertEqual(len(results['benchmarks']), 1)
+            lines = run.compare(results, results)
+            self.assertEqual(len(lines), 1)
+            self.assertIn('time +0.0%', lines[0])
@@ -0,0 +1,48 @@
+"""test_blocks.py
+
+Tests for the blocks.py file.
+"""
+
+import unittest
+from array import array
+import bluebox.blocks as blocks
+
+
+class TestBlocks(unittest.TestCase):
+    """TestBlocks class for testing the block helpers."""
+
+    def test_iter_blocks(self) -> None:
+        """Test splitting samples into blocks."""
+        result = list(blocks.iter_blocks(iter(range(10)), 4))
+        self.assertEqual([len(b) for b in result], [4, 4, 2])
+        self.assertEqual(
+            [s for b in result for s in b], [float(i) for i in range(10)])
+        self.assertEqual(list(blocks.iter_blocks(iter([]), 4)), [])
+
+    def test_rechunk(self) -> None:
+        """Test regrouping blocks into fixed sizes."""
+        source = [array('d', range(n)) for n in (3, 0, 7, 1, 9)]
+        flat = [s for b in source for s in b]
+        for frame_size in (1, 2, 5, 20, 100):
+            result = list(blocks.rechunk(source, frame_size))
+            self.assertTrue(
+                all(len(b) == frame_size for b in result[:-1]))
+            self.assertLessEqual(len(result[-1]), frame_size)
+            self.assertEqual([s for b in result for s in b], flat)
+
+    def test_to_float32_bytes(self) -> None:
+        """Test converting a block to float32 bytes."""
+        data = blocks.to_float32_bytes(array('d', [0.5, -0.25]))
+        self.assertEqual(array('f', data).tolist(), [0.5, -0.25])
+
+    def test_interleave(self) -> None:
+        """Test interleaving and splitting channels."""
+        left = array('d', [1.0, 2.0, 3.0])
+        right = array('d', [-1.0, -2.0, -3.0])
+        frames = blocks.interleave([left, right])
+        self.assertEqual(
+            frames.tolist(), [1.0, -1.0, 2.0, -2.0, 3.0, -3.0])
+        self.assertEqual(blocks.deinterleave(frames, 2), [left, right])
+        self.assertIs(blocks.interleave([left]), left)
+        with self.assertRaises(ValueError):
+            blocks.interleave([left, right[:2]])
@@ -6,8 +6,10 @@ Tests for the box.py file.
 import unittest
 import math
 from bluebox.box import Sequencer
-from bluebox.freqs import DTMF
+from bluebox.blocks import deinterleave
+from bluebox.freqs import DTMF, MF
 from bluebox.backends.backend_dummy import DummyBackend
+from bluebox.wave import numpy_available
 
 
 class TestSequencer(unittest.TestCase):
@@ -286,3 +288,256 @@ class TestSequencer(unittest.TestCase):
         # code), pause, tone2
         # 2 tones * 5 samples + 3 pauses * 1 sample = 13 samples
         self.assertEqual(len(be.get_data()), 2*5 + 3*1)
+
+    @unittest.skipUnless(numpy_available(), 'numpy not installed')
+    def test_numpy_engine(self) -> None:
+        """Test the numpy engine matches the python engine."""
+        mf = DTMF()
+        results = []
+        for engine in ('python', 'numpy'):
+            be = DummyBackend(mode='list', sample_rate=8000.0)
+            seq = Sequencer(
+                mf=mf,
+                backend=be,
+                sample_rate=8000.0,
+                length=50,
+                pause=20,
+                pad_pause=10.0,
+                engine=engine)
+            self.assertEqual(seq._wave.engine, engine)
+            seq('1p2#')
+            results.append(be.get_data())
+
+        self.assertEqual(len(results[0]), len(results[1]))
+        for a, b in zip(*results):
+            self.assertAlmostEqual(a, b, places=6)
+
+    def test_tone_bank(self) -> None:
+        """Test that tones and pauses are rendered once and reused."""
+        mf = DTMF()
+        be = DummyBackend(mode='list', sample_rate=10.0)
+        seq = Sequencer(
+            mf=mf,
+            backend=be,
+            sample_rate=10.0,
+            length=500,
+            pause=100,
+            pad_pause=0.0)
+        seq('1212')
+        first = be.get_data()
+        info = seq.tone_bank.info()
+        # two tones and one pause rendered, the rest reused
+        self.assertEqual(info.misses, 3)
+        self.assertEqual(info.hits, 4)
+        self.assertEqual(info.currsize, 3)
+
+        be.clear_data()
+        seq('1212')
+        self.assertEqual(be.get_data(), first)
+        self.assertEqual(seq.tone_bank.info().misses, 3)
+
+    def test_tone_bank_eviction(self) -> None:
+        """Test the tone bank size bound and disabling it."""
+        mf = DTMF()
+        be = DummyBackend(mode='list', sample_rate=10.0)
+        seq = Sequencer(
+            mf=mf,
+            backend=be,
+            sample_rate=10.0,
+            length=500,
+            pause=100,
+            pad_pause=0.0,
+            tone_cache_size=2)
+        seq('123')
+        self.assertEqual(seq.tone_bank.info().currsize, 2)
+
+        seq = Sequencer(
+            mf=mf,
+            backend=be,
+            sample_rate=10.0,
+            length=500,
+            pause=100,
+            pad_pause=0.0,
+            tone_cache_size=0)
+        seq('11')
+        self.assertEqual(seq.tone_bank.info().hits, 0)
+        self.assertEqual(seq.tone_bank.info().currsize, 0)
+
+        with self.assertRaises(ValueError):
+            Sequencer(mf=mf, backend=be, tone_cache_size=-1)
+
+    def test_blocks(self) -> None:
+        """Test that blocks have a fixed size and match the sequence."""
+        mf = DTMF()
+        seq = Sequencer(
+            mf=mf,
+            backend=DummyBackend,
+            sample_rate=8000.0,
+            pad_pause=10.0,
+            frame_size=256)
+        samples = list(seq.sequence('123p4'))
+        result = list(seq.blocks('123p4'))
+        self.assertTrue(all(len(b) == 256 for b in result[:-1]))
+        self.assertEqual([s for b in result for s in b], samples)
+        self.assertEqual(
+            sum(len(b) for b in seq.blocks('123p4', frame_size=7)),
+            len(samples))
+
+        with self.assertRaises(ValueError):
+            Sequencer(mf=mf, backend=DummyBackend, frame_size=0)
+
+    def test_recursive_oscillator(self) -> None:
+        """Test the recursive oscillator matches the exact one."""
+        mf = DTMF()
+        results = []
+        for oscillator in ('exact', 'recursive'):
+            be = DummyBackend(mode='list', sample_rate=8000.0)
+            seq = Sequencer(
+                mf=mf,
+                backend=be,
+                sample_rate=8000.0,
+                length=50,
+                pause=20,
+                pad_pause=10.0,
+                oscillator=oscillator)
+            seq('1p2#')
+            results.append(be.get_data())
+
+        self.assertEqual(len(results[0]), len(results[1]))
+        for a, b in zip(*results):
+            self.assertAlmostEqual(a, b, places=9)
+
+    def test_oscillator_snr(self) -> None:
+        """Test that the oscillator is picked by the required SNR."""
+        mf = DTMF()
+        for snr, oscillator in ((100.0, 'recursive'), (250.0, 'exact'),
+                                (None, 'exact')):
+            seq = Sequencer(mf=mf, backend=DummyBackend, snr=snr)
+            self.assertEqual(seq._wave.oscillator, oscillator)
+
+    def test_multi_character_codes(self) -> None:
+        """Test that multi-character MF codes can be dialed."""
+        mf = MF()
+        be = DummyBackend(mode='list', sample_rate=10.0)
+        seq = Sequencer(
+            mf=mf,
+            backend=be,
+            stop_on_error=True,
+            pad_pause=0.0,
+            sample_rate=10.0,
+            length=500,
+            pause=100)
+        seq('KP 1 1 ST')
+        # 4 tones * 5 samples + 3 pauses * 1 sample
+        self.assertEqual(len(be.get_data()), 4*5 + 3*1)
+        self.assertEqual(
+            seq.tokenizer.split('KP11ST'), ['KP', '11', 'ST'])
+
+        with self.assertRaises(ValueError) as cm:
+            seq('KP1X')
+        self.assertIn("Invalid code 'X' at position 3", str(cm.exception))
+
+    def test_stereo(self) -> None:
+        """Test that every channel gets the full tone, not half of it."""
+        mf = DTMF()
+        mono = Sequencer(
+            mf=mf, backend=DummyBackend, pad_pause=0.0,
+            sample_rate=1000.0, length=20, pause=10)
+        stereo = Sequencer(
+            mf=mf, backend=DummyBackend, pad_pause=0.0,
+            sample_rate=1000.0, length=20, pause=10, channels=2,
+            frame_size=7)
+        samples = list(mono.sequence('12'))
+        blocks = list(stereo.blocks('12'))
+        self.assertEqual(len(blocks[0]), 14)
+        frames = [s for block in blocks for s in block]
+        self.assertEqual(len(frames), 2 * len(samples))
+        self.assertEqual(frames[0::2], samples)
+        self.assertEqual(frames[1::2], samples)
+
+    def test_split_routing(self) -> None:
+        """Test playing the low and high tone on separate channels."""
+        mf = DTMF()
+        seq = Sequencer(
+            mf=mf, backend=DummyBackend, pad_pause=0.0,
+            sample_rate=8000.0, length=20, channels=3, routing='split')
+        tone = seq._tone_block('5', 3)
+        low, high, silent = deinterleave(tone, 3)
+        freq1, freq2 = mf['5']
+        self.assertEqual(
+            list(low), list(seq._wave.sine_block(freq1, 20, 0.5)))
+        self.assertEqual(
+            list(high), list(seq._wave.sine_block(freq2, 20, 0.5)))
+        self.assertEqual(set(silent), {0.0})
+
+        with self.assertRaises(ValueError):
+            Sequencer(mf=mf, backend=DummyBackend, routing='split')
+        with self.assertRaises(ValueError):
+            Sequencer(mf=mf, backend=DummyBackend, channels=2,
+                      routing='left')
+
+    def test_code_routing(self) -> None:
+        """Test routing codes to channels."""
+        mf = DTMF()
+        seq = Sequencer(
+            mf=mf, backend=DummyBackend, pad_pause=0.0,
+            sample_rate=8000.0, length=20, channels=2,
+            routing={'1': 0, '2': [1]})
+        left, right = deinterleave(seq._tone_block('1', 2), 2)
+        self.assertEqual(list(left), list(seq._tone_block('1')))
+        self.assertEqual(set(right), {0.0})
+        left, right = deinterleave(seq._tone_block('2', 2), 2)
+        self.assertEqual(set(left), {0.0})
+        left, right = deinterleave(seq._tone_block('3', 2), 2)
+        self.assertEqual(list(left), list(right))
+
+        for routing in ({'1': 2}, {'X': 0}, {'1': []}):
+            with self.assertRaises(ValueError):
+                Sequencer(mf=mf, backend=DummyBackend, channels=2,
+                          routing=routing)
+
+    def test_channel_blocks(self) -> None:
+        """Test playing a different sequence on each channel."""
+        mf = DTMF()
+        be = DummyBackend(mode='list', sample_rate=1000.0, channels=3)
+        seq = Sequencer(
+            mf=mf, backend=be, pad_pause=0.0, sample_rate=1000.0,
+            length=20, pause=10, channels=3, frame_size=16)
+        first = list(seq._segments('12', interleaved=False))
+        second = list(seq._segments('3', interleaved=False))
+        seq.play_channels(['12', '3'])
+        channels = deinterleave(list(be.get_data()), 3)
+        n = sum(len(b) for b in first)
+        self.assertEqual(len(channels[0]), n)
+        self.assertEqual(channels[0], [s for b in first for s in b])
+        self.assertEqual(
+            channels[1][:len(second[0])], list(second[0]))
+        self.assertEqual(set(channels[1][len(second[0]):]), {0.0})
+        self.assertEqual(set(channels[2]), {0.0})
+
+        with self.assertRaises(ValueError):
+            list(seq.channel_blocks(['1', '2', '3', '4']))
+
+    def test_render_range(self) -> None:
+        """Test rendering windows of a sequence."""
+        for channels, routing in ((1, None), (2, 'split'), (2, {'1': 1})):
+            seq = Sequencer(
+                mf=DTMF(), backend=DummyBackend, sample_rate=8000.0,
+                length=22.3, pause=13.1, pad_pause=7.0, channels=channels,
+                routing=routing)
+            full = [s for block in seq.blocks('1p#2') for s in block]
+            plan = seq.plan('1p#2')
+            n = plan.total_samples
+            self.assertEqual(len(full), n * channels)
+            for start, count in ((0, n), (0, 10), (60, 500), (200, 1),
+                                 (n - 30, 100), (n, 10), (n + 5, 10)):
+                window = seq.render_range(plan, start, count)
+                self.assertEqual(
+                    list(window),
+                    full[start * channels:(start + count) * channels])
+            self.assertEqual(list(seq.render_range('1p#2', 60, 500)),
+                             full[60 * channels:560 * channels])
+        with self.assertRaises(ValueError):
+            seq.render_range(plan, -1, 10)
+        with self.assertRaises(ValueError):
+            seq.render_range(plan, 0, -1)
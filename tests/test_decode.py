@@ -0,0 +1,97 @@
+"""test_decode.py
+
+Tests for the decode.py file.
+"""
+
+import unittest
+import math
+import tempfile
+from array import array
+from pathlib import Path
+from bluebox.backends import DummyBackend, WavBackend
+from bluebox.box import Sequencer
+from bluebox.decode import Decoder, codes, decode_file
+from bluebox.freqs import DTMF, MF
+from bluebox.wave import numpy_available
+
+ENGINES = ['python'] + (['numpy'] if numpy_available() else [])
+
+
+class TestDecoder(unittest.TestCase):
+    """TestDecoder class for testing the Goertzel decoder."""
+
+    def test_dtmf(self) -> None:
+        """Test decoding every DTMF code with both engines."""
+        seq = Sequencer(
+            mf=DTMF(), backend=DummyBackend, sample_rate=8000.0)
+        samples = array('d', seq.sequence('123A456B789C*0#D'))
+        for engine in ENGINES:
+            decoder = Decoder(DTMF(), 8000.0, engine=engine)
+            detections = decoder.decode(samples)
+            self.assertEqual(''.join(codes(detections)), '123A456B789C*0#D')
+            # the tones start after the 150 ms pad, 62 ms apart
+            for i, detection in enumerate(detections):
+                self.assertAlmostEqual(
+                    detection.start, 150 + 62 * i, delta=10)
+                self.assertAlmostEqual(detection.length, 20, delta=10)
+
+    def test_repeated_codes(self) -> None:
+        """Test that the pause separates repeated codes."""
+        seq = Sequencer(
+            mf=DTMF(), backend=DummyBackend, sample_rate=8000.0,
+            frame_size=100)
+        for engine in ENGINES:
+            decoder = Decoder(DTMF(), 8000.0, engine=engine)
+            detections = list(decoder.detect(seq.blocks('1155p5')))
+            self.assertEqual(codes(detections), list('11555'))
+
+    def test_mf_file(self) -> None:
+        """Test decoding MF codes from WAV files in every format."""
+        sequence = 'KP 1 2 3 4 5 6 7 8 9 0 11 12 KP2 ST'
+        with tempfile.TemporaryDirectory() as d:
+            for sample_format in ('int16', 'int24', 'int32', 'float32'):
+                path = Path(d) / f'{sample_format}.wav'
+                backend = WavBackend(
+                    sample_rate=16000.0, output_path=path,
+                    sample_format=sample_format)
+                Sequencer(mf=MF(), backend=backend, sample_rate=16000.0)(
+                    sequence)
+                for engine in ENGINES:
+                    detections = decode_file(path, MF(), engine=engine)
+                    self.assertEqual(codes(detections), sequence.split())
+
+    def test_stereo_file(self) -> None:
+        """Test decoding one channel of a stereo file."""
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / 'stereo.wav'
+            backend = WavBackend(
+                sample_rate=8000.0, channels=2, output_path=path)
+            seq = Sequencer(
+                mf=DTMF(), backend=backend, sample_rate=8000.0, channels=2)
+            seq.play_channels(['123', '456'])
+            self.assertEqual(codes(decode_file(path, DTMF())), list('123'))
+            self.assertEqual(
+                codes(decode_file(path, DTMF(), channel=1)), list('456'))
+            with self.assertRaises(ValueError):
+                decode_file(path, DTMF(), channel=2)
+
+    def test_rejects(self) -> None:
+        """Test that silence, single tones and short bursts are ignored."""
+        for engine in ENGINES:
+            decoder = Decoder(DTMF(), 8000.0, engine=engine)
+            n = decoder.block_size * 10
+            self.assertEqual(decoder.decode(array('d', [0.0] * n)), [])
+            single = array('d', (
+                0.5 * math.sin(2 * math.pi * 697 * i / 8000)
+                for i in range(n)))
+            self.assertEqual(decoder.decode(single), [])
+            seq = Sequencer(
+                mf=DTMF(), backend=DummyBackend, sample_rate=8000.0,
+                length=4, pad_pause=0.0)
+            self.assertEqual(decoder.decode(array('d', seq.sequence('1'))),
+                             [])
+
+        with self.assertRaises(ValueError):
+            Decoder(DTMF(), block_length=0)
+        with self.assertRaises(ValueError):
+            Decoder(DTMF(), threshold=1.5)
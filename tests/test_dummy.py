@@ -0,0 +1,74 @@
+"""test_dummy.py
+
+Tests for the backend_dummy.py file.
+"""
+
+import unittest
+import math
+from array import array
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+from bluebox.backends.backend_dummy import DummyBackend
+from bluebox.wave import numpy_available
+
+
+class TestDummyBackend(unittest.TestCase):
+    """TestDummyBackend class for testing the capture modes."""
+
+    def test_array_mode(self) -> None:
+        """Test capturing into a float32 array."""
+        be = DummyBackend(mode='array')
+        be.write(array('d', [0.5, -0.25]))
+        be.play(iter([1.0, 0.0]))
+        data = be.get_data()
+        self.assertIsInstance(data, array)
+        self.assertEqual(list(data), [0.5, -0.25, 1.0, 0.0])
+        with be.buffer as view:
+            self.assertEqual(view.format, 'f')
+            self.assertEqual(view.nbytes, 16)
+            self.assertTrue(view.readonly)
+        be.clear_data()
+        self.assertEqual(len(be.get_data()), 0)
+
+    def test_stats_mode(self) -> None:
+        """Test keeping only the summary statistics."""
+        be = DummyBackend(mode='stats')
+        be.write(array('d', [0.5, -1.0]))
+        be.write(array('d', [0.5, 0.0]))
+        be.write(array('d'))
+        stats = be.stats()
+        self.assertEqual(stats.samples, 4)
+        self.assertAlmostEqual(stats.rms, math.sqrt(1.5 / 4))
+        self.assertEqual(stats.peak, 1.0)
+        self.assertEqual(len(be.get_data()), 0)
+        be.clear_data()
+        self.assertEqual(be.stats(), (0, 0.0, 0.0))
+
+    def test_modes_agree(self) -> None:
+        """Test that all capture modes see the same samples."""
+        engines = ['python'] + (['numpy'] if numpy_available() else [])
+        for engine in engines:
+            results = {}
+            for mode in ('list', 'array', 'stats'):
+                be = DummyBackend(mode=mode, sample_rate=8000.0)
+                seq = Sequencer(
+                    mf=DTMF(), backend=be, sample_rate=8000.0,
+                    engine=engine)
+                seq('123')
+                results[mode] = be
+            samples = results['list'].get_data()
+            self.assertEqual(len(results['array'].get_data()), len(samples))
+            for a, b in zip(samples, results['array'].get_data()):
+                self.assertAlmostEqual(a, b, places=6)
+            for mode in ('list', 'array'):
+                stats = results[mode].stats()
+                expected = results['stats'].stats()
+                self.assertEqual(stats.samples, expected.samples)
+                self.assertAlmostEqual(stats.rms, expected.rms, places=6)
+                self.assertAlmostEqual(stats.peak, expected.peak, places=6)
+
+    def test_invalid_mode(self) -> None:
+        """Test that an unknown mode is rejected."""
+        be = DummyBackend(mode='tape')
+        with self.assertRaises(ValueError):
+            be.write(array('d', [0.0]))
@@ -4,6 +4,7 @@ Tests for the freqs.py file.
 """
 
 import unittest
+import pickle
 import bluebox.freqs as freqs
 
 
@@ -101,3 +102,63 @@ class TestMF(unittest.TestCase):
             # Verify frequencies are from the valid set
             self.assertIn(freq_pair[0], mf._col)
             self.assertIn(freq_pair[1], mf._col)
+
+
+class TestFrequencyTable(unittest.TestCase):
+    """TestFrequencyTable class for the compiled lookup tables."""
+
+    def test_table(self) -> None:
+        """Test the compiled table matches the lookups."""
+        for mf in (freqs.DTMF(), freqs.MF()):
+            self.assertEqual(set(mf.table), mf.valid_codes())
+            for code, pair in mf.table.items():
+                self.assertEqual(mf[code], pair)
+                self.assertEqual(mf.frequencies(code), pair)
+                self.assertIn(code, mf)
+            with self.assertRaises(TypeError):
+                mf.table['X'] = (1.0, 2.0)  # type: ignore
+            with self.assertRaises(KeyError):
+                mf.frequencies('X')
+            # valid codes are computed once
+            self.assertIs(mf.valid_codes(), mf.valid_codes())
+
+    def test_code_ids(self) -> None:
+        """Test the code ids and alternative names."""
+        mf = freqs.MF()
+        self.assertEqual(sorted(set(mf.code_ids.values())), list(range(15)))
+        self.assertEqual(mf.code_id('1'), 0)
+        self.assertEqual(mf.code_id('10'), mf.code_id('0'))
+        self.assertEqual(mf.code_id('ST3'), mf.code_id('11'))
+        self.assertEqual(
+            mf.id_frequencies[mf.code_id('KP')], mf['KP'])
+        self.assertEqual(mf.id_codes[mf.code_id('ST2')], '12')
+        self.assertEqual(len(mf.id_codes), 15)
+        with self.assertRaises(KeyError):
+            mf.code_id('KP3')
+
+    def test_pickle(self) -> None:
+        """Test that a compiled scheme can be pickled."""
+        mf = freqs.MF()
+        table = dict(mf.table)
+        copy = pickle.loads(pickle.dumps(mf))
+        self.assertEqual(dict(copy.table), table)
+        self.assertEqual(copy.code_ids, mf.code_ids)
+
+    def test_custom_scheme(self) -> None:
+        """Test a scheme only defining __getitem__ gets the table."""
+
+        class Custom(freqs.BaseMF):
+            _col = (1000.0,)
+            _row = (2000.0, 3000.0)
+            _codes = ('a', 'b')
+            calls = 0
+
+            def __getitem__(self, key: str) -> tuple:
+                self.calls += 1
+                return (1000.0, 2000.0 if key == 'a' else 3000.0)
+
+        custom = Custom()
+        for _ in range(3):
+            self.assertEqual(custom.frequencies('b'), (1000.0, 3000.0))
+        self.assertEqual(custom.calls, 2)
+        self.assertEqual(custom.code_ids, {'a': 0, 'b': 1})
@@ -0,0 +1,119 @@
+"""test_mixer.py
+
+Tests for the mixer.py file.
+"""
+
+import unittest
+import math
+from bluebox.box import Sequencer
+from bluebox.blocks import deinterleave
+from bluebox.freqs import DTMF
+from bluebox.backends.backend_dummy import DummyBackend
+from bluebox.mixer import Mixer, Voice
+from bluebox.wave import numpy_available
+
+
+def _sequencer(**kwargs: object) -> Sequencer:
+    """Create a small Sequencer for mixing."""
+    settings = dict(
+        mf=DTMF(), backend=DummyBackend, pad_pause=0.0,
+        sample_rate=1000.0, length=20, pause=10, amplitude=0.5,
+        frame_size=16)
+    settings.update(kwargs)
+    return Sequencer(**settings)  # type: ignore
+
+
+class TestMixer(unittest.TestCase):
+    """TestMixer class for testing the Mixer."""
+
+    def test_single_voice(self) -> None:
+        """Test that one voice is mixed unchanged."""
+        seq = _sequencer()
+        mixer = Mixer(seq)
+        blocks = list(mixer.blocks([Voice('123')]))
+        self.assertTrue(all(len(b) == 16 for b in blocks[:-1]))
+        mixed = [s for b in blocks for s in b]
+        self.assertEqual(mixed, list(seq.sequence('123')))
+
+    def test_offsets(self) -> None:
+        """Test that voices are summed at their start offsets."""
+        seq = _sequencer()
+        mixer = Mixer(seq, limiter=None)
+        first = list(seq.sequence('12'))
+        second = list(seq.sequence('3'))
+        mixed = [s for b in mixer.blocks([('12', 0.0), ('3', 37.0)])
+                 for s in b]
+        self.assertEqual(len(mixed), max(len(first), 37 + len(second)))
+        expected = first + [0.0] * (len(mixed) - len(first))
+        for i, s in enumerate(second):
+            expected[37 + i] += s
+        for a, b in zip(mixed, expected):
+            self.assertAlmostEqual(a, b)
+
+    def test_gap(self) -> None:
+        """Test that silence is mixed until a late voice starts."""
+        seq = _sequencer()
+        mixed = [s for b in Mixer(seq).blocks([Voice('1', 100.0)])
+                 for s in b]
+        self.assertEqual(set(mixed[:100]), {0.0})
+        self.assertEqual(mixed[100:], list(seq.sequence('1')))
+        self.assertEqual(list(Mixer(seq).blocks([])), [])
+
+    def test_headroom_and_limiter(self) -> None:
+        """Test attenuating and limiting the sum."""
+        seq = _sequencer(amplitude=1.0)
+        voices = [Voice('5')] * 4
+        mixed = [s for b in Mixer(seq).blocks(voices) for s in b]
+        self.assertLessEqual(max(map(abs, mixed)), 1.0)
+        self.assertEqual(max(mixed), 1.0)
+
+        quiet = Mixer(seq, headroom=20 * math.log10(4), limiter=None)
+        mixed = [s for b in quiet.blocks(voices) for s in b]
+        for a, b in zip(mixed, seq.sequence('5')):
+            self.assertAlmostEqual(a, b)
+
+        soft = Mixer(seq, limiter='tanh')
+        mixed = [s for b in soft.blocks(voices) for s in b]
+        self.assertLess(max(map(abs, mixed)), 1.0)
+
+        with self.assertRaises(ValueError):
+            Mixer(seq, headroom=-1.0)
+        with self.assertRaises(ValueError):
+            Mixer(seq, limiter='brick')
+
+    def test_channels(self) -> None:
+        """Test mixing voices into separate channels."""
+        seq = _sequencer(channels=2)
+        be = DummyBackend(mode='list', sample_rate=1000.0, channels=2)
+        Mixer(seq).play(
+            [Voice('1', 0.0, 0), Voice('2', 5.0, 1), Voice('3')], be)
+        left, right = deinterleave(list(be.get_data()), 2)
+        n = len(left)
+        one, two, three = (
+            list(seq.sequence(c))[::2] for c in '123')
+        self.assertEqual(n, max(len(one), 5 + len(two)))
+
+        def pad(samples: list, start: int = 0) -> list:
+            return [0.0] * start + samples + [0.0] * (
+                n - start - len(samples))
+        for a, b, c in zip(left, pad(one), pad(three)):
+            self.assertAlmostEqual(a, b + c)
+        for a, b, c in zip(right, pad(two, 5), pad(three)):
+            self.assertAlmostEqual(a, b + c)
+
+        with self.assertRaises(ValueError):
+            list(Mixer(seq).blocks([Voice('1', 0.0, 2)]))
+        with self.assertRaises(ValueError):
+            list(Mixer(seq).blocks([Voice('1', -1.0)]))
+
+    @unittest.skipUnless(numpy_available(), 'numpy is not installed')
+    def test_numpy_engine(self) -> None:
+        """Test that both engines mix the same samples."""
+        voices = [Voice('12', 0.0), Voice('34', 13.0), Voice('5', 60.0)]
+        python = [s for b in Mixer(_sequencer()).blocks(voices) for s in b]
+        numpy = [
+            float(s) for b in Mixer(_sequencer(engine='numpy')).blocks(
+                voices) for s in b]
+        self.assertEqual(len(python), len(numpy))
+        for a, b in zip(python, numpy):
+            self.assertAlmostEqual(a, b, places=5)
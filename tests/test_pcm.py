@@ -0,0 +1,123 @@
+"""test_pcm.py
+
+Tests for the pcm.py file.
+"""
+
+import unittest
+import struct
+import typing as t
+from array import array
+import bluebox.pcm as pcm
+
+SAMPLES = [0.0, 0.5, -0.5, 1.0, -1.0, 1.5, -1.5, 0.123456]
+
+
+class TestPCM(unittest.TestCase):
+    """TestPCM class for testing the PCM conversion."""
+
+    def _check_int(self, data: bytes, width: int, scale: float) -> None:
+        """Check packed integer samples against the reference formula."""
+        self.assertEqual(len(data), width * len(SAMPLES))
+        for i, s in enumerate(SAMPLES):
+            value = int.from_bytes(
+                data[i * width:(i + 1) * width], 'little', signed=True)
+            expected = max(-scale - 1, min(scale, int(s * scale)))
+            self.assertEqual(value, expected)
+
+    def test_encode(self) -> None:
+        """Test all formats with the available and python encoders."""
+        block = array('d', SAMPLES)
+        for encoder in (pcm.encode, self._encode_python):
+            self._check_int(encoder(block, 'int16', False), 2, 32767)
+            self._check_int(encoder(block, 'int24', False), 3, 8388607)
+            self._check_int(
+                encoder(block, 'int32', False), 4, 2147483647)
+            floats = struct.unpack(
+                f'<{len(SAMPLES)}f', encoder(block, 'float32', False))
+            for f, s in zip(floats, SAMPLES):
+                self.assertAlmostEqual(f, max(-1.0, min(1.0, s)), places=6)
+
+    def test_int16_matches_previous_output(self) -> None:
+        """Test int16 output is identical to the per-sample conversion."""
+        block = [i / 1000.0 - 1.0 for i in range(2001)]
+        expected = struct.pack(
+            f'<{len(block)}h',
+            *[max(-32768, min(32767, int(s * 32767))) for s in block])
+        self.assertEqual(pcm.encode(block), expected)
+        self.assertEqual(self._encode_python(block, 'int16', False), expected)
+
+    def test_dither(self) -> None:
+        """Test TPDF dither stays within one LSB."""
+        block = [0.25] * 1000
+        for encoder in (pcm.encode, self._encode_python):
+            values = array('h', encoder(block, 'int16', True))
+            # rounded to within one LSB of 0.25 * 32767 plus dither
+            self.assertTrue(all(abs(v - 8191.75) <= 1.5 for v in values))
+
+    def test_dither_mean(self) -> None:
+        """Test dithered sub-LSB input keeps its mean."""
+        n = 20000
+        for level in (0.3, 2.3, -0.3):
+            block = [level / 32767] * n
+            for encoder in (pcm.encode, self._encode_python,
+                            self._encode_into):
+                values = array('h', encoder(block, 'int16', True))
+                self.assertAlmostEqual(
+                    sum(values) / n, level, delta=0.03)
+
+    def test_invalid_format(self) -> None:
+        """Test unknown sample formats are rejected."""
+        with self.assertRaises(ValueError):
+            pcm.encode([0.0], 'int8')
+
+    def test_encode_into(self) -> None:
+        """Test encoding into a buffer matches encode."""
+        block = array('d', SAMPLES)
+        for sample_format in pcm.SAMPLE_FORMATS:
+            expected = pcm.encode(block, sample_format)
+            for numpy in (pcm.np, None):
+                buffer = bytearray(len(expected) + 4)
+                original, pcm.np = pcm.np, numpy
+                try:
+                    n = pcm.encode_into(block, buffer, 2, sample_format)
+                finally:
+                    pcm.np = original
+                self.assertEqual(n, len(expected))
+                self.assertEqual(bytes(buffer[2:-2]), expected)
+                self.assertEqual(bytes(buffer[:2] + buffer[-2:]), bytes(4))
+        with self.assertRaises(ValueError):
+            pcm.encode_into(block, bytearray(len(SAMPLES)), 0, 'int16')
+
+    def test_unpack(self) -> None:
+        """Test converting PCM bytes back to samples."""
+        block = array('d', SAMPLES)
+        for sample_format, fmt in pcm.SAMPLE_FORMATS.items():
+            data = pcm.encode(block, sample_format)
+            tolerance = 1e-6 if fmt.scale == 1.0 else 1.0 / fmt.scale
+            for engine in ('python', 'auto'):
+                samples = list(pcm.unpack(data + b'\x00', sample_format,
+                                          engine))
+                self.assertEqual(len(samples), len(SAMPLES))
+                for s, expected in zip(samples, SAMPLES):
+                    self.assertAlmostEqual(
+                        s, max(-1.0, min(1.0, expected)), delta=tolerance)
+
+    @staticmethod
+    def _encode_into(
+            block: t.Sized, sample_format: str, dither: bool) -> bytes:
+        """Encode into a buffer."""
+        buffer = bytearray(
+            len(block) * pcm.get_format(sample_format).width)
+        pcm.encode_into(block, buffer, 0, sample_format, dither)
+        return bytes(buffer)
+
+    @staticmethod
+    def _encode_python(
+            block: object, sample_format: str, dither: bool) -> bytes:
+        """Encode with the pure python fallback."""
+        return pcm._encode_python(
+            block, pcm.get_format(sample_format), dither)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""test_pcm_backend.py
+
+Tests for the raw PCM backend.
+"""
+
+import unittest
+import os
+import socket
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+from bluebox.backends import get_backend
+from bluebox.backends.backend_pcm import PcmBackend
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+from bluebox.pcm import encode
+
+
+def _sequencer(backend: PcmBackend) -> Sequencer:
+    """Create a Sequencer streaming to the backend."""
+    return Sequencer(
+        mf=DTMF(), backend=backend, pad_pause=0.0, sample_rate=8000.0,
+        length=50, pause=20)
+
+
+class TestPcmBackend(unittest.TestCase):
+    """Test cases for the PCM backend."""
+
+    def test_file(self) -> None:
+        """Test streaming to a file in both formats."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for pcm_format, sample_format in (('s16le', 'int16'),
+                                              ('f32le', 'float32')):
+                path = Path(tmpdir) / f'out.{pcm_format}'
+                backend = PcmBackend(
+                    sample_rate=8000.0, output_path=path,
+                    pcm_format=pcm_format, buffer_frames=64)
+                seq = _sequencer(backend)
+                seq('123')
+                samples = array('d', seq.sequence('123'))
+                self.assertEqual(
+                    path.read_bytes(), encode(samples, sample_format))
+                self.assertEqual(
+                    backend.bytes_written, path.stat().st_size)
+
+    def test_file_calls(self) -> None:
+        """Test consecutive calls without a session append to a file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'out.s16le'
+            path.write_bytes(b'old data')
+            backend = PcmBackend(sample_rate=8000.0, output_path=path)
+            seq = _sequencer(backend)
+            seq('12')
+            seq('3')
+            samples = array('d', seq.sequence('12'))
+            samples.extend(seq.sequence('3'))
+            self.assertEqual(path.read_bytes(), encode(samples, 'int16'))
+
+    def test_pipe(self) -> None:
+        """Test backpressure from a pipe smaller than the output."""
+        read_fd, write_fd = os.pipe()
+        chunks = []
+
+        def reader() -> None:
+            while True:
+                data = os.read(read_fd, 512)
+                if not data:
+                    break
+                chunks.append(data)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        backend = PcmBackend(
+            sample_rate=8000.0, output=write_fd, buffer_frames=32)
+        seq = _sequencer(backend)
+        seq('0123456789' * 10)
+        os.close(write_fd)
+        thread.join(5)
+        os.close(read_fd)
+        expected = encode(array('d', seq.sequence('0123456789' * 10)))
+        self.assertEqual(b''.join(chunks), expected)
+        self.assertLessEqual(len(backend._pending), 2 * 32)
+
+    def test_socket(self) -> None:
+        """Test streaming to a non-blocking socket."""
+        left, right = socket.socketpair()
+        left.setblocking(False)
+        received = []
+
+        def reader() -> None:
+            while True:
+                data = right.recv(1024)
+                if not data:
+                    break
+                received.append(data)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        backend = PcmBackend(
+            sample_rate=8000.0, output=left, pcm_format='f32le',
+            timeout=5.0)
+        seq = _sequencer(backend)
+        seq('1234567890' * 5)
+        left.close()
+        thread.join(5)
+        right.close()
+        expected = encode(
+            array('d', seq.sequence('1234567890' * 5)), 'float32')
+        self.assertEqual(b''.join(received), expected)
+
+    def test_tcp_address(self) -> None:
+        """Test connecting to a tcp:// address."""
+        server = socket.create_server(('127.0.0.1', 0))
+        port = server.getsockname()[1]
+        received = []
+
+        def accept() -> None:
+            conn, _ = server.accept()
+            with conn:
+                while True:
+                    data = conn.recv(1024)
+                    if not data:
+                        break
+                    received.append(data)
+
+        thread = threading.Thread(target=accept)
+        thread.start()
+        backend = PcmBackend(
+            sample_rate=8000.0, output_path=f'tcp://127.0.0.1:{port}')
+        seq = _sequencer(backend)
+        seq('42')
+        thread.join(5)
+        server.close()
+        self.assertEqual(
+            b''.join(received), encode(array('d', seq.sequence('42'))))
+
+    def test_invalid(self) -> None:
+        """Test parameter validation and registration."""
+        self.assertIs(get_backend('pcm'), PcmBackend)
+        with self.assertRaises(ValueError):
+            PcmBackend(pcm_format='u8')
+        with self.assertRaises(ValueError):
+            PcmBackend(buffer_frames=0)
+        backend = PcmBackend(output_path='tcp://nohost')
+        backend.write(array('d', [0.0] * 16))
+        self.assertEqual(len(backend._pending), 32)
+        backend.stop()
+        with self.assertRaises(ValueError):
+            backend._connect('tcp://nohost')
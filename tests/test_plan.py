@@ -0,0 +1,108 @@
+"""test_plan.py
+
+Tests for the plan.py file.
+"""
+
+import unittest
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF, MF
+from bluebox.backends.backend_dummy import DummyBackend
+from bluebox.plan import PAUSE, PlanEntry, TimingPlan
+
+
+class TestTimingPlan(unittest.TestCase):
+    """TestTimingPlan class for testing the TimingPlan"""
+
+    def test_entries(self) -> None:
+        """Test the entries and their start samples."""
+        plan = TimingPlan([(PAUSE, 5), (3, 10), (PAUSE, 0), (1, 4)],
+                          DTMF().id_codes)
+        self.assertEqual(len(plan), 4)
+        self.assertEqual(plan.total_samples, 19)
+        self.assertEqual(plan[1], PlanEntry(3, 5, 10))
+        self.assertEqual(plan[1].end_sample, 15)
+        self.assertEqual(list(plan), plan[:])
+        self.assertEqual(list(plan.starts), [0, 5, 15, 15])
+        self.assertEqual(plan.code(plan[1].code_id), 'A')
+        self.assertIsNone(plan.code(PAUSE))
+        with self.assertRaises(TypeError):
+            plan.lengths[0] = 1  # type: ignore
+        with self.assertRaises(ValueError):
+            TimingPlan([(0, -1)])
+
+    def test_find(self) -> None:
+        """Test finding the entry containing a sample."""
+        plan = TimingPlan([(PAUSE, 5), (3, 10), (PAUSE, 0), (1, 4)])
+        self.assertEqual(plan.find(0), 0)
+        self.assertEqual(plan.find(4), 0)
+        self.assertEqual(plan.find(5), 1)
+        self.assertEqual(plan.find(15), 3)
+        self.assertEqual(plan.find(18), 3)
+        with self.assertRaises(IndexError):
+            plan.find(19)
+
+    def test_window(self) -> None:
+        """Test the entries overlapping a sample range."""
+        plan = TimingPlan([(PAUSE, 5), (3, 10), (PAUSE, 0), (1, 4)])
+        self.assertEqual(list(plan.window(3, 14)),
+                         [(0, 3, 2), (1, 0, 10), (3, 0, 2)])
+        self.assertEqual(list(plan.window(6, 2)), [(1, 1, 2)])
+        self.assertEqual(list(plan.window(17, 10)), [(3, 2, 2)])
+        self.assertEqual(list(plan.window(19, 10)), [])
+        self.assertEqual(list(TimingPlan([]).window(0, 10)), [])
+
+
+class TestSequencerPlan(unittest.TestCase):
+    """TestSequencerPlan class for testing Sequencer.plan"""
+
+    def test_plan(self) -> None:
+        """Test compiling a sequence with meta and pad pauses."""
+        seq = Sequencer(
+            mf=MF(), backend=DummyBackend, sample_rate=1000.0,
+            length=20.5, pause=10, pad_pause=30)
+        plan = seq.plan('KP1p2ST')
+        self.assertEqual(
+            [(plan.code(e.code_id), e.n_samples) for e in plan],
+            [(None, 30), ('KP', 21), (None, 10), ('1', 21), (None, 10),
+             (None, 10), (None, 10), ('2', 21), (None, 10), ('ST', 21),
+             (None, 30)])
+        self.assertEqual(plan.total_samples, 194)
+        self.assertEqual(seq.plan('p').total_samples, 70)
+        self.assertEqual(len(seq.plan('')), 0)
+
+    def test_plan_matches_rendering(self) -> None:
+        """Test that the plan lays out the rendered samples."""
+        for engine in ('python', 'numpy'):
+            for channels in (1, 2):
+                seq = Sequencer(
+                    mf=DTMF(), backend=DummyBackend, engine=engine,
+                    channels=channels, sample_rate=8000.0, length=22.3,
+                    pause=40.1, pad_pause=15.0)
+                plan = seq.plan('1p#')
+                segments = list(seq._segments('1p#'))
+                self.assertEqual(len(plan), len(segments))
+                for entry, segment in zip(plan, segments):
+                    self.assertEqual(
+                        entry.n_samples * channels, len(segment))
+                    if entry.code_id == PAUSE:
+                        self.assertFalse(any(segment))
+                    else:
+                        self.assertEqual(
+                            list(segment),
+                            list(seq._id_block(entry.code_id, channels)))
+                self.assertEqual(
+                    plan.total_samples * channels,
+                    sum(len(b) for b in seq.blocks('1p#')))
+
+    def test_plan_invalid(self) -> None:
+        """Test that invalid codes are skipped or raised."""
+        seq = Sequencer(mf=DTMF(), backend=DummyBackend, pad_pause=0.0)
+        self.assertEqual(seq.plan('1X2'), seq.plan('12'))
+        seq = Sequencer(mf=DTMF(), backend=DummyBackend,
+                        stop_on_error=True)
+        with self.assertRaises(ValueError):
+            seq.plan('1X2')
+
+
+if __name__ == '__main__':
+    unittest.main()
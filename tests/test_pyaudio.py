@@ -0,0 +1,301 @@
+"""test_pyaudio.py
+
+Tests for the PyAudio backends, using a fake PyAudio stream.
+"""
+
+import unittest
+import asyncio
+import threading
+import time
+import typing as t
+from array import array
+import pyaudio  # type: ignore
+from bluebox.backends.backend_pyaudio import (
+    PyAudioBackend, PyAudioBackendNonBlocking)
+from bluebox.aio import AsyncSequencer
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+
+
+class FakeStream:
+    """Fake callback stream pulling data from a thread.
+
+    The stream only pulls once the ring buffer can fill a whole period,
+    so the captured data does not depend on thread scheduling.
+    """
+
+    def __init__(
+            self,
+            ready: t.Callable[[], bool],
+            stream_callback: t.Callable,
+            **kwargs: t.Any) -> None:
+        self.ready = ready
+        self.callback = stream_callback
+        self.kwargs = kwargs
+        self.data = bytearray()
+        self._thread: t.Optional[threading.Thread] = None
+        self.start_stream()
+
+    def _run(self) -> None:
+        while self._active:
+            if not self.ready():
+                time.sleep(0.001)
+                continue
+            data, flag = self.callback(None, 64, {}, 0)
+            self.data += data
+            if flag == pyaudio.paComplete:
+                break
+        self._active = False
+
+    def start_stream(self) -> None:
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop_stream(self) -> None:
+        self._active = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def close(self) -> None:
+        self.stop_stream()
+
+
+class FakeBlockingStream:
+    """Fake blocking stream recording written data."""
+
+    def __init__(self, **kwargs: t.Any) -> None:
+        self.kwargs = kwargs
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        assert not self.closed
+        self.data += data
+
+    def stop_stream(self) -> None:
+        pass
+
+    def is_active(self) -> bool:
+        return not self.closed
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakePyAudio:
+    """Fake PyAudio instance creating fake streams."""
+
+    def __init__(self, ready: t.Callable[[], bool]) -> None:
+        self.ready = ready
+        self.streams: t.List[t.Any] = []
+
+    def open(self, **kwargs: t.Any) -> t.Any:
+        stream: t.Any
+        if kwargs.get('stream_callback') is None:
+            stream = FakeBlockingStream(**kwargs)
+        else:
+            stream = FakeStream(self.ready, **kwargs)
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self) -> None:
+        pass
+
+
+def make_backend(**kwargs: t.Any) -> t.Tuple[
+        PyAudioBackendNonBlocking, FakePyAudio]:
+    """Create a non-blocking backend with a fake PyAudio instance."""
+    backend = PyAudioBackendNonBlocking(sample_rate=8000.0, **kwargs)
+    backend._pyaudio_instance.terminate()
+    ring = backend._ring
+    fake = FakePyAudio(lambda: ring.available >= 64 * 4 or ring.closed)
+    backend._pyaudio_instance = fake
+    return backend, fake
+
+
+def make_blocking_backend() -> t.Tuple[PyAudioBackend, FakePyAudio]:
+    """Create a blocking backend with a fake PyAudio instance."""
+    backend = PyAudioBackend(sample_rate=8000.0)
+    backend._pyaudio_instance.terminate()
+    fake = FakePyAudio(lambda: True)
+    backend._pyaudio_instance = fake
+    return backend, fake
+
+
+class TestPyAudioBackendSession(unittest.TestCase):
+    """Test reusing one stream across Sequencer calls."""
+
+    def test_session_reuses_stream(self) -> None:
+        """Test a session keeps one stream open for all calls."""
+        backend, fake = make_blocking_backend()
+        seq = Sequencer(
+            mf=DTMF(), backend=backend, sample_rate=8000.0, pad_pause=0.0)
+        with seq.session() as be:
+            self.assertIs(be, backend)
+            self.assertTrue(backend.in_session)
+            # the stream is warmed up before the first sequence
+            self.assertEqual(len(fake.streams), 1)
+            seq('123')
+            seq('456')
+            self.assertTrue(backend._stream_open)
+        self.assertFalse(backend.in_session)
+        self.assertFalse(backend._stream_open)
+        self.assertEqual(len(fake.streams), 1)
+        expected = array(
+            'f', list(seq.sequence('123')) + list(seq.sequence('456')))
+        self.assertEqual(bytes(fake.streams[0].data), expected.tobytes())
+
+        # without a session every call opens a new stream
+        seq('1')
+        seq('2')
+        self.assertEqual(len(fake.streams), 3)
+
+    def test_session_idle_timeout(self) -> None:
+        """Test the idle timeout closes and the next call reopens."""
+        backend, fake = make_blocking_backend()
+        seq = Sequencer(
+            mf=DTMF(), backend=backend, sample_rate=8000.0, pad_pause=0.0)
+        with seq.session(idle_timeout=0.05):
+            seq('1')
+            time.sleep(0.3)
+            self.assertFalse(backend._stream_open)
+            seq('2')
+            self.assertTrue(backend._stream_open)
+        self.assertEqual(len(fake.streams), 2)
+
+    def test_session_idle_timer_race(self) -> None:
+        """Test a timer that fired before a playback does not close it."""
+        backend, fake = make_backend(buffer_frames=256)
+        with backend.session(idle_timeout=60.0):
+            backend.play(iter([0.5] * 100), close=False)
+            backend.wait(5.0)
+            fired = backend._idle_generation
+            backend.play(iter([0.25] * 1000), close=False)
+            # the stale timer only gets the lock after play started
+            backend._idle_close(fired)
+            self.assertTrue(backend._stream_open)
+            self.assertTrue(backend.wait(5.0))
+        self.assertEqual(len(fake.streams), 1)
+        self.assertEqual(
+            array('f', bytes(fake.streams[0].data)).tolist(),
+            [0.5] * 100 + [0.25] * 1000)
+
+    def test_session_non_blocking(self) -> None:
+        """Test the non-blocking backend keeps its stream in a session."""
+        backend, fake = make_backend()
+        seq = Sequencer(
+            mf=DTMF(), backend=backend, sample_rate=8000.0, pad_pause=0.0)
+        with seq.session():
+            seq('1')
+            seq('2')
+            backend.wait(5.0)
+            self.assertTrue(backend._stream_open)
+        self.assertFalse(backend._stream_open)
+        self.assertEqual(len(fake.streams), 1)
+
+
+class TestPyAudioBackendNonBlocking(unittest.TestCase):
+    """Test the callback driven PyAudio backend."""
+
+    def test_play_and_wait(self) -> None:
+        """Test all samples reach the stream in order."""
+        backend, fake = make_backend(buffer_frames=256)
+        seq = Sequencer(
+            mf=DTMF(),
+            backend=backend,
+            sample_rate=8000.0,
+            pad_pause=10.0,
+            frame_size=100)
+        expected = array('f', seq.sequence('123#')).tobytes()
+
+        seq('123#')
+        self.assertTrue(backend.wait(5.0))
+        self.assertFalse(backend.is_playing)
+        self.assertEqual(len(fake.streams), 1)
+        self.assertEqual(bytes(fake.streams[0].data), expected)
+        # close=True closes the stream once playback completed
+        self.assertFalse(backend._stream_open)
+        self.assertEqual(backend.underruns, 0)
+
+    def test_async_play(self) -> None:
+        """Test awaitable writes through the ring buffer."""
+        backend, fake = make_backend(buffer_frames=256)
+        seq = AsyncSequencer(
+            mf=DTMF(),
+            backend=backend,
+            sample_rate=8000.0,
+            pad_pause=10.0,
+            frame_size=100)
+        expected = array('f', seq.sequence('123#')).tobytes()
+
+        asyncio.run(seq.play('123#'))
+        self.assertFalse(backend.is_playing)
+        self.assertEqual(len(fake.streams), 1)
+        self.assertEqual(bytes(fake.streams[0].data), expected)
+        self.assertFalse(backend._stream_open)
+
+    def test_async_blocking_backend(self) -> None:
+        """Test the blocking backend writes from the executor."""
+        backend, fake = make_blocking_backend()
+        seq = AsyncSequencer(
+            mf=DTMF(), backend=backend, sample_rate=8000.0, pad_pause=0.0)
+        expected = array('f', seq.sequence('12')).tobytes()
+        asyncio.run(seq.play('12'))
+        self.assertEqual(bytes(fake.streams[0].data), expected)
+        self.assertTrue(fake.streams[0].closed)
+
+    def test_play_keeps_stream_open(self) -> None:
+        """Test consecutive playback on one stream."""
+        backend, fake = make_backend()
+        backend.play(iter([0.5] * 100), close=False)
+        backend.wait(5.0)
+        backend.play(iter([0.25] * 100), close=False)
+        backend.wait(5.0)
+        self.assertEqual(len(fake.streams), 1)
+        self.assertEqual(
+            array('f', bytes(fake.streams[0].data)).tolist(),
+            [0.5] * 100 + [0.25] * 100)
+        backend.close()
+
+    def test_write_larger_than_buffer(self) -> None:
+        """Test a block larger than the ring buffer does not block."""
+        backend, fake = make_backend(buffer_frames=64)
+        writer = threading.Thread(
+            target=backend.write, args=(array('d', [0.5] * 65),),
+            daemon=True)
+        writer.start()
+        writer.join(5.0)
+        self.assertFalse(writer.is_alive())
+        self.assertTrue(backend.wait(5.0))
+        self.assertEqual(
+            array('f', bytes(fake.streams[0].data)).tolist(), [0.5] * 65)
+        backend.close()
+
+    def test_errors_are_raised_on_wait(self) -> None:
+        """Test generation errors surface in wait."""
+        backend, _ = make_backend()
+
+        def blocks() -> t.Iterator[array]:
+            yield array('d', [0.0] * 10)
+            raise ValueError('boom')
+
+        backend.play_blocks(blocks())
+        with self.assertRaises(ValueError):
+            backend.wait(5.0)
+
+    def test_stop(self) -> None:
+        """Test stopping drops the remaining data."""
+        backend, _ = make_backend(buffer_frames=64)
+        backend.play(iter([0.1] * 100000), close=False)
+        backend.stop()
+        self.assertTrue(backend.wait(5.0))
+        self.assertFalse(backend.is_playing)
+        backend.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""test_render.py
+
+Tests for the render.py file.
+"""
+
+import unittest
+import io
+import itertools
+import tempfile
+from pathlib import Path
+from bluebox.box import Sequencer
+from bluebox.freqs import DTMF
+from bluebox.backends import DummyBackend, PcmBackend, WavBackend
+from bluebox.render import chunks, render_parallel
+import bluebox.cli as cli
+from tests.helpers import ShiftedDTMF
+
+
+class TestRender(unittest.TestCase):
+    """Test rendering sequences in parallel chunks."""
+
+    def _sequencer(self, **kwargs: object) -> Sequencer:
+        return Sequencer(
+            mf=DTMF(), sample_rate=8000.0, length=22.3, pause=13.1,
+            pad_pause=7.0, **kwargs)  # type: ignore
+
+    def test_chunks(self) -> None:
+        """Test that chunks cover the plan without cutting tones."""
+        plan = self._sequencer().plan('1p23')
+        bounds = chunks(plan, 100)
+        # the first boundary falls into the first tone and moves to its end
+        self.assertEqual(bounds[0], (0, plan[1].end_sample))
+        self.assertEqual(sum(n for _, n in bounds), plan.total_samples)
+        tones = {(e.start_sample, e.end_sample) for e in plan
+                 if e.code_id >= 0}
+        for start, n in bounds:
+            for tone_start, tone_end in tones:
+                self.assertFalse(tone_start < start < tone_end)
+        with self.assertRaises(ValueError):
+            chunks(plan, 0)
+
+    def test_render_wav(self) -> None:
+        """Test that the output equals serial rendering."""
+        codes = '123p#ABCD' * 3
+        with tempfile.TemporaryDirectory() as tmpdir:
+            serial = Path(tmpdir) / 'serial.wav'
+            for channels, routing in ((1, None), (2, 'split')):
+                self._sequencer(
+                    channels=channels, routing=routing,
+                    backend=WavBackend(
+                        output_path=serial, channels=channels,
+                        sample_format='int24'))(codes)
+                seq = self._sequencer(
+                    channels=channels, routing=routing)
+                for workers, memory_map in itertools.product(
+                        (0, 2), (False, True)):
+                    path = Path(tmpdir) / f'{workers}_{memory_map}.wav'
+                    samples = seq.render_parallel(
+                        codes,
+                        WavBackend(output_path=path, channels=channels,
+                                   sample_format='int24',
+                                   memory_map=memory_map),
+                        workers=workers, chunk_frames=500)
+                    self.assertEqual(path.read_bytes(), serial.read_bytes())
+                    self.assertEqual(
+                        samples, seq.plan(codes).total_samples * channels)
+
+    def test_render_stream(self) -> None:
+        """Test rendering raw samples to streams and the PCM backend."""
+        seq = self._sequencer()
+        expected = io.BytesIO()
+        render_parallel(seq, '42', expected, workers=0,
+                        sample_format='float32')
+        stream = io.BytesIO()
+        render_parallel(seq, seq.plan('42'), stream, workers=2,
+                        chunk_frames=64, sample_format='float32')
+        self.assertFalse(stream.closed)
+        self.assertEqual(stream.getvalue(), expected.getvalue())
+        self.assertEqual(len(stream.getvalue()),
+                         seq.plan('42').total_samples * 4)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'out.raw'
+            seq.render_parallel(
+                '42', PcmBackend(output_path=path, pcm_format='f32le'),
+                workers=2, chunk_frames=64)
+            self.assertEqual(path.read_bytes(), expected.getvalue())
+
+    def test_render_mf_instance(self) -> None:
+        """Test that the workers use the MF instance of the Sequencer."""
+        seq = Sequencer(
+            mf=ShiftedDTMF(50.0), sample_rate=8000.0, length=22.3,
+            pause=13.1, pad_pause=7.0)
+        expected = io.BytesIO()
+        render_parallel(seq, '1#', expected, workers=0)
+        stream = io.BytesIO()
+        render_parallel(seq, '1#', stream, workers=2, chunk_frames=64)
+        self.assertEqual(stream.getvalue(), expected.getvalue())
+        default = io.BytesIO()
+        render_parallel(self._sequencer(), '1#', default, workers=0)
+        self.assertNotEqual(stream.getvalue(), default.getvalue())
+
+    def test_render_session(self) -> None:
+        """Test that a session keeps the backend open between renders."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            serial = Path(tmpdir) / 'serial.wav'
+            seq = self._sequencer(backend=WavBackend(
+                output_path=serial, streaming=True))
+            with seq.session():
+                seq('123')
+                seq('#4')
+            for memory_map in (False, True):
+                path = Path(tmpdir) / f'{memory_map}.wav'
+                backend = WavBackend(
+                    output_path=path, streaming=True, memory_map=memory_map)
+                seq = self._sequencer(backend=backend)
+                with seq.session():
+                    seq.render_parallel('123', workers=2, chunk_frames=64)
+                    seq.render_parallel('#4', workers=2, chunk_frames=64)
+                self.assertEqual(path.read_bytes(), serial.read_bytes())
+
+    def test_render_invalid(self) -> None:
+        """Test outputs that cannot take PCM data."""
+        seq = self._sequencer()
+        with self.assertRaises(TypeError):
+            seq.render_parallel('1', DummyBackend())
+        with self.assertRaises(ValueError):
+            seq.render_parallel('1', io.BytesIO(), sample_format='int8')
+
+    def test_render_cli(self) -> None:
+        """Test that -j and --mmap write the same WAV output."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            serial = Path(tmpdir) / 'serial.wav'
+            parallel = Path(tmpdir) / 'parallel.wav'
+            cli.bluebox(cli.parse_args(
+                ['-b', 'wav', '-o', str(serial), '12345']))
+            for options in (['-j', '2'], ['--mmap'], ['--mmap', '-j', '2']):
+                cli.bluebox(cli.parse_args(
+                    ['-b', 'wav', '-o', str(parallel)] + options + ['12345']))
+                self.assertEqual(
+                    parallel.read_bytes(), serial.read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
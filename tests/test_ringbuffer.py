@@ -0,0 +1,61 @@
+"""test_ringbuffer.py
+
+Tests for the ringbuffer.py file.
+"""
+
+import unittest
+import threading
+from bluebox.ringbuffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    """TestRingBuffer class for testing the RingBuffer."""
+
+    def test_wraparound(self) -> None:
+        """Test reading and writing across the end of the buffer."""
+        ring = RingBuffer(8)
+        self.assertEqual(ring.write(b'abcdef'), 6)
+        self.assertEqual(ring.read(4), b'abcd')
+        self.assertEqual(ring.write(b'ghijklmn'), 6)
+        self.assertEqual(ring.free, 0)
+        self.assertEqual(ring.write(b'x'), 0)
+        self.assertEqual(ring.read(100), b'efghijkl')
+        self.assertEqual(len(ring), 0)
+
+    def test_close_and_cancel(self) -> None:
+        """Test end of data and cancellation."""
+        ring = RingBuffer(8)
+        ring.write(b'abc')
+        ring.close()
+        self.assertFalse(ring.eof)
+        self.assertEqual(ring.write(b'd'), 0)
+        self.assertEqual(ring.read(8), b'abc')
+        self.assertTrue(ring.eof)
+
+        ring.reset()
+        ring.write(b'abc')
+        ring.cancel()
+        self.assertTrue(ring.eof)
+        self.assertEqual(ring.read(8), b'')
+        self.assertFalse(ring.write_all(b'abc'))
+
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+    def test_threads(self) -> None:
+        """Test a producer thread writing more than the capacity."""
+        ring = RingBuffer(64)
+        data = bytes(range(256)) * 40
+
+        def produce() -> None:
+            ring.write_all(data)
+            ring.close()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        received = bytearray()
+        while not ring.eof:
+            ring.wait_readable(1.0)
+            received += ring.read(48)
+        producer.join()
+        self.assertEqual(bytes(received), data)
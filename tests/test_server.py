@@ -0,0 +1,172 @@
+"""test_server.py
+
+Tests for the server.py file.
+"""
+
+import unittest
+import asyncio
+import tempfile
+import typing as t
+import wave
+from pathlib import Path
+from bluebox.aio import AsyncSequencer
+from bluebox.backends import DummyBackend
+from bluebox.freqs import DTMF
+from bluebox.server import Server, parse_address
+
+
+def _sequencer(backend: DummyBackend) -> AsyncSequencer:
+    """Create a small Sequencer for the server."""
+    return AsyncSequencer(
+        mf=DTMF(), backend=backend, sample_rate=8000.0, length=20,
+        pause=10, pad_pause=0.0, stop_on_error=True)
+
+
+async def _client(
+        address: str,
+        lines: t.Sequence[str]) -> t.List[str]:
+    """Send request lines to a server and collect the responses."""
+    if address.startswith('unix://'):
+        reader, writer = await asyncio.open_unix_connection(
+            address[len('unix://'):])
+    else:
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        reader, writer = await asyncio.open_connection(host, int(port))
+    responses = []
+    for line in lines:
+        writer.write(line.encode() + b'\n')
+        await writer.drain()
+        responses.append((await reader.readline()).decode().strip())
+    writer.close()
+    return responses
+
+
+def _fields(response: str) -> t.Dict[str, str]:
+    """Parse the key=value fields of a response."""
+    return dict(f.split('=', 1) for f in response.split()[1:] if '=' in f)
+
+
+class TestServer(unittest.TestCase):
+    """TestServer class for testing the bluebox server."""
+
+    def _serve(
+            self,
+            server: Server,
+            clients: t.Callable[[str], t.Awaitable[t.Any]]) -> t.Any:
+        """Run clients against a started server."""
+        async def main() -> t.Any:
+            await server.start()
+            try:
+                return await clients(server.address)
+            finally:
+                await server.close()
+        return asyncio.run(main())
+
+    def test_tcp(self) -> None:
+        """Test playing, pinging and the stats over TCP."""
+        be = DummyBackend(mode='list', sample_rate=8000.0)
+        seq = _sequencer(be)
+        server = Server(seq, 'tcp://127.0.0.1:0')
+        responses = self._serve(server, lambda address: _client(
+            address, ['PING', 'PLAY 123', 'play 4', 'STATS', 'QUIT']))
+        self.assertEqual(responses[0], 'OK pong')
+        self.assertTrue(responses[1].startswith('OK id=1 '))
+        metrics = _fields(responses[1])
+        self.assertEqual(
+            int(metrics['samples']), len(list(seq.sequence('123'))))
+        self.assertLessEqual(
+            float(metrics['first_ms']), float(metrics['total_ms']))
+        self.assertTrue(responses[2].startswith('OK id=2 '))
+        self.assertEqual(
+            be.get_data(),
+            list(seq.sequence('123')) + list(seq.sequence('4')))
+        stats = _fields(responses[3])
+        self.assertEqual(stats['served'], '2')
+        self.assertEqual(stats['failed'], '0')
+        self.assertIn('p95_ms', stats)
+
+    def test_unix_render(self) -> None:
+        """Test rendering to a WAV file over a Unix socket."""
+        with tempfile.TemporaryDirectory() as d:
+            output = Path(d) / 'renders' / 'out.wav'
+            output.parent.mkdir()
+            server = Server(
+                _sequencer(DummyBackend(mode='stats')),
+                f'unix://{d}/bluebox.sock', output_dir=output.parent)
+            responses = self._serve(server, lambda address: _client(
+                address, ['RENDER out.wav 5551234']))
+            self.assertTrue(responses[0].startswith('OK id=1 '))
+            with wave.open(str(output), 'rb') as wav:
+                self.assertEqual(
+                    wav.getnframes(), int(_fields(responses[0])['samples']))
+            self.assertFalse((Path(d) / 'bluebox.sock').exists())
+
+    def test_render_paths(self) -> None:
+        """Test that RENDER cannot write outside the output directory."""
+        with tempfile.TemporaryDirectory() as d:
+            outside = Path(d) / 'outside.wav'
+            server = Server(
+                _sequencer(DummyBackend(mode='stats')), 'tcp://127.0.0.1:0')
+            responses = self._serve(server, lambda address: _client(
+                address, ['RENDER out.wav 1']))
+            self.assertEqual(
+                responses[0], 'ERR RENDER is disabled, no output directory')
+
+            (Path(d) / 'renders').mkdir()
+            server = Server(
+                _sequencer(DummyBackend(mode='stats')), 'tcp://127.0.0.1:0',
+                output_dir=Path(d) / 'renders')
+            responses = self._serve(server, lambda address: _client(
+                address, [f'RENDER {outside} 1', 'RENDER ../outside.wav 1',
+                          'RENDER a/../../outside.wav 1', 'PLAY 1']))
+            for response in responses[:3]:
+                self.assertTrue(response.startswith('ERR Invalid path'))
+            self.assertTrue(responses[3].startswith('OK id=1 '))
+            self.assertFalse(outside.exists())
+            self.assertEqual(
+                server.output_path('a.wav'), (Path(d) / 'renders' /
+                                              'a.wav').resolve())
+
+    def test_unix_not_a_socket(self) -> None:
+        """Test that a file at the socket path is not removed."""
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / 'bluebox.sock'
+            path.write_text('data')
+            server = Server(
+                _sequencer(DummyBackend(mode='stats')), f'unix://{path}')
+            with self.assertRaises(OSError):
+                asyncio.run(server.start())
+            self.assertEqual(path.read_text(), 'data')
+
+    def test_errors(self) -> None:
+        """Test that bad requests are answered with errors."""
+        server = Server(
+            _sequencer(DummyBackend(mode='stats')), 'tcp://127.0.0.1:0')
+        responses = self._serve(server, lambda address: _client(
+            address, ['DIAL 1', 'PLAY', 'PLAY 12X', 'PLAY 1']))
+        self.assertEqual(responses[0], 'ERR Unknown command: DIAL')
+        self.assertEqual(responses[1], 'ERR PLAY needs a sequence')
+        self.assertTrue(responses[2].startswith('ERR id=1 Invalid code'))
+        self.assertTrue(responses[3].startswith('OK id=2 '))
+        self.assertEqual(server.stats()['failed'], 1)
+
+        with self.assertRaises(ValueError):
+            parse_address('127.0.0.1:7474')
+        with self.assertRaises(ValueError):
+            Server(_sequencer(DummyBackend()), queue_size=0)
+
+    def test_queue(self) -> None:
+        """Test that concurrent clients are queued and served in order."""
+        be = DummyBackend(mode='list', sample_rate=8000.0)
+        seq = _sequencer(be)
+        server = Server(seq, 'tcp://127.0.0.1:0', queue_size=2)
+
+        async def clients(address: str) -> t.List[t.List[str]]:
+            return await asyncio.gather(*(
+                _client(address, [f'PLAY {code * 20}']) for code in '123'))
+
+        responses = [r[0] for r in self._serve(server, clients)]
+        self.assertEqual(sum(r.startswith('OK') for r in responses), 2)
+        self.assertIn('ERR Queue full', responses)
+        self.assertEqual(len(be.get_data()), 2 * len(
+            list(seq.sequence('1' * 20))))
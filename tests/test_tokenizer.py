@@ -0,0 +1,76 @@
+"""test_tokenizer.py
+
+Tests for the tokenizer.py file.
+"""
+
+import unittest
+from bluebox.freqs import DTMF, MF
+from bluebox.tokenizer import Tokenizer
+
+
+class TestTokenizer(unittest.TestCase):
+    """TestTokenizer class for testing the Tokenizer class."""
+
+    def test_longest_match(self) -> None:
+        """Test that multi-character codes take precedence."""
+        tokenizer = Tokenizer(MF().valid_codes() | {'p', 'P'})
+        self.assertEqual(
+            tokenizer.split('KP11ST'), ['KP', '11', 'ST'])
+        self.assertEqual(
+            tokenizer.split('KP2 1 1 0ST3P'),
+            ['KP2', '1', '1', '0', 'ST3', 'P'])
+        self.assertEqual(tokenizer.split('KPKP2ST2'), ['KP', 'KP2', 'ST2'])
+
+    def test_digit_runs(self) -> None:
+        """Test runs of MF digits are dialed one digit at a time."""
+        tokenizer = Tokenizer(MF().valid_codes() | {'p', 'P'})
+        self.assertEqual(tokenizer.split('1010'), ['1', '0', '1', '0'])
+        self.assertEqual(tokenizer.split('1234'), ['1', '2', '3', '4'])
+        self.assertEqual(
+            tokenizer.split('18005551010'),
+            ['1', '8', '0', '0', '5', '5', '5', '1', '0', '1', '0'])
+        self.assertEqual(
+            tokenizer.split('KP 1 1 5551234 ST'),
+            ['KP', '1', '1', '5', '5', '5', '1', '2', '3', '4', 'ST'])
+        # two digit codes only when they are the whole run
+        self.assertEqual(tokenizer.split('11'), ['11'])
+        self.assertEqual(tokenizer.split('KP 12 ST'), ['KP', '12', 'ST'])
+        self.assertEqual(
+            tokenizer.split('10p110'), ['10', 'p', '1', '1', '0'])
+
+    def test_token_array(self) -> None:
+        """Test the token ids index the codes."""
+        tokenizer = Tokenizer(DTMF().valid_codes())
+        tokens = tokenizer.tokenize('19#')
+        self.assertEqual(tokens.typecode, 'H')
+        self.assertEqual(
+            [tokenizer.codes[i] for i in tokens], ['1', '9', '#'])
+        self.assertEqual(tokenizer.id('9'), tokens[1])
+        self.assertEqual(tokenizer.split(' 1 9\n#'), ['1', '9', '#'])
+        invalid = []
+        tokenizer.tokenize('1 E9', lambda c, i: invalid.append((c, i)))
+        self.assertEqual(invalid, [('E', 2)])
+        self.assertEqual(len(tokenizer), 16)
+        with self.assertRaises(KeyError):
+            tokenizer.id('X')
+
+    def test_invalid(self) -> None:
+        """Test invalid characters are reported with their position."""
+        tokenizer = Tokenizer(MF().valid_codes())
+        invalid = []
+        tokens = tokenizer.tokenize(
+            'KPX 12\nSTQ', lambda c, i: invalid.append((c, i)))
+        self.assertEqual(
+            [tokenizer.codes[i] for i in tokens], ['KP', '12', 'ST'])
+        self.assertEqual(invalid, [('X', 2), ('Q', 9)])
+        # a lone K is not the start of a valid code
+        self.assertEqual(tokenizer.split('K1'), ['1'])
+
+        def stop(code: str, position: int) -> None:
+            raise ValueError(code)
+
+        with self.assertRaises(ValueError):
+            tokenizer.tokenize('1Z2', stop)
+
+        with self.assertRaises(ValueError):
+            Tokenizer(['1', 'A B'])
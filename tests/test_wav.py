@@ -7,7 +7,7 @@ import unittest
 import tempfile
 import wave
 from pathlib import Path
-from bluebox.backends.backend_wav import WavBackend
+from bluebox.backends.backend_wav import WavBackend, WavReader
 from bluebox.box import Sequencer
 from bluebox.freqs import DTMF
 
@@ -113,6 +113,185 @@ class TestWavBackend(unittest.TestCase):
             backend2 = WavBackend(output_path=output_path2)
             self.assertIsInstance(backend2._output_path, Path)
 
+    def test_wav_streaming(self) -> None:
+        """Test that streaming mode writes the same file as buffering."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            contents = []
+            for streaming in (False, True):
+                output_path = Path(tmpdir) / f'test_{streaming}.wav'
+                backend = WavBackend(
+                    output_path=output_path,
+                    sample_rate=8000.0,
+                    streaming=streaming)
+                seq = Sequencer(
+                    mf=DTMF(),
+                    backend=backend,
+                    pad_pause=10.0,
+                    sample_rate=8000.0,
+                    length=50,
+                    pause=25,
+                    frame_size=100)
+                seq('123#')
+                self.assertEqual(len(backend._buffer), 0)
+                contents.append(output_path.read_bytes())
+
+                with wave.open(str(output_path), 'rb') as wav:
+                    self.assertEqual(wav.getnchannels(), 1)
+                    self.assertEqual(wav.getsampwidth(), 2)
+                    self.assertEqual(wav.getframerate(), 8000)
+                    # 4 tones * 400 + 3 pauses * 200 + 2 pads * 80
+                    self.assertEqual(wav.getnframes(), 2360)
+
+            self.assertEqual(contents[0], contents[1])
+
+    def test_wav_streaming_empty(self) -> None:
+        """Test that streaming mode creates no file without data."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / 'test_empty.wav'
+            backend = WavBackend(output_path=output_path, streaming=True)
+            backend.play_blocks(iter([]))
+            self.assertFalse(output_path.exists())
+
+    def test_wav_sample_formats(self) -> None:
+        """Test writing integer and float sample formats."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for fmt, width in (('int16', 2), ('int24', 3), ('int32', 4)):
+                output_path = Path(tmpdir) / f'test_{fmt}.wav'
+                backend = WavBackend(
+                    output_path=output_path,
+                    sample_rate=8000.0,
+                    sample_format=fmt,
+                    dither=True)
+                backend.play(iter([0.0, 0.5, -0.5]))
+                with wave.open(str(output_path), 'rb') as wav:
+                    self.assertEqual(wav.getsampwidth(), width)
+                    self.assertEqual(wav.getnframes(), 3)
+
+            output_path = Path(tmpdir) / 'test_float32.wav'
+            backend = WavBackend(
+                output_path=output_path,
+                sample_rate=8000.0,
+                sample_format='float32',
+                streaming=True)
+            backend.play(iter([0.0, 0.5, -0.5]))
+            data = output_path.read_bytes()
+            self.assertEqual(data[:4], b'RIFF')
+            self.assertEqual(
+                int.from_bytes(data[4:8], 'little'), len(data) - 8)
+            # float format tag, fact chunk with the frame count
+            self.assertEqual(int.from_bytes(data[20:22], 'little'), 3)
+            self.assertEqual(data[38:42], b'fact')
+            self.assertEqual(int.from_bytes(data[46:50], 'little'), 3)
+            self.assertEqual(data[50:54], b'data')
+            self.assertEqual(int.from_bytes(data[54:58], 'little'), 12)
+
+            with self.assertRaises(ValueError):
+                WavBackend(output_path=output_path, sample_format='int8')
+
+    def test_wav_session(self) -> None:
+        """Test a session collects several sequences into one file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / 'test_session.wav'
+            backend = WavBackend(
+                output_path=output_path, sample_rate=8000.0, streaming=True)
+            seq = Sequencer(
+                mf=DTMF(),
+                backend=backend,
+                pad_pause=0.0,
+                sample_rate=8000.0,
+                length=50,
+                pause=25)
+            # backends without an audio stream ignore the idle timeout
+            with seq.session(idle_timeout=5):
+                seq('12')
+                seq('34')
+                # the file is still open for writing
+                self.assertIsNotNone(backend._writer)
+
+            with wave.open(str(output_path), 'rb') as wav:
+                self.assertEqual(wav.getnframes(), 2 * (2 * 400 + 200))
+
+    def test_wav_reader(self) -> None:
+        """Test reading back the written samples in blocks."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / 'test_reader.wav'
+            backend = WavBackend(
+                output_path=output_path, sample_rate=8000.0, channels=2,
+                sample_format='float32')
+            seq = Sequencer(
+                mf=DTMF(), backend=backend, pad_pause=0.0,
+                sample_rate=8000.0, channels=2)
+            seq('12')
+            with WavReader(output_path) as reader:
+                self.assertEqual(reader.sample_rate, 8000)
+                self.assertEqual(reader.channels, 2)
+                self.assertEqual(reader.sample_format, 'float32')
+                blocks = list(reader.blocks(100, engine='python'))
+                self.assertEqual(len(blocks[0]), 200)
+                samples = [s for b in blocks for s in b]
+                self.assertEqual(len(samples), 2 * reader.frames)
+            expected = [s for b in seq.blocks('12') for s in b]
+            for a, b in zip(samples, expected):
+                self.assertAlmostEqual(a, b, places=6)
+
+            output_path.write_bytes(b'RIFF\x00\x00\x00\x00WAVE')
+            with self.assertRaises(ValueError):
+                WavReader(output_path)
+
+    def test_wav_memory_map(self) -> None:
+        """Test that memory map mode writes the same file as streaming."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for fmt in ('int16', 'int24', 'float32'):
+                contents = []
+                for memory_map in (False, True):
+                    output_path = Path(tmpdir) / f'test_{memory_map}.wav'
+                    backend = WavBackend(
+                        output_path=output_path, sample_rate=8000.0,
+                        sample_format=fmt, streaming=True,
+                        memory_map=memory_map)
+                    seq = Sequencer(
+                        mf=DTMF(), backend=backend, pad_pause=10.0,
+                        sample_rate=8000.0, length=50.1, pause=25)
+                    with seq.session():
+                        seq('123#')
+                        if memory_map:
+                            # created at its final size by the first call
+                            self.assertEqual(
+                                backend._mapped.capacity,  # type: ignore
+                                seq.plan('123#').total_samples)
+                        # more than was reserved grows the file
+                        backend.play(iter([0.25] * 3001), close=False)
+                    contents.append(output_path.read_bytes())
+                self.assertEqual(contents[0], contents[1])
+                with WavReader(output_path) as reader:
+                    self.assertEqual(
+                        reader.frames,
+                        seq.plan('123#').total_samples + 3001)
+
+    def test_wav_allocate(self) -> None:
+        """Test claiming regions of a memory mapped file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / 'test_allocate.wav'
+            backend = WavBackend(
+                output_path=output_path, sample_rate=8000.0, channels=2,
+                memory_map=True)
+            backend.write_pcm(b'\x01\x00\x02\x00')
+            offset = backend.allocate(3)
+            self.assertEqual(offset, 44 + 4)
+            with output_path.open('r+b') as f:
+                f.seek(offset + 4)
+                f.write(b'\x03\x00\x04\x00')
+            backend.close()
+            data = output_path.read_bytes()
+            self.assertEqual(len(data), 44 + 16)
+            self.assertEqual(int.from_bytes(data[40:44], 'little'), 16)
+            self.assertEqual(
+                data[44:], b'\x01\x00\x02\x00' + bytes(4) +
+                b'\x03\x00\x04\x00' + bytes(4))
+
+            with self.assertRaises(ValueError):
+                WavBackend(output_path=output_path).allocate(1)
+
 
 if __name__ == '__main__':
     unittest.main()
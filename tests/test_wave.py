@@ -53,3 +53,192 @@ class TestWave(unittest.TestCase):
             self.assertAlmostEqual(
                 sine_wave[i],
                 math.sin(2 * math.pi * 5 * i / 100))
+
+    def test_sine_block(self) -> None:
+        """Test the block generator with the python engine."""
+
+        sine = wave.SineWave(sample_rate=100)
+        block = sine.sine_block(freq=5, length=1000, amplitude=1.0)
+        self.assertEqual(len(block), 100)
+        self.assertEqual(list(block), list(sine.sine(5, 1000, 1.0)))
+
+        silence = sine.sine_block(freq=0, length=1000)
+        self.assertEqual(len(silence), 100)
+        self.assertEqual(max(silence), 0.0)
+
+    @unittest.skipUnless(wave.numpy_available(), 'numpy not installed')
+    def test_sine_block_numpy(self) -> None:
+        """Test the block generator with the numpy engine."""
+
+        sine = wave.SineWave(sample_rate=100, engine='numpy')
+        self.assertEqual(sine.engine, 'numpy')
+        block = sine.sine_block(freq=5, length=1000, amplitude=1.0)
+        self.assertEqual(block.dtype.name, 'float32')
+        self.assertEqual(len(block), 100)
+        for i in range(100):
+            self.assertAlmostEqual(
+                float(block[i]),
+                math.sin(2 * math.pi * 5 * i / 100),
+                places=6)
+
+    def test_resolve_engine(self) -> None:
+        """Test engine selection and fallback."""
+
+        self.assertEqual(wave.resolve_engine('python'), 'python')
+        self.assertIn(wave.resolve_engine('auto'), wave.ENGINES)
+        expected = 'numpy' if wave.numpy_available() else 'python'
+        self.assertEqual(wave.resolve_engine('numpy'), expected)
+        with self.assertRaises(ValueError):
+            wave.resolve_engine('fortran')
+
+    def test_recursive_oscillator(self) -> None:
+        """Test the recursive oscillator against the exact sine."""
+
+        osc = wave.RecursiveOscillator(
+            2600, sample_rate=8000, amplitude=0.5, phase=0.3, renormalize=64)
+        block = osc.block(8000)
+        self.assertEqual(len(block), 8000)
+        self.assertEqual(osc.position, 8000)
+        for i in range(0, 8000, 97):
+            self.assertAlmostEqual(
+                block[i],
+                0.5 * math.sin(2 * math.pi * 2600 * i / 8000 + 0.3),
+                places=9)
+
+        with self.assertRaises(ValueError):
+            wave.RecursiveOscillator(440, renormalize=0)
+
+    def test_recursive_oscillator_continuous(self) -> None:
+        """Test that successive blocks join without discontinuities."""
+
+        sine = wave.SineWave(sample_rate=8000)
+        whole = sine.recursive(1000, 1.0).block(1000)
+        osc = sine.recursive(1000, 1.0)
+        chunks = [osc.block(n) for n in (1, 333, 7, 659)]
+        joined = [s for c in chunks for s in c]
+        self.assertEqual(len(joined), 1000)
+        for a, b in zip(whole, joined):
+            self.assertAlmostEqual(a, b, places=12)
+        self.assertAlmostEqual(
+            math.cos(osc.phase), math.cos(2 * math.pi * 1000 * 1000 / 8000))
+
+    @unittest.skipUnless(wave.numpy_available(), 'numpy not installed')
+    def test_recursive_oscillator_numpy(self) -> None:
+        """Test the recursive oscillator with the numpy engine."""
+
+        python = wave.RecursiveOscillator(2600, 8000, renormalize=100)
+        numpy = wave.RecursiveOscillator(
+            2600, 8000, engine='numpy', renormalize=100)
+        for n in (50, 250, 3):
+            a, b = python.block(n), numpy.block(n)
+            self.assertEqual(b.dtype.name, 'float32')
+            for x, y in zip(a, b):
+                self.assertAlmostEqual(x, float(y), places=6)
+
+    def test_sine_block_recursive(self) -> None:
+        """Test sine_block with the recursive oscillator."""
+
+        sine = wave.SineWave(sample_rate=100, oscillator='recursive')
+        self.assertEqual(sine.oscillator, 'recursive')
+        block = sine.sine_block(freq=5, length=1000, amplitude=1.0)
+        for a, b in zip(block, sine.sine(5, 1000, 1.0)):
+            self.assertAlmostEqual(a, b)
+        self.assertEqual(max(sine.sine_block(freq=0, length=1000)), 0.0)
+
+        with self.assertRaises(ValueError):
+            wave.SineWave(oscillator='square')
+
+    def test_wavetable_oscillator(self) -> None:
+        """Test the wavetable oscillator against the exact sine."""
+
+        osc = wave.WavetableOscillator(
+            2600, sample_rate=8000, amplitude=0.5, phase=0.3)
+        first = osc.block(3001)
+        block = list(first) + list(osc.block(4999))
+        self.assertEqual(osc.position, 8000)
+        for i in range(0, 8000, 97):
+            self.assertAlmostEqual(
+                block[i],
+                0.5 * math.sin(2 * math.pi * 2600 * i / 8000 + 0.3),
+                places=6)
+
+        with self.assertRaises(ValueError):
+            wave.WavetableOscillator(440, size=1)
+
+    @unittest.skipUnless(wave.numpy_available(), 'numpy not installed')
+    def test_wavetable_oscillator_numpy(self) -> None:
+        """Test the wavetable oscillator with the numpy engine."""
+
+        python = wave.WavetableOscillator(1336, 8000)
+        numpy = wave.WavetableOscillator(1336, 8000, engine='numpy')
+        for n in (50, 250, 3):
+            a, b = python.block(n), numpy.block(n)
+            self.assertEqual(b.dtype.name, 'float32')
+            for x, y in zip(a, b):
+                self.assertAlmostEqual(x, float(y), places=6)
+        self.assertAlmostEqual(python.phase, numpy.phase)
+
+    def test_sine_block_table(self) -> None:
+        """Test sine_block with the wavetable oscillator."""
+
+        sine = wave.SineWave(sample_rate=100, oscillator='table')
+        block = sine.sine_block(freq=5, length=1000, amplitude=1.0)
+        for a, b in zip(block, sine.sine(5, 1000, 1.0)):
+            self.assertAlmostEqual(a, b, places=6)
+
+    def test_sine_range(self) -> None:
+        """Test rendering part of a sine wave from its analytic phase."""
+
+        for engine in ('python', 'numpy'):
+            for oscillator in wave.OSCILLATORS:
+                sine = wave.SineWave(
+                    sample_rate=8000, engine=engine, oscillator=oscillator)
+                whole = list(sine.sine_block(697.0, 100, 0.5))
+                part = list(sine.sine_range(697.0, 317, 200, 0.5))
+                self.assertEqual(len(part), 200)
+                if oscillator == 'exact':
+                    self.assertEqual(part, whole[317:517])
+                for a, b in zip(part, whole[317:517]):
+                    self.assertAlmostEqual(a, b, places=6)
+                self.assertEqual(
+                    list(sine.sine_range(0.0, 317, 3, 0.5)), [0.0] * 3)
+
+    def test_select_oscillator(self) -> None:
+        """Test the oscillator selection by SNR."""
+
+        self.assertEqual(wave.select_oscillator(90.0), 'recursive')
+        self.assertEqual(wave.select_oscillator(200.0), 'recursive')
+        self.assertEqual(wave.select_oscillator(300.0), 'exact')
+        # the table is never cheaper, it is only used when asked for
+        for engine in wave.ENGINES:
+            for snr in (0.0, 120.0, wave.table_snr(wave.TABLE_SIZE)):
+                self.assertNotEqual(
+                    wave.select_oscillator(snr, engine), 'table')
+        self.assertAlmostEqual(wave.table_snr(4096), 133.2, places=1)
+
+    @unittest.skipUnless(wave.numpy_available(), 'numpy not installed')
+    def test_select_oscillator_numpy(self) -> None:
+        """Test that float32 output limits the numpy engine SNR."""
+        self.assertEqual(
+            wave.select_oscillator(150.0, 'numpy'), 'recursive')
+        self.assertEqual(wave.select_oscillator(160.0, 'numpy'), 'exact')
+
+    def test_declared_snr(self) -> None:
+        """Test that every oscillator meets its declared SNR."""
+        engines = wave.ENGINES if wave.numpy_available() else ('python',)
+        f = 1633.0
+        for engine in engines:
+            for oscillator, declared in wave.OSCILLATOR_SNR[engine].items():
+                sine = wave.SineWave(
+                    sample_rate=44100.0, engine=engine,
+                    oscillator=oscillator)
+                block = [float(v) for v in sine.sine_block(f, 200.0)]
+                signal = noise = 0.0
+                for i, v in enumerate(block):
+                    ref = math.sin(2 * math.pi * f * i / 44100.0)
+                    signal += ref * ref
+                    noise += (v - ref) ** 2
+                measured = 10 * math.log10(signal / noise) if noise \
+                    else math.inf
+                self.assertGreaterEqual(
+                    measured, min(declared, 200.0), (engine, oscillator))